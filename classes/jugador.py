@@ -55,3 +55,22 @@ class Jugador:
 
     def log(self, msg: str) -> None:
         self.historial_eventos.append(msg)
+
+    def to_dict(self) -> dict:
+        return {
+            "nombre": self.nombre,
+            "posicion": list(self.posicion),
+            "inventario": list(self.inventario),
+            "puntuacion": self.__puntuacion,
+            "vidas": self.__vidas,
+            "invulnerable_ticks": self.invulnerable_ticks,
+            "poison_ticks": self.poison_ticks,
+            "escudos": self.escudos,
+        }
+
+    @classmethod
+    def desde_dict(cls, d: dict) -> "Jugador":
+        return cls(nombre=d["nombre"], posicion=tuple(d["posicion"]), inventario=list(d.get("inventario", [])),
+                   _Jugador__puntuacion=d.get("puntuacion", 0), _Jugador__vidas=d.get("vidas", 3),
+                   invulnerable_ticks=d.get("invulnerable_ticks", 0), poison_ticks=d.get("poison_ticks", 0),
+                   escudos=d.get("escudos", 0))
@@ -0,0 +1,89 @@
+import threading
+from typing import Callable, Dict, Optional
+from data.metricas import METRICAS
+
+
+class EscritorAsincrono:
+    """
+    Hilo de fondo que ejecuta las escrituras de `data/storage.py`.
+
+    Cada escritura se encola con una clave (la colección / el archivo) y una
+    función sin argumentos que ya lleva una copia de los datos. Garantías:
+      - coalescencia: si la clave ya tiene una escritura pendiente, la nueva
+        la reemplaza en su mismo lugar de la cola (solo se escribe la última);
+      - orden: un único hilo aplica las claves en el orden en que entraron, y
+        una escritura nunca se adelanta a otra anterior de la misma clave;
+      - cota: con `max_pendientes` claves en cola, `encolar` espera (backpressure);
+      - `flush()` bloquea hasta que todo lo encolado esté en disco y re-lanza
+        el primer error que haya tenido el hilo.
+    """
+
+    def __init__(self, max_pendientes: int = 16):
+        self.max_pendientes = max_pendientes
+        self._cond = threading.Condition()
+        self._pendientes: Dict[str, Callable[[], None]] = {}   # clave -> escritura (orden de llegada)
+        self._ocupado = False
+        self._error: Optional[BaseException] = None
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._bucle, name="storage-writer", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, clave: str, escritura: Callable[[], None]) -> None:
+        with self._cond:
+            self._relanzar_error()
+            if self._cerrado:
+                raise RuntimeError("El escritor ya está cerrado")
+            if clave in self._pendientes:
+                METRICAS.contar("escrituras_coalescidas")
+            else:
+                while len(self._pendientes) >= self.max_pendientes:
+                    self._cond.wait()
+            self._pendientes[clave] = escritura
+            self._cond.notify_all()
+
+    def _bucle(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pendientes and not self._cerrado:
+                    self._cond.wait()
+                if not self._pendientes:
+                    return
+                clave = next(iter(self._pendientes))
+                escritura = self._pendientes.pop(clave)
+                self._ocupado = True
+                self._cond.notify_all()
+            try:
+                escritura()
+            except BaseException as e:
+                with self._cond:
+                    self._error = self._error or e
+            finally:
+                with self._cond:
+                    self._ocupado = False
+                    self._cond.notify_all()
+
+    def _relanzar_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    @property
+    def pendientes(self) -> int:
+        with self._cond:
+            return len(self._pendientes) + self._ocupado
+
+    def flush(self) -> None:
+        """Espera a que se apliquen todas las escrituras encoladas."""
+        with self._cond:
+            while self._pendientes or self._ocupado:
+                self._cond.wait()
+            self._relanzar_error()
+
+    def cerrar(self) -> None:
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._cerrado = True
+                self._cond.notify_all()
+            self._hilo.join()
@@ -0,0 +1,266 @@
+import json, os, threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from classes.animal import Animal
+from classes.item import Item
+from classes.trap import Trap
+from data.metricas import METRICAS
+from data.storage import (DATA, BackendJson, aplicar_campos, animal_desde_dict, dicts_de,
+                          item_desde_dict, trampa_desde_dict)
+
+JOURNAL_DIR = DATA / "journal"
+SNAPSHOT = "snapshot.json"
+COLECCIONES = ("animales", "items", "trampas")
+
+
+def _diff(coleccion: str, viejo: List[dict], nuevo: List[dict]) -> List[dict]:
+    """Registros mínimos que llevan `viejo` a `nuevo` (sets por índice o un splice)."""
+    if len(viejo) == len(nuevo):
+        return [{"c": coleccion, "op": "set", "i": i, "d": d}
+                for i, (v, d) in enumerate(zip(viejo, nuevo)) if v != d]
+    p = 0
+    tope = min(len(viejo), len(nuevo))
+    while p < tope and viejo[p] == nuevo[p]:
+        p += 1
+    s = 0
+    while s < tope - p and viejo[-1 - s] == nuevo[-1 - s]:
+        s += 1
+    return [{"c": coleccion, "op": "splice", "i": p, "del": len(viejo) - p - s,
+             "ins": nuevo[p:len(nuevo) - s]}]
+
+
+def _escribir_atomico(path: Path, texto: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(texto)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class BackendJournal:
+    """
+    Backend con journal de solo-agregado + snapshot compactado.
+
+    Cada mutación agrega un registro JSON de una línea a `journal.<gen>.jsonl`,
+    así el costo de escribir depende del tamaño del cambio y no del de la
+    colección. Cada `compactar_cada` registros se abre una generación nueva y
+    un hilo de fondo vuelca el estado a `snapshot.json` (archivo temporal +
+    `os.replace`), después borra los journals ya incluidos. Al cargar se lee
+    el snapshot y se reaplican los journals posteriores; una última línea
+    truncada por un corte se descarta.
+    """
+    nombre = "journal"
+
+    def __init__(self, data_dir: Path = JOURNAL_DIR, compactar_cada: int = 2000,
+                 sync: bool = False, migrar_desde: Optional[Path] = DATA):
+        self.dir = Path(data_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.compactar_cada = compactar_cada
+        self.sync = sync
+        self._estado: Dict[str, object] = {}
+        self._gen = 0
+        self._registros = 0
+        self._compactador: Optional[threading.Thread] = None
+        self._cargar()
+        self._journal = open(self._path_journal(self._gen), "a", encoding="utf-8")
+        if migrar_desde is not None and not any(c in self._estado for c in COLECCIONES):
+            self._migrar(migrar_desde)
+
+    # ---------- archivo ----------
+    def _path_journal(self, gen: int) -> Path:
+        return self.dir / f"journal.{gen}.jsonl"
+
+    def _cargar(self) -> None:
+        snap = self.dir / SNAPSHOT
+        if snap.exists():
+            data = json.loads(snap.read_text(encoding="utf-8"))
+            self._gen = data["gen"]
+            self._estado = data["colecciones"]
+        gens = sorted(int(p.name.split(".")[1]) for p in self.dir.glob("journal.*.jsonl"))
+        for gen in gens:
+            if gen < self._gen:
+                self._path_journal(gen).unlink(missing_ok=True)  # ya incluido en el snapshot
+                continue
+            self._reaplicar(self._path_journal(gen))
+            self._gen = gen
+
+    def _reaplicar(self, path: Path) -> None:
+        bueno = 0
+        with open(path, "rb") as f:
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                try:
+                    rec = json.loads(linea)
+                except ValueError:
+                    break
+                self._aplicar(rec)
+                self._registros += 1
+                bueno += len(linea)
+        if bueno < path.stat().st_size:
+            with open(path, "r+b") as f:  # descarta la cola corrupta
+                f.truncate(bueno)
+
+    def _aplicar(self, rec: dict) -> None:
+        col, op = rec["c"], rec["op"]
+        if op == "put":
+            self._estado[col] = rec["d"]
+            return
+        lista = self._estado.setdefault(col, [])
+        if op == "set":
+            lista[rec["i"]] = rec["d"]
+        elif op == "splice":
+            i = rec["i"]
+            lista[i:i + rec["del"]] = rec["ins"]
+
+    def _agregar(self, registros: List[dict]) -> None:
+        if not registros:
+            return
+        for rec in registros:
+            self._aplicar(rec)
+        texto = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for r in registros)
+        self._journal.write(texto)
+        if METRICAS.activo:
+            METRICAS.contar("registros_journal", len(registros))
+            METRICAS.contar("bytes_escritos", len(texto.encode("utf-8")))
+        self._journal.flush()
+        if self.sync:
+            os.fsync(self._journal.fileno())
+        self._registros += len(registros)
+        if self._registros >= self.compactar_cada:
+            self.compactar()
+
+    def _migrar(self, data_dir: Path) -> None:
+        origen = BackendJson(data_dir)
+        for col in COLECCIONES:
+            if origen.existe(col):
+                getattr(self, f"guardar_{col}")(getattr(origen, f"cargar_{col}")())
+        for col in ("player", "mundo"):
+            if origen.existe(col):
+                self._agregar([{"c": col, "op": "put", "d": origen._leer(col)}])
+
+    # ---------- compactación ----------
+    def compactar(self, bloqueante: bool = False) -> None:
+        """Rota el journal y vuelca el estado a un snapshot nuevo en segundo plano."""
+        self.esperar_compactacion()
+        gen_vieja = self._gen
+        self._gen += 1
+        self._journal.close()
+        self._journal = open(self._path_journal(self._gen), "a", encoding="utf-8")
+        self._registros = 0
+        # Los dicts nunca se mutan in place (se reemplazan), alcanza con copiar las listas.
+        estado = {c: (list(v) if isinstance(v, list) else v) for c, v in self._estado.items()}
+        gen = self._gen
+
+        def trabajo():
+            texto = json.dumps({"gen": gen, "colecciones": estado}, ensure_ascii=False)
+            _escribir_atomico(self.dir / SNAPSHOT, texto)
+            METRICAS.contar("archivos_reescritos")
+            for g in range(gen_vieja, gen):
+                self._path_journal(g).unlink(missing_ok=True)
+
+        if bloqueante:
+            trabajo()
+        else:
+            self._compactador = threading.Thread(target=trabajo, name="journal-compactor", daemon=True)
+            self._compactador.start()
+
+    def esperar_compactacion(self) -> None:
+        if self._compactador is not None:
+            self._compactador.join()
+            self._compactador = None
+
+    def existe(self, coleccion: str) -> bool:
+        return coleccion in self._estado
+
+    def tiene_datos(self, coleccion: str) -> bool:
+        return bool(self._estado.get(coleccion))
+
+    def _lista(self, coleccion: str) -> List[dict]:
+        return self._estado.get(coleccion, [])
+
+    def _guardar(self, coleccion: str, nuevo: List[dict]) -> None:
+        if coleccion not in self._estado:
+            self._agregar([{"c": coleccion, "op": "splice", "i": 0, "del": 0, "ins": nuevo}])
+        else:
+            self._agregar(_diff(coleccion, self._lista(coleccion), nuevo))
+
+    def lote(self, coleccion: str, fn):
+        """`fn(dicts)` -> `(dicts_nuevos, resultado)`; el cambio se journaliza como un solo diff."""
+        nuevos, resultado = fn(list(self._lista(coleccion)))
+        self._guardar(coleccion, nuevos)
+        return resultado
+
+    def _indice(self, nombre: str) -> Optional[int]:
+        clave = nombre.lower()
+        for i, a in enumerate(self._lista("animales")):
+            if a["nombre"].lower() == clave:
+                return i
+        return None
+
+    # ---------- ANIMALES ----------
+    def cargar_animales(self) -> List[Animal]:
+        return [animal_desde_dict(a) for a in self._lista("animales")]
+
+    def guardar_animales(self, animales: List[Animal]) -> None:
+        self._guardar("animales", dicts_de(animales))
+
+    def insertar_animal(self, a: Animal) -> None:
+        self._agregar([{"c": "animales", "op": "splice", "i": len(self._lista("animales")),
+                        "del": 0, "ins": [a.to_dict()]}])
+
+    def leer_animal(self, nombre: str) -> Optional[Animal]:
+        i = self._indice(nombre)
+        return None if i is None else animal_desde_dict(self._lista("animales")[i])
+
+    def actualizar_animal(self, nombre: str, **campos) -> bool:
+        i = self._indice(nombre)
+        if i is None:
+            return False
+        a = animal_desde_dict(self._lista("animales")[i])
+        aplicar_campos(a, campos)
+        self._agregar([{"c": "animales", "op": "set", "i": i, "d": a.to_dict()}])
+        return True
+
+    def borrar_animal(self, nombre: str) -> bool:
+        clave = nombre.lower()
+        viejo = self._lista("animales")
+        nuevo = [a for a in viejo if a["nombre"].lower() != clave]
+        if len(nuevo) == len(viejo):
+            return False
+        self._guardar("animales", nuevo)
+        return True
+
+    # ---------- ITEMS ----------
+    def cargar_items(self) -> List[Item]:
+        return [item_desde_dict(i) for i in self._lista("items")]
+
+    def guardar_items(self, items: List[Item]) -> None:
+        self._guardar("items", dicts_de(items))
+
+    # ---------- TRAPS ----------
+    def cargar_trampas(self) -> List[Trap]:
+        return [trampa_desde_dict(t) for t in self._lista("trampas")]
+
+    def guardar_trampas(self, traps: List[Trap]) -> None:
+        self._guardar("trampas", dicts_de(traps))
+
+    # ---------- PLAYER ----------
+    def guardar_player(self, nombre: str) -> None:
+        if self._estado.get("player") != {"nombre": nombre}:
+            self._agregar([{"c": "player", "op": "put", "d": {"nombre": nombre}}])
+
+    # ---------- MUNDO ----------
+    def cargar_mundo(self) -> Optional[dict]:
+        return self._estado.get("mundo")
+
+    def guardar_mundo(self, mundo: dict) -> None:
+        if self._estado.get("mundo") != mundo:
+            self._agregar([{"c": "mundo", "op": "put", "d": dict(mundo)}])
+
+    def cerrar(self) -> None:
+        self.esperar_compactacion()
+        if not self._journal.closed:
+            self._journal.close()
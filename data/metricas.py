@@ -0,0 +1,144 @@
+import functools
+import json
+import os
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+_BALDES = 32   # balde i: duraciones en [2**(i-1), 2**i) µs; el último junta todo lo mayor
+_NULO = nullcontext()
+
+
+class Histograma:
+    """Histograma de duraciones con baldes log2 en µs (tamaño fijo, O(1) por muestra)."""
+    __slots__ = ("baldes", "n", "total", "maximo")
+
+    def __init__(self):
+        self.baldes = [0] * _BALDES
+        self.n = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def observar(self, segundos: float) -> None:
+        us = segundos * 1e6
+        self.baldes[min(int(us).bit_length(), _BALDES - 1)] += 1
+        self.n += 1
+        self.total += us
+        if us > self.maximo:
+            self.maximo = us
+
+    def percentil(self, q: float) -> float:
+        """Cota superior (en µs) del balde donde cae el percentil `q`."""
+        if not self.n:
+            return 0.0
+        objetivo = q * self.n
+        acumulado = 0
+        for i, c in enumerate(self.baldes):
+            acumulado += c
+            if acumulado >= objetivo:
+                return min(float(2 ** i), round(self.maximo, 1))
+        return round(self.maximo, 1)
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "total_us": round(self.total, 1),
+                "media_us": round(self.total / self.n, 2) if self.n else 0.0,
+                "p50_us": self.percentil(0.5), "p99_us": self.percentil(0.99),
+                "max_us": round(self.maximo, 1), "baldes_log2_us": self.baldes}
+
+
+class _Fase:
+    __slots__ = ("m", "nombre", "t0")
+
+    def __init__(self, m: "Metricas", nombre: str):
+        self.m, self.nombre = m, nombre
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.m.observar(self.nombre, time.perf_counter() - self.t0)
+
+
+class Metricas:
+    """
+    Instrumentación opt-in: histogramas de tiempo por fase + contadores.
+
+    Apagada (`activo = False`) cada punto de medición cuesta un chequeo de
+    atributo; encendida, un `perf_counter()` de ida y vuelta y un incremento
+    de balde. Se vuelca con `volcar()`/`guardar_json()` o se loguea cada
+    `registrar_cada(segundos)` en el logger `patitas.metricas`.
+    """
+
+    def __init__(self, activo: bool = False, reloj: Callable[[], float] = time.monotonic):
+        self.activo = activo
+        self.fases: Dict[str, Histograma] = {}
+        self.contadores: Dict[str, int] = {}
+        self._reloj = reloj
+        self._intervalo_log: Optional[float] = None
+        self._ultimo_log = reloj()
+
+    def activar(self, activo: bool = True) -> None:
+        self.activo = activo
+
+    def reiniciar(self) -> None:
+        self.fases.clear()
+        self.contadores.clear()
+
+    def fase(self, nombre: str):
+        """Context manager que mide `nombre` (no hace nada si está apagada)."""
+        return _Fase(self, nombre) if self.activo else _NULO
+
+    def observar(self, nombre: str, segundos: float) -> None:
+        h = self.fases.get(nombre)
+        if h is None:
+            h = self.fases[nombre] = Histograma()
+        h.observar(segundos)
+        if self._intervalo_log is not None and self._reloj() - self._ultimo_log >= self._intervalo_log:
+            self._ultimo_log = self._reloj()
+            import logging                    # diferido: solo si se pidió el log periódico
+            logging.getLogger("patitas.metricas").info(self.resumen())
+
+    def contar(self, nombre: str, n: int = 1) -> None:
+        if self.activo:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def registrar_cada(self, segundos: Optional[float]) -> None:
+        """Loguea un resumen cada `segundos` (None lo desactiva)."""
+        self._intervalo_log = segundos
+        self._ultimo_log = self._reloj()
+
+    # ---------- volcado ----------
+    def volcar(self) -> dict:
+        return {"fases": {n: h.to_dict() for n, h in sorted(self.fases.items())},
+                "contadores": dict(sorted(self.contadores.items()))}
+
+    def guardar_json(self, path) -> None:
+        Path(path).write_text(json.dumps(self.volcar(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def resumen(self) -> str:
+        fases = ", ".join(f"{n} n={h.n} p50={h.percentil(.5):.0f}µs p99={h.percentil(.99):.0f}µs"
+                          for n, h in sorted(self.fases.items()))
+        contadores = ", ".join(f"{k}={v}" for k, v in sorted(self.contadores.items()))
+        return f"fases: {fases or '-'} | contadores: {contadores or '-'}"
+
+
+# Colector del proceso; PATITAS_METRICAS=1 lo enciende desde el arranque.
+METRICAS = Metricas(activo=os.environ.get("PATITAS_METRICAS", "") not in ("", "0"))
+
+
+def medido(fase: str):
+    """Decorador de métodos: mide la llamada en `self.metricas` bajo `fase`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def envoltura(self, *args, **kwargs):
+            m = self.metricas
+            if not m.activo:
+                return fn(self, *args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                m.observar(fase, time.perf_counter() - t0)
+        return envoltura
+    return deco
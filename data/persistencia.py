@@ -0,0 +1,74 @@
+import time
+from typing import Callable, Dict, List, Optional, Set
+from data import storage
+from data.metricas import METRICAS, Metricas, medido
+
+COLECCIONES = ("animales", "items", "trampas")
+
+
+class PersistenciaDiferida:
+    """
+    Capa write-behind sobre `data/storage.py`.
+
+    El motor marca colecciones como sucias con `marcar()`; las escrituras
+    reales se agrupan y se hacen en `flush()`, que se dispara:
+      - al juntar `max_cambios` marcas pendientes,
+      - cuando pasaron `intervalo` segundos desde el último flush
+        (chequeado en `marcar()` y en `tal_vez_flush()`),
+      - explícitamente (game over, cierre de la app, `close()`).
+
+    Con `storage.escribir_en_segundo_plano()` activo, `flush()` solo copia las
+    colecciones y encola su escritura; `flush(esperar=True)` y `close()`
+    además esperan a que estén en disco.
+    """
+
+    def __init__(self, fuentes: Dict[str, Callable[[], List]],
+                 intervalo: Optional[float] = 5.0, max_cambios: Optional[int] = 50,
+                 reloj: Callable[[], float] = time.monotonic, metricas: Optional[Metricas] = None):
+        self._fuentes = fuentes
+        self.metricas = metricas or METRICAS
+        self.intervalo = intervalo
+        self.max_cambios = max_cambios
+        self._reloj = reloj
+        self._sucias: Set[str] = set()
+        self._pendientes = 0
+        self._ultimo_flush = reloj()
+        self._cerrada = False
+
+    @property
+    def sucias(self) -> Set[str]:
+        return set(self._sucias)
+
+    def marcar(self, coleccion: str) -> None:
+        if coleccion not in self._fuentes:
+            raise ValueError(f"Colección desconocida: {coleccion}")
+        self._sucias.add(coleccion)
+        self._pendientes += 1
+        if self.max_cambios is not None and self._pendientes >= self.max_cambios:
+            self.flush()
+        else:
+            self.tal_vez_flush()
+
+    def tal_vez_flush(self) -> None:
+        if not self._sucias or self.intervalo is None:
+            return
+        if self._reloj() - self._ultimo_flush >= self.intervalo:
+            self.flush()
+
+    @medido("persistencia")
+    def flush(self, esperar: bool = False) -> None:
+        """Escribe solo las colecciones marcadas desde el último flush."""
+        sucias, self._sucias = self._sucias, set()
+        self._pendientes = 0
+        self._ultimo_flush = self._reloj()
+        for col in COLECCIONES:
+            if col in sucias and col in self._fuentes:
+                getattr(storage, f"guardar_{col}")(self._fuentes[col]())
+        if esperar:
+            storage.esperar_escrituras()
+
+    def close(self) -> None:
+        if self._cerrada:
+            return
+        self.flush(esperar=True)
+        self._cerrada = True
@@ -0,0 +1,156 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from classes.animal import Animal
+from data.storage import aplicar_campos, validar_campos
+
+
+class RepositorioAnimales:
+    """
+    Dueño de las instancias vivas de `Animal` (fuente de verdad en memoria).
+
+    Las instancias nunca se reconstruyen: rescates, gasto de energía y CRUD
+    mutan el mismo objeto, así que las referencias externas siguen siendo
+    válidas. Mantiene índices por nombre (sin mayúsculas), de mascotas
+    activas y de muertas; cada cambio se avisa con `al_cambiar` para que la
+    persistencia lo guarde cuando corresponda.
+
+    Si se pasa `indice` (p. ej. `game.grid.IndiceCeldas`), las mascotas
+    activas se mantienen indexadas por celda a medida que cambian.
+    """
+
+    def __init__(self, animales: List[Animal], al_cambiar: Optional[Callable[[], None]] = None,
+                 indice=None):
+        self._lista: List[Animal] = []
+        self._por_nombre: Dict[str, List[Animal]] = {}
+        self._activos: Dict[int, Animal] = {}
+        self._muertos: Dict[int, Animal] = {}
+        self._pos_indexada: Dict[int, Tuple[int, int]] = {}
+        self._al_cambiar = al_cambiar
+        self.indice = indice
+        for a in animales:
+            self._indexar(a)
+
+    # ---------- consultas ----------
+    @property
+    def animales(self) -> List[Animal]:
+        """Lista viva (siempre el mismo objeto); no mutarla por fuera."""
+        return self._lista
+
+    def __iter__(self):
+        return iter(self._lista)
+
+    def __len__(self) -> int:
+        return len(self._lista)
+
+    def activos(self) -> List[Animal]:
+        return list(self._activos.values())
+
+    @property
+    def n_activos(self) -> int:
+        return len(self._activos)
+
+    @property
+    def muertos(self) -> int:
+        return len(self._muertos)
+
+    def buscar(self, nombre: str) -> Optional[Animal]:
+        candidatos = self._por_nombre.get(nombre.lower())
+        return candidatos[0] if candidatos else None
+
+    # ---------- mutaciones ----------
+    def agregar(self, a: Animal) -> Animal:
+        self._indexar(a)
+        self._cambio()
+        return a
+
+    def actualizar(self, nombre: str, **campos) -> bool:
+        campos = validar_campos("animales", campos)    # todo o nada: nunca queda a medio aplicar
+        a = self.buscar(nombre)
+        if a is None:
+            return False
+        aplicar_campos(a, campos)
+        self.refrescar(a)
+        return True
+
+    def borrar(self, nombre: str) -> bool:
+        return self.borrar_varios([nombre]) > 0
+
+    # ---------- mutaciones en lote (un solo aviso de cambio) ----------
+    def agregar_varios(self, animales: List[Animal]) -> List[Animal]:
+        for a in animales:
+            self._indexar(a)
+        if animales:
+            self._cambio()
+        return animales
+
+    def actualizar_varios(self, cambios: Dict[str, dict]) -> int:
+        """`{nombre: campos}` aplicado a todos los animales con ese nombre; devuelve cuántos cambiaron."""
+        n = 0
+        for nombre, campos in cambios.items():
+            for a in self._por_nombre.get(nombre.lower(), ()):
+                aplicar_campos(a, campos)
+                self._clasificar(a)
+                n += 1
+        if n:
+            self._cambio()
+        return n
+
+    def borrar_varios(self, nombres: Iterable[str]) -> int:
+        """Borra todos los animales con esos nombres; devuelve cuántos se quitaron."""
+        quitar = [a for c in {n.lower() for n in nombres} for a in self._por_nombre.pop(c, ())]
+        if not quitar:
+            return 0
+        ids = {id(a) for a in quitar}
+        for a in quitar:
+            self._activos.pop(id(a), None)
+            self._muertos.pop(id(a), None)
+            self._desindexar(a)
+        self._lista[:] = [a for a in self._lista if id(a) not in ids]
+        self._cambio()
+        return len(quitar)
+
+    def rescatar(self, a: Animal) -> None:
+        a.rescatado = True
+        self.refrescar(a)
+
+    def gastar_energia(self, a: Animal, n: int = 1) -> None:
+        a.gastar_energia(n)
+        self.refrescar(a)
+
+    def refrescar(self, a: Animal) -> None:
+        """Re-evalúa el estado de `a` tras mutarlo y marca el cambio."""
+        self._clasificar(a)
+        self._cambio()
+
+    # ---------- internos ----------
+    def _indexar(self, a: Animal) -> None:
+        self._lista.append(a)
+        self._por_nombre.setdefault(a.nombre.lower(), []).append(a)
+        self._clasificar(a)
+
+    def _clasificar(self, a: Animal) -> None:
+        key = id(a)
+        if a.is_dead():
+            self._muertos[key] = a
+        else:
+            self._muertos.pop(key, None)
+        if not a.rescatado and not a.is_dead():
+            self._activos[key] = a
+            if self.indice is not None:
+                vieja = self._pos_indexada.get(key)
+                if vieja is None:
+                    self.indice.agregar(a.posicion, a)
+                else:
+                    self.indice.mover(a, vieja, a.posicion)
+                self._pos_indexada[key] = a.posicion
+        else:
+            self._activos.pop(key, None)
+            self._desindexar(a)
+
+    def _desindexar(self, a: Animal) -> None:
+        vieja = self._pos_indexada.pop(id(a), None)
+        if vieja is not None and self.indice is not None:
+            self.indice.quitar(vieja, a)
+
+    def _cambio(self) -> None:
+        if self._al_cambiar is not None:
+            self._al_cambiar()
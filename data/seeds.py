@@ -1,51 +1,76 @@
 import random
-from typing import List, Tuple, Set
+from typing import Iterable, List, Optional, Tuple
 from classes.perro import Perro
 from classes.gato import Gato
 from classes.item import Item
 from classes.trap import Trap
 from data.storage import guardar_animales, guardar_items, guardar_trampas
+from game.grid import CeldasLibres
 
-def _rand_pos(w:int=10, h:int=10, ocupadas: Set[Tuple[int,int]]|None=None) -> Tuple[int,int]:
-    libres = [(x,y) for x in range(w) for y in range(h)]
-    if ocupadas:
-        libres = [p for p in libres if p not in ocupadas]
-    return random.choice(libres) if libres else (0,0)
+INICIO_JUGADOR = (0, 0)
+
+def rng_de_siembra(semilla: int) -> random.Random:
+    """Generador del mundo para `semilla`: misma semilla + mismo mapa = mismas posiciones."""
+    return random.Random(semilla ^ 0x5EED)
+
+def pool_de_siembra(w: int, h: int, ocupadas: Iterable[Tuple[int,int]] = ()) -> CeldasLibres:
+    """Pool compartido por una pasada de siembra; la celda inicial del jugador queda reservada."""
+    libres = CeldasLibres(w, h)
+    libres.ocupar(INICIO_JUGADOR)
+    for pos in ocupadas:
+        libres.ocupar(pos)
+    return libres
+
+def _rand_pos(libres: CeldasLibres, rng: random.Random) -> Tuple[int,int]:
+    """Toma una celda libre del pool (O(1))."""
+    pos = libres.tomar(rng)
+    if pos is None:
+        raise ValueError(f"No quedan celdas libres para sembrar en el mapa {libres.w}x{libres.h}")
+    return pos
 
 NOMBRES_PERROS = ["Luna","Rocky","Toby","Milo","Lola","Bowie","Nina"]
 NOMBRES_GATOS  = ["Michi","Simba","Olivia","Tom","Kira","Lili","Nora"]
 
-def seed_animales(n:int=8, w:int=10, h:int=10) -> None:
+def seed_animales(n:int=8, w:int=10, h:int=10, libres: Optional[CeldasLibres]=None,
+                  rng: Optional[random.Random]=None) -> None:
     animales: List[Perro|Gato] = []
-    ocupadas: Set[Tuple[int,int]] = set()
+    if libres is None:
+        libres = CeldasLibres(w, h)
+    rng = rng or random.Random()
     for _ in range(n):
-        especie = "perro" if random.random()<0.5 else "gato"
+        especie = "perro" if rng.random()<0.5 else "gato"
         if especie == "perro":
-            a = Perro(nombre=random.choice(NOMBRES_PERROS), especie="perro",
-                      energia=random.randint(60,100), posicion=_rand_pos(w,h,ocupadas))
+            a = Perro(nombre=rng.choice(NOMBRES_PERROS), especie="perro",
+                      energia=rng.randint(60,100), posicion=_rand_pos(libres, rng))
         else:
-            a = Gato(nombre=random.choice(NOMBRES_GATOS),  especie="gato",
-                     energia=random.randint(60,100), posicion=_rand_pos(w,h,ocupadas))
-        a.nivel = random.randint(1,5)
-        animales.append(a); ocupadas.add(a.posicion)
+            a = Gato(nombre=rng.choice(NOMBRES_GATOS),  especie="gato",
+                     energia=rng.randint(60,100), posicion=_rand_pos(libres, rng))
+        a.nivel = rng.randint(1,5)
+        animales.append(a)
     guardar_animales(animales)
 
-def seed_items(m:int=10, w:int=10, h:int=10) -> None:
+def seed_items(m:int=10, w:int=10, h:int=10, libres: Optional[CeldasLibres]=None,
+               rng: Optional[random.Random]=None) -> None:
     items: List[Item] = []
-    ocupadas: Set[Tuple[int,int]] = set()
+    if libres is None:
+        libres = CeldasLibres(w, h)
+    rng = rng or random.Random()
     for _ in range(m):
-        tipo = random.choice(["comida","juguete"])
-        poder = random.randint(3,10)
-        pos = _rand_pos(w,h,ocupadas); ocupadas.add(pos)
+        tipo = rng.choice(["comida","juguete"])
+        poder = rng.randint(3,10)
+        pos = _rand_pos(libres, rng)
         items.append(Item(nombre=f"{tipo.title()}+{poder}", tipo=tipo, poder=poder, posicion=pos))
     for extra in [("Detector","detector",1), ("Escudo","escudo",1)]:
-        pos = _rand_pos(w,h,ocupadas); ocupadas.add(pos)
+        pos = _rand_pos(libres, rng)
         items.append(Item(nombre=extra[0], tipo=extra[1], poder=extra[2], posicion=pos))
     guardar_items(items)
 
-def seed_trampas(w:int=10, h:int=10) -> None:
+def seed_trampas(w:int=10, h:int=10, libres: Optional[CeldasLibres]=None,
+                 rng: Optional[random.Random]=None) -> None:
     traps: List[Trap] = []
-    ocupadas: Set[Tuple[int,int]] = set()
+    if libres is None:
+        libres = CeldasLibres(w, h)
+    rng = rng or random.Random()
     data = [
         ("Spike-1","spike",1),
         ("Spike-2","spike",1),
@@ -55,7 +80,7 @@ def seed_trampas(w:int=10, h:int=10) -> None:
         ("Mover-1","moving",1),
     ]
     for nombre, tipo, daño in data:
-        pos = _rand_pos(w,h,ocupadas); ocupadas.add(pos)
+        pos = _rand_pos(libres, rng)
         dx, dy = (1,0) if tipo=="moving" else (0,0)
         traps.append(Trap(nombre=nombre, tipo=tipo, daño=daño, posicion=pos, visible=(tipo!="camo"), dx=dx, dy=dy))
     guardar_trampas(traps)
@@ -0,0 +1,270 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+from classes.animal import Animal
+from classes.item import Item
+from classes.trap import Trap
+from data.metricas import METRICAS
+from data.storage import (DATA, BackendJson, aplicar_campos, animal_desde_dict, dicts_de,
+                          item_desde_dict, trampa_desde_dict)
+
+SQLITE_DB = DATA / "patitas.sqlite3"
+
+# `clave` guarda nombre.lower() de Python: NOCASE de SQLite solo pliega ASCII
+# y los nombres admiten tildes/ñ, así que la búsqueda usa la misma regla que el
+# backend JSON. El índice sobre `nombre COLLATE NOCASE` queda para consultas ad hoc.
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS animales (
+    id        INTEGER PRIMARY KEY,
+    nombre    TEXT NOT NULL,
+    clave     TEXT NOT NULL,
+    especie   TEXT NOT NULL,
+    energia   INTEGER NOT NULL,
+    nivel     INTEGER NOT NULL DEFAULT 1,
+    x         INTEGER NOT NULL,
+    y         INTEGER NOT NULL,
+    rescatado INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS animales_clave ON animales(clave);
+CREATE INDEX IF NOT EXISTS animales_nombre_nocase ON animales(nombre COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS items (
+    id     INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    tipo   TEXT NOT NULL,
+    poder  INTEGER NOT NULL,
+    x      INTEGER NOT NULL,
+    y      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trampas (
+    id      INTEGER PRIMARY KEY,
+    nombre  TEXT NOT NULL,
+    tipo    TEXT NOT NULL,
+    dano    INTEGER NOT NULL,
+    x       INTEGER NOT NULL,
+    y       INTEGER NOT NULL,
+    visible INTEGER NOT NULL DEFAULT 1,
+    activo  INTEGER NOT NULL DEFAULT 1,
+    dx      INTEGER NOT NULL DEFAULT 0,
+    dy      INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS player (
+    id     INTEGER PRIMARY KEY CHECK (id = 0),
+    nombre TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mundo (
+    id    INTEGER PRIMARY KEY CHECK (id = 0),
+    ancho INTEGER NOT NULL,
+    alto  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS colecciones (
+    nombre TEXT PRIMARY KEY
+);
+"""
+
+_DESDE_DICT = {"animales": animal_desde_dict, "items": item_desde_dict, "trampas": trampa_desde_dict}
+_COLS_ANIMAL = "nombre, especie, energia, nivel, x, y, rescatado"
+
+
+def _fila_animal(a: dict) -> tuple:
+    x, y = a["posicion"]
+    return (a["nombre"], a["nombre"].lower(), a["especie"], a["energia"], a["nivel"], x, y, int(a["rescatado"]))
+
+
+def _animal(fila) -> Animal:
+    nombre, especie, energia, nivel, x, y, rescatado = fila
+    return animal_desde_dict({"nombre": nombre, "especie": especie, "energia": energia,
+                              "nivel": nivel, "posicion": (x, y), "rescatado": bool(rescatado)})
+
+
+class BackendSqlite:
+    """
+    Backend sobre `sqlite3` con la misma interfaz que `BackendJson`.
+
+    Las búsquedas por nombre usan índice (O(log n)) en lugar de cargar y
+    recorrer toda la colección; los guardados de colección completa y los
+    lotes abiertos con `transaccion()` se confirman en una sola transacción.
+    """
+    nombre = "sqlite"
+
+    def __init__(self, path: Path = SQLITE_DB, migrar_desde: Optional[Path] = DATA):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Con el escritor asíncrono la conexión se usa desde su hilo; nunca a la vez que
+        # desde el principal, porque la fachada espera las escrituras antes de cada operación.
+        self._con = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.executescript(_ESQUEMA)
+        self._en_lote = 0
+        if migrar_desde is not None:
+            self.migrar_desde_json(migrar_desde)
+
+    # ---------- transacciones ----------
+    @contextmanager
+    def transaccion(self):
+        """Agrupa varias operaciones en una transacción (anidable)."""
+        if self._en_lote:
+            self._en_lote += 1
+            try:
+                yield self
+            finally:
+                self._en_lote -= 1
+            return
+        self._en_lote = 1
+        self._con.execute("BEGIN")
+        try:
+            yield self
+        except BaseException:
+            self._con.execute("ROLLBACK")
+            raise
+        else:
+            self._con.execute("COMMIT")
+        finally:
+            self._en_lote = 0
+
+    def lote(self, coleccion: str, fn):
+        """`fn(dicts)` -> `(dicts_nuevos, resultado)`, leído y reescrito en una sola transacción."""
+        with self.transaccion():
+            actuales = dicts_de(getattr(self, f"cargar_{coleccion}")())
+            nuevos, resultado = fn(actuales)
+            desde = _DESDE_DICT[coleccion]
+            getattr(self, f"guardar_{coleccion}")([desde(d) for d in nuevos])
+        return resultado
+
+    def _marcar_existente(self, coleccion: str) -> None:
+        self._con.execute("INSERT OR IGNORE INTO colecciones(nombre) VALUES (?)", (coleccion,))
+
+    def existe(self, coleccion: str) -> bool:
+        fila = self._con.execute("SELECT 1 FROM colecciones WHERE nombre = ?", (coleccion,)).fetchone()
+        return fila is not None
+
+    def tiene_datos(self, coleccion: str) -> bool:
+        if coleccion not in ("animales", "items", "trampas"):
+            return self.existe(coleccion)
+        return self._con.execute(f"SELECT 1 FROM {coleccion} LIMIT 1").fetchone() is not None
+
+    # ---------- migración ----------
+    def migrar_desde_json(self, data_dir: Path) -> List[str]:
+        """Importa `_data/*.json` para las colecciones que aún no existen en la base."""
+        origen = BackendJson(data_dir)
+        migradas: List[str] = []
+        with self.transaccion():
+            for col in ("animales", "items", "trampas"):
+                if self.existe(col) or not origen.existe(col):
+                    continue
+                getattr(self, f"guardar_{col}")(getattr(origen, f"cargar_{col}")())
+                migradas.append(col)
+            if not self.existe("player") and origen.existe("player"):
+                nombre = origen._leer("player").get("nombre")
+                if nombre:
+                    self.guardar_player(nombre)
+                    migradas.append("player")
+            if not self.existe("mundo") and origen.existe("mundo"):
+                self.guardar_mundo(origen.cargar_mundo())
+                migradas.append("mundo")
+        return migradas
+
+    # ---------- ANIMALES ----------
+    def cargar_animales(self) -> List[Animal]:
+        filas = self._con.execute(f"SELECT {_COLS_ANIMAL} FROM animales ORDER BY id")
+        return [_animal(f) for f in filas]
+
+    def guardar_animales(self, animales: List[Animal]) -> None:
+        with self.transaccion():
+            self._con.execute("DELETE FROM animales")
+            self._con.executemany(
+                "INSERT INTO animales(nombre, clave, especie, energia, nivel, x, y, rescatado) "
+                "VALUES (?,?,?,?,?,?,?,?)", (_fila_animal(a) for a in dicts_de(animales)))
+            self._marcar_existente("animales")
+        METRICAS.contar("filas_escritas", len(animales))
+
+    def insertar_animal(self, a: Animal) -> None:
+        with self.transaccion():
+            self._con.execute(
+                "INSERT INTO animales(nombre, clave, especie, energia, nivel, x, y, rescatado) "
+                "VALUES (?,?,?,?,?,?,?,?)", _fila_animal(a.to_dict()))
+            self._marcar_existente("animales")
+
+    def _buscar_id(self, nombre: str) -> Optional[int]:
+        fila = self._con.execute("SELECT id FROM animales WHERE clave = ? ORDER BY id LIMIT 1",
+                                 (nombre.lower(),)).fetchone()
+        return fila[0] if fila else None
+
+    def leer_animal(self, nombre: str) -> Optional[Animal]:
+        fila = self._con.execute(
+            f"SELECT {_COLS_ANIMAL} FROM animales WHERE clave = ? ORDER BY id LIMIT 1",
+            (nombre.lower(),)).fetchone()
+        return _animal(fila) if fila else None
+
+    def actualizar_animal(self, nombre: str, **campos) -> bool:
+        with self.transaccion():
+            rowid = self._buscar_id(nombre)
+            if rowid is None:
+                return False
+            fila = self._con.execute(f"SELECT {_COLS_ANIMAL} FROM animales WHERE id = ?", (rowid,)).fetchone()
+            a = _animal(fila)
+            aplicar_campos(a, campos)
+            x, y = a.posicion
+            self._con.execute("UPDATE animales SET energia=?, nivel=?, x=?, y=?, rescatado=? WHERE id=?",
+                              (a.energia, a.nivel, x, y, int(a.rescatado), rowid))
+        return True
+
+    def borrar_animal(self, nombre: str) -> bool:
+        with self.transaccion():
+            cur = self._con.execute("DELETE FROM animales WHERE clave = ?", (nombre.lower(),))
+        return cur.rowcount > 0
+
+    # ---------- ITEMS ----------
+    def cargar_items(self) -> List[Item]:
+        filas = self._con.execute("SELECT nombre, tipo, poder, x, y FROM items ORDER BY id")
+        return [item_desde_dict({"nombre": n, "tipo": t, "poder": p, "posicion": (x, y)})
+                for n, t, p, x, y in filas]
+
+    def guardar_items(self, items: List[Item]) -> None:
+        with self.transaccion():
+            self._con.execute("DELETE FROM items")
+            self._con.executemany(
+                "INSERT INTO items(nombre, tipo, poder, x, y) VALUES (?,?,?,?,?)",
+                ((i["nombre"], i["tipo"], i["poder"], *i["posicion"]) for i in dicts_de(items)))
+            self._marcar_existente("items")
+        METRICAS.contar("filas_escritas", len(items))
+
+    # ---------- TRAPS ----------
+    def cargar_trampas(self) -> List[Trap]:
+        filas = self._con.execute(
+            "SELECT nombre, tipo, dano, x, y, visible, activo, dx, dy FROM trampas ORDER BY id")
+        return [trampa_desde_dict({"nombre": n, "tipo": t, "daño": d, "posicion": (x, y),
+                                   "visible": bool(v), "activo": bool(ac), "dx": dx, "dy": dy})
+                for n, t, d, x, y, v, ac, dx, dy in filas]
+
+    def guardar_trampas(self, traps: List[Trap]) -> None:
+        with self.transaccion():
+            self._con.execute("DELETE FROM trampas")
+            self._con.executemany(
+                "INSERT INTO trampas(nombre, tipo, dano, x, y, visible, activo, dx, dy) "
+                "VALUES (?,?,?,?,?,?,?,?,?)",
+                ((t["nombre"], t["tipo"], t["daño"], *t["posicion"], int(t["visible"]), int(t["activo"]),
+                  t["dx"], t["dy"]) for t in dicts_de(traps)))
+            self._marcar_existente("trampas")
+        METRICAS.contar("filas_escritas", len(traps))
+
+    # ---------- PLAYER ----------
+    def guardar_player(self, nombre: str) -> None:
+        with self.transaccion():
+            self._con.execute("INSERT OR REPLACE INTO player(id, nombre) VALUES (0, ?)", (nombre,))
+            self._marcar_existente("player")
+
+    # ---------- MUNDO ----------
+    def cargar_mundo(self) -> Optional[dict]:
+        fila = self._con.execute("SELECT ancho, alto FROM mundo WHERE id = 0").fetchone()
+        return {"ancho": fila[0], "alto": fila[1]} if fila else None
+
+    def guardar_mundo(self, mundo: dict) -> None:
+        with self.transaccion():
+            self._con.execute("INSERT OR REPLACE INTO mundo(id, ancho, alto) VALUES (0, ?, ?)",
+                              (mundo["ancho"], mundo["alto"]))
+            self._marcar_existente("mundo")
+
+    def cerrar(self) -> None:
+        self._con.close()
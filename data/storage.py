@@ -1,99 +1,467 @@
-import json, re
+import functools, hashlib, json, os, re
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from classes.perro import Perro
 from classes.gato import Gato
 from classes.animal import Animal
 from classes.item import Item
 from classes.trap import Trap
+from data.metricas import METRICAS
 
 BASE = Path(__file__).resolve().parent.parent
-DATA = BASE / "_data"
-DATA.mkdir(exist_ok=True)
+DATA = BASE / "_data"      # se crea al escribir por primera vez (sin efectos al importar)
 
 ANIMALS_JSON = DATA / "animals.json"
 ITEMS_JSON   = DATA / "items.json"
 TRAPS_JSON   = DATA / "traps.json"
 PLAYER_JSON  = DATA / "player.json"
+WORLD_JSON   = DATA / "world.json"
 
 def _validar_nombre(n:str) -> bool:
     return bool(re.fullmatch(r"[A-Za-zÁÉÍÓÚÑáéíóúñ\s]{2,30}", n))
 
-# ---------- ANIMALES ----------
-def cargar_animales() -> List[Animal]:
-    if not ANIMALS_JSON.exists(): return []
-    data = json.loads(ANIMALS_JSON.read_text(encoding="utf-8"))
-    res: List[Animal] = []
-    for a in data:
-        cls = Perro if a["especie"] == "perro" else Gato
-        obj = cls(nombre=a["nombre"], especie=a["especie"], energia=a["energia"],
-                  posicion=tuple(a["posicion"]), rescatado=a.get("rescatado", False))
-        obj.nivel = a.get("nivel", 1)
-        res.append(obj)
-    return res
+# ---------- conversión dict <-> entidades (compartida por los backends) ----------
+def animal_desde_dict(a: dict) -> Animal:
+    cls = Perro if a["especie"] == "perro" else Gato
+    obj = cls(nombre=a["nombre"], especie=a["especie"], energia=a["energia"],
+              posicion=tuple(a["posicion"]), rescatado=a.get("rescatado", False))
+    obj.nivel = a.get("nivel", 1)
+    return obj
 
-def guardar_animales(animales: List[Animal]) -> None:
-    ANIMALS_JSON.write_text(json.dumps([a.to_dict() for a in animales], ensure_ascii=False, indent=2), encoding="utf-8")
+def item_desde_dict(i: dict) -> Item:
+    return Item(**{**i, "posicion": tuple(i["posicion"])})
 
-def crear_animal(nombre:str, especie:str, energia:int, nivel:int, pos:Tuple[int,int]) -> Animal:
+def trampa_desde_dict(t: dict) -> Trap:
+    return Trap(
+        nombre=t["nombre"], tipo=t["tipo"], daño=t["daño"],
+        posicion=tuple(t["posicion"]), visible=t.get("visible",True),
+        activo=t.get("activo",True), dx=t.get("dx",0), dy=t.get("dy",0))
+
+class Instantanea(list):
+    """Copia ya serializada de una colección (dicts de `to_dict()`); `dicts_de` la usa tal cual."""
+    def a_dicts(self) -> List[dict]:
+        return self
+
+def dicts_de(entidades) -> List[dict]:
+    """`to_dict()` de cada entidad; los almacenes columnares (`a_dicts`) lo hacen sin crear objetos."""
+    a_dicts = getattr(entidades, "a_dicts", None)
+    return a_dicts() if a_dicts is not None else [e.to_dict() for e in entidades]
+
+def aplicar_campos(a: Animal, campos: dict) -> None:
+    if "energia" in campos: a.energia = int(campos["energia"])
+    if "nivel"   in campos: a.nivel   = int(campos["nivel"])
+    if "posicion" in campos: a.posicion = tuple(campos["posicion"])
+    if "rescatado" in campos: a.rescatado = bool(campos["rescatado"])
+
+def nuevo_animal(nombre:str, especie:str, energia:int, nivel:int, pos:Tuple[int,int]) -> Animal:
+    """Valida y construye un animal sin persistirlo."""
     if especie not in {"perro","gato"}: raise ValueError("Especie inválida")
     if not _validar_nombre(nombre): raise ValueError("Nombre inválido (2-30, solo letras/espacios)")
     cls = Perro if especie == "perro" else Gato
-    a = cls(nombre=nombre, especie=especie, energia=energia, posicion=pos)
+    a = cls(nombre=nombre, especie=especie, energia=energia, posicion=tuple(pos))
     a.nivel = nivel
-    data = cargar_animales()
-    data.append(a)
-    guardar_animales(data)
     return a
 
+# ---------- validación de lotes (todo se valida antes de escribir nada) ----------
+_DESDE_DICT = {"animales": animal_desde_dict, "items": item_desde_dict, "trampas": trampa_desde_dict}
+def _booleano(v) -> bool:
+    """Estricto: `bool("False")` es True, así que solo se aceptan bools, 0/1 y "true"/"false"."""
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, int) and v in (0, 1):
+        return bool(v)
+    if isinstance(v, str) and v.strip().lower() in ("true", "false", "0", "1"):
+        return v.strip().lower() in ("true", "1")
+    raise ValueError(f"booleano inválido: {v!r}")
+
+_CONVERSION = {"energia": int, "nivel": int, "poder": int, "daño": int, "dx": int, "dy": int,
+               "tipo": str, "posicion": list, "rescatado": _booleano, "visible": _booleano,
+               "activo": _booleano}
+_EDITABLES = {"animales": {"energia", "nivel", "posicion", "rescatado"},
+              "items": {"tipo", "poder", "posicion"},
+              "trampas": {"tipo", "daño", "posicion", "visible", "activo", "dx", "dy"}}
+
+def validar_campos(coleccion: str, campos: dict) -> dict:
+    """Campos de una actualización ya convertidos; ValueError si alguno no es editable o es inválido."""
+    extra = set(campos) - _EDITABLES[coleccion]
+    if extra: raise ValueError(f"Campos no editables en {coleccion}: {', '.join(sorted(extra))}")
+    try:
+        limpios = {k: _CONVERSION[k](v) for k, v in campos.items()}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Valor inválido: {e}") from None
+    if "posicion" in limpios and len(limpios["posicion"]) != 2: raise ValueError("Posición inválida")
+    if not 1 <= limpios.get("nivel", 1) <= 10: raise ValueError("Nivel fuera de rango (1-10)")
+    return limpios
+
+def nuevos_animales(especs: Iterable) -> List[Animal]:
+    """`nuevo_animal` para cada spec (dict de argumentos o secuencia posicional); falla sin crear ninguno."""
+    animales = []
+    for i, e in enumerate(especs):
+        try:
+            animales.append(nuevo_animal(**e) if isinstance(e, dict) else nuevo_animal(*e))
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"Animal #{i}: {err}") from None
+    return animales
+
+def nuevas_entidades(coleccion: str, entidades: Iterable) -> list:
+    """Items o trampas a partir de entidades o dicts de `to_dict()`, validados."""
+    desde = _DESDE_DICT[coleccion]
+    nuevas = []
+    for i, e in enumerate(entidades):
+        try:
+            d = e if isinstance(e, dict) else e.to_dict()
+            if not isinstance(d["nombre"], str) or not d["nombre"].strip():
+                raise ValueError("Nombre vacío")
+            validar_campos(coleccion, {k: v for k, v in d.items() if k != "nombre"})
+            nuevas.append(desde(d))
+        except (KeyError, TypeError, ValueError) as err:
+            raise ValueError(f"{coleccion.capitalize()[:-1]} #{i}: {err}") from None
+    return nuevas
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Backend JSON (por defecto): un archivo indentado por colección en `_data/`
+# ──────────────────────────────────────────────────────────────────────────────
+class BackendJson:
+    """
+    Interfaz común de backends (la misma implementan `BackendSqlite`, etc.):
+      cargar_*/guardar_* para animales, items y trampas, guardar_player,
+      cargar_mundo/guardar_mundo (dimensiones del mapa),
+      existe(coleccion), tiene_datos(coleccion), insertar_animal, leer_animal, actualizar_animal,
+      borrar_animal, lote(coleccion, fn) y cerrar().
+    """
+    nombre = "json"
+
+    def __init__(self, data_dir: Path = DATA):
+        self.data_dir = Path(data_dir)
+        self.archivos = {
+            "animales": self.data_dir / "animals.json",
+            "items":    self.data_dir / "items.json",
+            "trampas":  self.data_dir / "traps.json",
+            "player":   self.data_dir / "player.json",
+            "mundo":    self.data_dir / "world.json",
+        }
+        # Digest de lo último escrito por archivo: evita reescribir bytes idénticos.
+        self._ultimo_digest: dict[Path, bytes] = {}
+
+    def _leer(self, coleccion: str):
+        path = self.archivos[coleccion]
+        if not path.exists(): return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _escribir(self, coleccion: str, data) -> bool:
+        path = self.archivos[coleccion]
+        texto = json.dumps(data, ensure_ascii=False, indent=2)
+        digest = hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+        if self._ultimo_digest.get(path) == digest and path.exists():
+            METRICAS.contar("escrituras_omitidas")
+            return False
+        # Escritura atómica: un corte a mitad de camino nunca deja un JSON truncado.
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_text(texto, encoding="utf-8")
+        except FileNotFoundError:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(texto, encoding="utf-8")
+        os.replace(tmp, path)
+        self._ultimo_digest[path] = digest
+        if METRICAS.activo:
+            METRICAS.contar("archivos_reescritos")
+            METRICAS.contar("bytes_escritos", len(texto.encode("utf-8")))
+        return True
+
+    def existe(self, coleccion: str) -> bool:
+        return self.archivos[coleccion].exists()
+
+    def tiene_datos(self, coleccion: str) -> bool:
+        """
+        Existe, no está vacía y no está truncada; mira solo el comienzo y el final
+        del archivo (sin parsearlo). Un archivo cortado a mitad de camino no
+        termina en `}]`, así que cuenta como "sin datos" y se vuelve a sembrar.
+        """
+        try:
+            with open(self.archivos[coleccion], "rb") as f:
+                cabeza = f.read(64).lstrip()
+                f.seek(max(0, f.seek(0, os.SEEK_END) - 64))
+                cola = f.read().rstrip()
+        except FileNotFoundError:
+            return False
+        if not cabeza.startswith(b"[") or cabeza[1:].lstrip().startswith(b"]"):
+            return False
+        return cola.endswith(b"]") and cola[:-1].rstrip().endswith(b"}")
+
+    # ---------- ANIMALES ----------
+    def cargar_animales(self) -> List[Animal]:
+        return [animal_desde_dict(a) for a in self._leer("animales") or []]
+
+    def guardar_animales(self, animales: List[Animal]) -> None:
+        self._escribir("animales", dicts_de(animales))
+
+    def insertar_animal(self, a: Animal) -> None:
+        data = self.cargar_animales()
+        data.append(a)
+        self.guardar_animales(data)
+
+    def leer_animal(self, nombre:str) -> Optional[Animal]:
+        for a in self.cargar_animales():
+            if a.nombre.lower()==nombre.lower(): return a
+        return None
+
+    def actualizar_animal(self, nombre:str, **campos) -> bool:
+        data = self.cargar_animales()
+        ok = False
+        for a in data:
+            if a.nombre.lower()==nombre.lower():
+                aplicar_campos(a, campos)
+                ok = True; break
+        if ok: self.guardar_animales(data)
+        return ok
+
+    def borrar_animal(self, nombre:str) -> bool:
+        data = self.cargar_animales()
+        new = [a for a in data if a.nombre.lower()!=nombre.lower()]
+        if len(new)==len(data): return False
+        self.guardar_animales(new); return True
+
+    # ---------- ITEMS ----------
+    def cargar_items(self) -> List[Item]:
+        return [item_desde_dict(i) for i in self._leer("items") or []]
+
+    def guardar_items(self, items: List[Item]) -> None:
+        self._escribir("items", dicts_de(items))
+
+    # ---------- TRAPS ----------
+    def cargar_trampas(self) -> List[Trap]:
+        return [trampa_desde_dict(t) for t in self._leer("trampas") or []]
+
+    def guardar_trampas(self, traps: List[Trap]) -> None:
+        self._escribir("trampas", dicts_de(traps))
+
+    # ---------- PLAYER ----------
+    def guardar_player(self, nombre: str) -> None:
+        self._escribir("player", {"nombre": nombre})
+
+    # ---------- MUNDO ----------
+    def cargar_mundo(self) -> Optional[dict]:
+        return self._leer("mundo")
+
+    def guardar_mundo(self, mundo: dict) -> None:
+        self._escribir("mundo", mundo)
+
+    def lote(self, coleccion: str, fn: Callable[[List[dict]], tuple]):
+        """Un ciclo leer/modificar/escribir: `fn(dicts)` devuelve `(dicts_nuevos, resultado)`."""
+        nuevos, resultado = fn(self._leer(coleccion) or [])
+        self._escribir(coleccion, nuevos)
+        return resultado
+
+    def cerrar(self) -> None:
+        pass
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Fachada: las funciones de módulo delegan en el backend activo
+# ──────────────────────────────────────────────────────────────────────────────
+_backend = BackendJson()
+_escritor = None        # data.escritor.EscritorAsincrono mientras las escrituras van en segundo plano
+
+def esperar_escrituras() -> None:
+    """Bloquea hasta que las escrituras encoladas estén aplicadas (no-op sin escritor)."""
+    if _escritor is not None:
+        _escritor.flush()
+
+def _en_orden(fn):
+    """Las operaciones directas ven (y no se cruzan con) las escrituras ya encoladas."""
+    @functools.wraps(fn)
+    def envoltura(*args, **kwargs):
+        esperar_escrituras()
+        return fn(*args, **kwargs)
+    return envoltura
+
+def escribir_en_segundo_plano(activo: bool = True, max_pendientes: int = 16) -> None:
+    """
+    Activa/desactiva el escritor asíncrono: `guardar_*` copian los datos y
+    encolan la escritura en un hilo propio (coalescida por colección) en lugar
+    de escribir en el hilo que llama. Desactivarlo espera lo pendiente.
+    """
+    global _escritor
+    if activo and _escritor is None:
+        from data.escritor import EscritorAsincrono
+        _escritor = EscritorAsincrono(max_pendientes)
+    elif not activo and _escritor is not None:
+        escritor, _escritor = _escritor, None
+        escritor.cerrar()
+
+def _guardar(coleccion: str, metodo: str, datos) -> None:
+    if _escritor is None:
+        getattr(_backend, metodo)(datos)
+    else:
+        _escritor.encolar(coleccion, functools.partial(getattr(_backend, metodo), datos))
+
+@_en_orden
+def configurar(backend="json", **opciones):
+    """
+    Cambia el backend activo. `backend` puede ser "json", "sqlite", "journal" o una
+    instancia que implemente la interfaz de `BackendJson`.
+    """
+    global _backend
+    if isinstance(backend, str):
+        if backend == "json":
+            backend = BackendJson(**opciones)
+        elif backend == "sqlite":
+            from data.sqlite_backend import BackendSqlite
+            backend = BackendSqlite(**opciones)
+        elif backend == "journal":
+            from data.journal_backend import BackendJournal
+            backend = BackendJournal(**opciones)
+        else:
+            raise ValueError(f"Backend desconocido: {backend}")
+    if backend is not _backend:
+        _backend.cerrar()
+    _backend = backend
+    return backend
+
+def backend_actual():
+    return _backend
+
+@contextmanager
+def usando(backend):
+    """Usa `backend` temporalmente (p. ej. un directorio aislado) y restaura el anterior."""
+    global _backend
+    esperar_escrituras()
+    previo = _backend
+    _backend = backend
+    try:
+        yield backend
+    finally:
+        try:
+            esperar_escrituras()
+        finally:
+            backend.cerrar()
+            _backend = previo
+
+@_en_orden
+def existe(coleccion: str) -> bool:
+    return _backend.existe(coleccion)
+
+@_en_orden
+def tiene_datos(coleccion: str) -> bool:
+    """Chequeo barato de "hay algo guardado" (no reconstruye entidades)."""
+    return _backend.tiene_datos(coleccion)
+
+def _contar_carga(objetos: list) -> list:
+    METRICAS.contar("cargas")
+    METRICAS.contar("objetos_reconstruidos", len(objetos))
+    return objetos
+
+# ---------- ANIMALES ----------
+@_en_orden
+def cargar_animales() -> List[Animal]:
+    return _contar_carga(_backend.cargar_animales())
+
+def guardar_animales(animales: List[Animal]) -> None:
+    _guardar("animales", "guardar_animales",
+             Instantanea(a.to_dict() for a in animales) if _escritor else animales)
+
+@_en_orden
+def crear_animal(nombre:str, especie:str, energia:int, nivel:int, pos:Tuple[int,int]) -> Animal:
+    a = nuevo_animal(nombre, especie, energia, nivel, pos)
+    _backend.insertar_animal(a)
+    return a
+
+@_en_orden
 def leer_animal(nombre:str) -> Animal|None:
-    for a in cargar_animales():
-        if a.nombre.lower()==nombre.lower(): return a
-    return None
+    return _backend.leer_animal(nombre)
 
+@_en_orden
 def actualizar_animal(nombre:str, **campos) -> bool:
-    data = cargar_animales()
-    ok = False
-    for a in data:
-        if a.nombre.lower()==nombre.lower():
-            if "energia" in campos: a.energia = int(campos["energia"])
-            if "nivel"   in campos: a.nivel   = int(campos["nivel"])
-            if "posicion" in campos: a.posicion = tuple(campos["posicion"])
-            if "rescatado" in campos: a.rescatado = bool(campos["rescatado"])
-            ok = True; break
-    if ok: guardar_animales(data)
-    return ok
+    return _backend.actualizar_animal(nombre, **campos)
 
+@_en_orden
 def borrar_animal(nombre:str) -> bool:
-    data = cargar_animales()
-    new = [a for a in data if a.nombre.lower()!=nombre.lower()]
-    if len(new)==len(data): return False
-    guardar_animales(new); return True
+    return _backend.borrar_animal(nombre)
+
+# ---------- LOTES (un solo ciclo de carga/escritura por colección) ----------
+@_en_orden
+def _crear(coleccion: str, entidades: list) -> list:
+    filas = dicts_de(entidades)
+    _backend.lote(coleccion, lambda actuales: (actuales + filas, None))
+    return entidades
+
+@_en_orden
+def _actualizar(coleccion: str, cambios: Dict[str, dict]) -> int:
+    limpios = {n.lower(): validar_campos(coleccion, c) for n, c in cambios.items()}
+    def fn(actuales):
+        nuevos, n = list(actuales), 0
+        for i, d in enumerate(nuevos):
+            campos = limpios.get(d["nombre"].lower())
+            if campos is not None:
+                nuevos[i] = {**d, **campos}
+                n += 1
+        return nuevos, n
+    return _backend.lote(coleccion, fn)
+
+@_en_orden
+def _borrar(coleccion: str, nombres: Iterable[str]) -> int:
+    claves = {n.lower() for n in nombres}
+    def fn(actuales):
+        nuevos = [d for d in actuales if d["nombre"].lower() not in claves]
+        return nuevos, len(actuales) - len(nuevos)
+    return _backend.lote(coleccion, fn)
+
+def crear_animales(especs: Iterable) -> List[Animal]:
+    """Crea varios animales validándolos todos antes; una sola escritura."""
+    return _crear("animales", nuevos_animales(especs))
+
+def actualizar_animales(cambios: Dict[str, dict]) -> int:
+    """`{nombre: campos}` aplicado a todos los registros con ese nombre; devuelve cuántos cambiaron."""
+    return _actualizar("animales", cambios)
+
+def borrar_animales(nombres: Iterable[str]) -> int:
+    """Devuelve cuántos registros se borraron."""
+    return _borrar("animales", nombres)
+
+def crear_items(items: Iterable) -> List[Item]:
+    return _crear("items", nuevas_entidades("items", items))
+
+def actualizar_items(cambios: Dict[str, dict]) -> int:
+    return _actualizar("items", cambios)
+
+def borrar_items(nombres: Iterable[str]) -> int:
+    return _borrar("items", nombres)
+
+def crear_trampas(trampas: Iterable) -> List[Trap]:
+    return _crear("trampas", nuevas_entidades("trampas", trampas))
+
+def actualizar_trampas(cambios: Dict[str, dict]) -> int:
+    return _actualizar("trampas", cambios)
+
+def borrar_trampas(nombres: Iterable[str]) -> int:
+    return _borrar("trampas", nombres)
 
 # ---------- ITEMS ----------
+@_en_orden
 def cargar_items() -> List[Item]:
-    if not ITEMS_JSON.exists(): return []
-    data = json.loads(ITEMS_JSON.read_text(encoding="utf-8"))
-    return [Item(**{**i, "posicion": tuple(i["posicion"])}) for i in data]
+    return _contar_carga(_backend.cargar_items())
 
 def guardar_items(items: List[Item]) -> None:
-    ITEMS_JSON.write_text(json.dumps([i.to_dict() for i in items], ensure_ascii=False, indent=2), encoding="utf-8")
+    _guardar("items", "guardar_items", Instantanea(dicts_de(items)) if _escritor else items)
 
 # ---------- TRAPS ----------
+@_en_orden
 def cargar_trampas() -> List[Trap]:
-    if not TRAPS_JSON.exists(): return []
-    data = json.loads(TRAPS_JSON.read_text(encoding="utf-8"))
-    traps: List[Trap] = []
-    for t in data:
-        traps.append(Trap(
-            nombre=t["nombre"], tipo=t["tipo"], daño=t["daño"],
-            posicion=tuple(t["posicion"]), visible=t.get("visible",True),
-            activo=t.get("activo",True), dx=t.get("dx",0), dy=t.get("dy",0)))
-    return traps
+    return _contar_carga(_backend.cargar_trampas())
 
 def guardar_trampas(traps: List[Trap]) -> None:
-    TRAPS_JSON.write_text(json.dumps([t.to_dict() for t in traps], ensure_ascii=False, indent=2), encoding="utf-8")
+    _guardar("trampas", "guardar_trampas", Instantanea(dicts_de(traps)) if _escritor else traps)
 
 # ---------- PLAYER ----------
 def guardar_player(nombre: str) -> None:
-    PLAYER_JSON.write_text(json.dumps({"nombre": nombre}, ensure_ascii=False, indent=2), encoding="utf-8")
+    _guardar("player", "guardar_player", nombre)
+
+# ---------- MUNDO ----------
+@_en_orden
+def cargar_mundo() -> Optional[dict]:
+    """Metadatos del mundo ({"ancho", "alto"}) o None si nunca se guardaron."""
+    return _backend.cargar_mundo()
+
+def guardar_mundo(mundo: dict) -> None:
+    _guardar("mundo", "guardar_mundo", dict(mundo))
@@ -0,0 +1,273 @@
+"""
+Almacenes columnares (struct-of-arrays) de items y trampas.
+
+Cada campo es una `array` con una fila por entidad: posición en dos
+columnas `x`/`y`, tipo y nombre como códigos internados, flags empaquetados
+en un byte. Una trampa ocupa ~31 bytes en lugar de ~285 de la dataclass con
+su tupla y su `__dict__`, y los recorridos de todo el mundo (mover trampas,
+persistir, snapshot) leen columnas contiguas sin tocar objetos.
+
+Para el resto del código el almacén se comporta como la lista de antes:
+`len`, iteración e índice devuelven *vistas* (`VistaItem`/`VistaTrampa`,
+subclases de `Item`/`Trap` con el mismo API de atributos) que leen y
+escriben las columnas. Las vistas se crean a pedido y se reutilizan, así
+que la identidad de una entidad es estable mientras viva en el almacén;
+al quitarla, su vista queda "desprendida" con una copia de sus valores.
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from classes.item import Item
+from classes.trap import Trap
+
+VISIBLE, ACTIVO = 1, 2      # bits de la columna `estado` de las trampas
+
+
+class Internado:
+    """Tabla texto <-> código: cada texto distinto se guarda una sola vez."""
+
+    def __init__(self, textos: Iterable[str] = ()):
+        self.codigos: Dict[str, int] = {}
+        self.textos: List[str] = []
+        for t in textos:
+            self.codigo(t)
+
+    def codigo(self, texto: str) -> int:
+        c = self.codigos.get(texto)
+        if c is None:
+            c = self.codigos[texto] = len(self.textos)
+            self.textos.append(texto)
+        return c
+
+    def __getitem__(self, c: int) -> str:
+        return self.textos[c]
+
+    def __len__(self) -> int:
+        return len(self.textos)
+
+
+# Enums de tipo compartidos por todos los almacenes (los tipos desconocidos se agregan al final)
+TIPOS_ITEM = Internado(("comida", "juguete", "detector", "escudo"))
+TIPOS_TRAMPA = Internado(("spike", "pit", "poison", "camo", "moving", "zone"))
+MOVING = TIPOS_TRAMPA.codigo("moving")
+
+
+class _Almacen:
+    _COLUMNAS: Tuple[Tuple[str, str], ...] = ()     # (columna, typecode)
+    _TIPOS: Internado
+    _VISTA: type
+
+    def __init__(self, entidades: Iterable = ()):
+        for col, tc in self._COLUMNAS:
+            setattr(self, col, array(tc))
+        self.nombres = Internado()
+        self._vistas: List[Optional[object]] = []     # vista ya creada de cada fila (o None)
+        self.extend(entidades)
+
+    def __len__(self) -> int:
+        return len(self._vistas)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        v = self._vistas[i]
+        if v is None:
+            i = range(len(self._vistas))[i]
+            v = self._vistas[i] = self._VISTA._de(self, i)
+        return v
+
+    def __iter__(self):
+        i = 0
+        while i < len(self._vistas):
+            yield self[i]
+            i += 1
+
+    def append(self, e) -> int:
+        """Copia los campos de `e` (cualquier objeto con el API de la entidad) a una fila nueva."""
+        self._agregar_fila(e)
+        self._vistas.append(None)
+        return len(self._vistas) - 1
+
+    def extend(self, entidades: Iterable) -> None:
+        for e in entidades:
+            self.append(e)
+
+    def quitar(self, fila: int) -> Optional[int]:
+        """Swap-remove de `fila`; devuelve la fila que pasó a ocuparla (la última) o None."""
+        vista = self._vistas[fila]
+        if vista is not None:
+            vista._desprender()
+        ultima = len(self._vistas) - 1
+        for col, _ in self._COLUMNAS:
+            a = getattr(self, col)
+            a[fila] = a[ultima]
+            a.pop()
+        movida = self._vistas.pop()
+        if fila == ultima:
+            return None
+        self._vistas[fila] = movida
+        if movida is not None:
+            movida.fila = fila
+        return ultima
+
+    def remove(self, e) -> None:
+        if getattr(e, "_alm", None) is not self:
+            raise ValueError("La entidad no pertenece a este almacén")
+        self.quitar(e.fila)
+
+    def posicion(self, fila: int) -> Tuple[int, int]:
+        return (self.x[fila], self.y[fila])
+
+    def fuera_de(self, w: int, h: int) -> Optional[int]:
+        """Primera fila con posición fuera de un mapa `w` x `h` (o None)."""
+        for i, (x, y) in enumerate(zip(self.x, self.y)):
+            if not (0 <= x < w and 0 <= y < h):
+                return i
+        return None
+
+    def bytes_por_entidad(self) -> float:
+        """Memoria de columnas + tabla de vistas por fila (sin contar textos internados)."""
+        n = len(self)
+        total = sum(getattr(self, col).itemsize for col, _ in self._COLUMNAS) * n + 8 * n
+        return total / n if n else 0.0
+
+
+class AlmacenItems(_Almacen):
+    _COLUMNAS = (("nombre", "I"), ("tipo", "H"), ("poder", "i"), ("x", "i"), ("y", "i"))
+    _TIPOS = TIPOS_ITEM
+
+    def _agregar_fila(self, it) -> None:
+        x, y = it.posicion
+        self.nombre.append(self.nombres.codigo(it.nombre))
+        self.tipo.append(TIPOS_ITEM.codigo(it.tipo))
+        self.poder.append(it.poder)
+        self.x.append(x)
+        self.y.append(y)
+
+    def a_dicts(self) -> List[dict]:
+        """`to_dict()` de cada fila, leyendo columnas (no crea vistas)."""
+        nombres, tipos = self.nombres.textos, TIPOS_ITEM.textos
+        return [{"nombre": nombres[n], "tipo": tipos[t], "poder": p, "posicion": [x, y]}
+                for n, t, p, x, y in zip(self.nombre, self.tipo, self.poder, self.x, self.y)]
+
+
+class AlmacenTrampas(_Almacen):
+    _COLUMNAS = (("nombre", "I"), ("tipo", "H"), ("dano", "i"), ("x", "i"), ("y", "i"),
+                 ("estado", "B"), ("dx", "h"), ("dy", "h"))
+    _TIPOS = TIPOS_TRAMPA
+
+    def _agregar_fila(self, t) -> None:
+        x, y = t.posicion
+        self.nombre.append(self.nombres.codigo(t.nombre))
+        self.tipo.append(TIPOS_TRAMPA.codigo(t.tipo))
+        self.dano.append(t.daño)
+        self.x.append(x)
+        self.y.append(y)
+        self.estado.append((VISIBLE if t.visible else 0) | (ACTIVO if t.activo else 0))
+        self.dx.append(t.dx)
+        self.dy.append(t.dy)
+
+    def a_dicts(self) -> List[dict]:
+        nombres, tipos = self.nombres.textos, TIPOS_TRAMPA.textos
+        return [{"nombre": nombres[n], "tipo": tipos[t], "daño": d, "posicion": [x, y],
+                 "visible": bool(e & VISIBLE), "activo": bool(e & ACTIVO), "dx": dx, "dy": dy}
+                for n, t, d, x, y, e, dx, dy in zip(self.nombre, self.tipo, self.dano, self.x, self.y,
+                                                    self.estado, self.dx, self.dy)]
+
+
+# --------------------------------------------------------------------------- #
+# Vistas: mismo API que Item / Trap, respaldadas por una fila del almacén
+# --------------------------------------------------------------------------- #
+class _Vista:
+    __slots__ = ()
+
+    @classmethod
+    def _de(cls, alm: _Almacen, fila: int):
+        v = cls.__new__(cls)
+        v._alm, v.fila = alm, fila
+        return v
+
+    def _desprender(self) -> None:
+        """Pasa a un almacén propio de una fila (la vista sigue valiendo tras quitarla)."""
+        propio = type(self._alm)((self,))
+        propio._vistas[0] = self
+        self._alm, self.fila = propio, 0
+
+    @property
+    def nombre(self) -> str:
+        a = self._alm
+        return a.nombres[a.nombre[self.fila]]
+
+    @nombre.setter
+    def nombre(self, v: str) -> None:
+        self._alm.nombre[self.fila] = self._alm.nombres.codigo(v)
+
+    @property
+    def tipo(self) -> str:
+        return self._alm._TIPOS[self._alm.tipo[self.fila]]
+
+    @tipo.setter
+    def tipo(self, v: str) -> None:
+        self._alm.tipo[self.fila] = self._alm._TIPOS.codigo(v)
+
+    @property
+    def posicion(self) -> Tuple[int, int]:
+        return (self._alm.x[self.fila], self._alm.y[self.fila])
+
+    @posicion.setter
+    def posicion(self, v: Tuple[int, int]) -> None:
+        self._alm.x[self.fila], self._alm.y[self.fila] = v
+
+
+class VistaItem(_Vista, Item):
+    __slots__ = ("_alm", "fila")
+
+    @property
+    def poder(self) -> int:
+        return self._alm.poder[self.fila]
+
+    @poder.setter
+    def poder(self, v: int) -> None:
+        self._alm.poder[self.fila] = v
+
+
+class VistaTrampa(_Vista, Trap):
+    __slots__ = ("_alm", "fila")
+
+    @property
+    def daño(self) -> int:
+        return self._alm.dano[self.fila]
+
+    @daño.setter
+    def daño(self, v: int) -> None:
+        self._alm.dano[self.fila] = v
+
+    def _bit(self, bit: int) -> bool:
+        return bool(self._alm.estado[self.fila] & bit)
+
+    def _poner_bit(self, bit: int, v: bool) -> None:
+        e = self._alm.estado
+        e[self.fila] = e[self.fila] | bit if v else e[self.fila] & ~bit
+
+    visible = property(lambda self: self._bit(VISIBLE), lambda self, v: self._poner_bit(VISIBLE, v))
+    activo = property(lambda self: self._bit(ACTIVO), lambda self, v: self._poner_bit(ACTIVO, v))
+
+    @property
+    def dx(self) -> int:
+        return self._alm.dx[self.fila]
+
+    @dx.setter
+    def dx(self, v: int) -> None:
+        self._alm.dx[self.fila] = v
+
+    @property
+    def dy(self) -> int:
+        return self._alm.dy[self.fila]
+
+    @dy.setter
+    def dy(self, v: int) -> None:
+        self._alm.dy[self.fila] = v
+
+
+AlmacenItems._VISTA = VistaItem
+AlmacenTrampas._VISTA = VistaTrampa
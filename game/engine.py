@@ -1,5 +1,6 @@
+import math
 import random
-from typing import List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from classes.jugador import Jugador
 from classes.animal import Animal
 from classes.item import Item
@@ -7,28 +8,74 @@ from classes.trap import Trap
 from classes.perro import Perro
 from classes.gato import Gato
 from data import storage
-
-MAP_W, MAP_H = 10, 10
+from data.metricas import METRICAS, Metricas, medido
+from data.persistencia import PersistenciaDiferida
+from data.repositorio import RepositorioAnimales
+from game.almacen import ACTIVO, MOVING, TIPOS_ITEM, TIPOS_TRAMPA, AlmacenItems, AlmacenTrampas
+from game.eventos import (BusEventos, FinDelJuego, InventarioCambio, MascotaAparecio,
+                          MascotaRescatada, MascotasActivasCambio, MonstruoMovio, PuntajeCambio,
+                          TiempoCambio, TrampaActivada, VidasCambio)
+from game.grid import CeldasLibres, IndiceCeldas, IndiceMoviles, MapaBits
+from game.pathfinding import CampoDistancias
+
+MAP_W, MAP_H = 10, 10   # tamaño por defecto de un mundo nuevo
+MAX_MAP = 4096
+TREE_RATIO = 0.10       # 10 árboles y 8 flores en el mapa clásico de 10x10
+FLOWER_RATIO = 0.08
 MIN_FOOD_TILES = 4
 PET_RESPAWN_DELAY = 1.0
 MONSTER_HIT_MSG = "El monstruo te atrapó"
 
 NOMBRES_MASCOTAS = ["Kira", "Chispa", "Rolo", "Lili", "Nora", "Bowie", "Rita", "Max"]
 
+# Estado del HUD que se publica por diferencia (clave -> evento)
+_EVENTOS_HUD = {"puntos": PuntajeCambio, "vidas": VidasCambio, "inventario": InventarioCambio,
+                "tiempo": TiempoCambio, "activas": MascotasActivasCambio}
+
+
+def validar_dimensiones(ancho: int, alto: int) -> None:
+    if not (isinstance(ancho, int) and isinstance(alto, int)):
+        raise ValueError("Las dimensiones del mapa deben ser enteras")
+    if not (1 <= ancho <= MAX_MAP and 1 <= alto <= MAX_MAP):
+        raise ValueError(f"Mapa inválido {ancho}x{alto} (1..{MAX_MAP} por lado)")
+
 
 class GameEngine:
-    def __init__(self, jugador: Jugador, max_animales_muertos: int = 3, remaining_time: int = 120):
+    def __init__(self, jugador: Jugador, max_animales_muertos: int = 3, remaining_time: int = 120,
+                 persistencia: Optional[PersistenciaDiferida] = None,
+                 ancho: Optional[int] = None, alto: Optional[int] = None,
+                 metricas: Optional[Metricas] = None, semilla: Optional[int] = None,
+                 grabador=None):
         self.jugador = jugador
-        self.animales: List[Animal] = storage.cargar_animales()
-        self.items: List[Item] = storage.cargar_items()
-        self.trampas: List[Trap] = storage.cargar_trampas()
+        self.metricas = metricas or METRICAS   # instrumentación opt-in (ver data/metricas.py)
+        # Toda decisión al azar sale de este generador: misma semilla + mismas entradas = misma partida
+        self.semilla = semilla if semilla is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.semilla)
+        self.grabador = grabador               # game.replay.Grabador (opcional)
+        self.eventos = BusEventos()
+        self._publicado: Dict[str, object] = {}
+        # Tamaño del mapa: argumento explícito, o el guardado con los datos, o el default
+        mundo = storage.cargar_mundo() or {}
+        self.map_w = ancho if ancho is not None else mundo.get("ancho", MAP_W)
+        self.map_h = alto if alto is not None else mundo.get("alto", MAP_H)
+        validar_dimensiones(self.map_w, self.map_h)
+        if (ancho is not None or alto is not None) and mundo != self.mundo:
+            storage.guardar_mundo(self.mundo)
+        self._montar(storage.cargar_animales(), storage.cargar_items(), storage.cargar_trampas())
+        self.persistencia = persistencia or PersistenciaDiferida({
+            "animales": lambda: self.repo.animales,
+            "items": lambda: self.items,
+            "trampas": lambda: self.trampas,
+        }, metricas=self.metricas)
         self.game_over = False
+        self.motivo_game_over: Optional[str] = None
+        self.rescates = 0
         self.max_animales_muertos = max_animales_muertos
         self.remaining_time = remaining_time
 
-        self.path_cells: Set[Tuple[int, int]] = set()
-        self.tree_cells: Set[Tuple[int, int]] = set()
-        self.flower_cells: Set[Tuple[int, int]] = set()
+        self.path_cells = MapaBits(self.map_w, self.map_h)
+        self.tree_cells = MapaBits(self.map_w, self.map_h)
+        self.flower_cells = MapaBits(self.map_w, self.map_h)
         self.first_move_done = False
 
         self.monster_active = False
@@ -36,8 +83,13 @@ class GameEngine:
 
         self._pet_respawn_delay: Optional[float] = None
 
+        self._validar_posiciones()
+        if grabador is not None:
+            grabador.comenzar(self)            # estado cargado, antes de cualquier decisión al azar
         self._normalize_animales()
         self._init_decor()
+        # Campo de distancias hacia el jugador, compartido por los perseguidores
+        self.campo_monstruo = CampoDistancias(self.map_w, self.map_h, self.tree_cells)
         self._ensure_food_tiles()
         if not self._active_animals():
             self._spawn_nueva_mascota(force=True)
@@ -45,77 +97,244 @@ class GameEngine:
     # --------------------------------------------------------------------- #
     # Inicialización / utilidades
     # --------------------------------------------------------------------- #
+    def _montar(self, animales: List[Animal], items: List[Item], trampas: List[Trap]) -> None:
+        """Pool de celdas libres + índices celda -> entidades que lo mantienen al día."""
+        self._libres = CeldasLibres(self.map_w, self.map_h)
+        self._idx_items = IndiceCeldas(libres=self._libres)
+        self._idx_trampas = IndiceCeldas(libres=self._libres)
+        self._idx_animales = IndiceCeldas(libres=self._libres)
+        self._ocupa_jugador: Optional[Tuple[int, int]] = None
+        self._ocupa_monstruo: Optional[Tuple[int, int]] = None
+        self.repo = RepositorioAnimales(animales,
+                                        al_cambiar=lambda: self.persistencia.marcar("animales"),
+                                        indice=self._idx_animales)
+        # Items y trampas en almacenes columnares; los índices guardan filas
+        self.items = AlmacenItems()
+        self._n_comida = 0
+        for it in items:
+            self._agregar_item(it)
+        self.trampas = AlmacenTrampas(trampas)
+        # Trampas móviles: fuera de `_idx_trampas`, en un índice por velocidad que avanza en bloque
+        self._moviles: List[int] = []
+        self._idx_moviles = IndiceMoviles(self.map_w, self.map_h)
+        for fila in range(len(self.trampas)):
+            self._indexar_trampa(fila)
+        self._ocupa_moviles: List[Tuple[int, int]] = []
+        self._moviles_en_pool = False
+        self._sync_moviles()
+
+    @property
+    def mundo(self) -> dict:
+        return {"ancho": self.map_w, "alto": self.map_h}
+
+    def dentro(self, pos: Tuple[int, int]) -> bool:
+        x, y = pos
+        return 0 <= x < self.map_w and 0 <= y < self.map_h
+
+    def _validar_posiciones(self) -> None:
+        """Rechaza datos guardados que no entran en el mapa configurado."""
+        if not self.dentro(self.jugador.posicion):
+            raise ValueError(f"Jugador fuera del mapa {self.map_w}x{self.map_h}: {self.jugador.posicion}")
+        for a in self.repo.animales:
+            if not self.dentro(a.posicion):
+                raise ValueError(f"Animal {a.nombre} fuera del mapa {self.map_w}x{self.map_h}: {a.posicion}")
+        for tipo, alm in (("Item", self.items), ("Trampa", self.trampas)):
+            fila = alm.fuera_de(self.map_w, self.map_h)
+            if fila is not None:
+                e = alm[fila]
+                raise ValueError(f"{tipo} {e.nombre} fuera del mapa {self.map_w}x{self.map_h}: {e.posicion}")
+
     def _init_decor(self) -> None:
         """Genera caminos, árboles y flores manteniendo la estética original."""
-        cx = MAP_W // 2
-        self.path_cells = {(cx, y) for y in range(MAP_H)}
-        for y in range(2, MAP_H, 4):
-            self.path_cells.add((min(MAP_W - 1, cx + 1), y))
-        for y in range(4, MAP_H, 6):
+        w, h = self.map_w, self.map_h
+        cx = w // 2
+        self.path_cells = MapaBits(w, h, ((cx, y) for y in range(h)))
+        for y in range(2, h, 4):
+            self.path_cells.add((min(w - 1, cx + 1), y))
+        for y in range(4, h, 6):
             self.path_cells.add((max(0, cx - 1), y))
 
-        ocupadas = {self.jugador.posicion}
-        ocupadas |= {i.posicion for i in self.items}
-        ocupadas |= {t.posicion for t in self.trampas}
-        ocupadas |= {a.posicion for a in self._active_animals()}
-
-        libres = [
-            (x, y)
-            for x in range(MAP_W)
-            for y in range(MAP_H)
-            if (x, y) not in self.path_cells and (x, y) not in ocupadas
-        ]
-        random.shuffle(libres)
-        self.tree_cells = set(libres[:10])
-        self.flower_cells = set(libres[10:18])
+        # Las trampas activas ya ocupan el pool; las inactivas tampoco reciben decoración
+        tr = self.trampas
+        inactivas = {(x, y) for x, y, e in zip(tr.x, tr.y, tr.estado) if not e & ACTIVO}
+        self.tree_cells = MapaBits(w, h)
+        self.flower_cells = MapaBits(w, h)
+
+        def apta(pos) -> bool:
+            return pos not in self.path_cells and pos not in inactivas
+
+        n_arboles = round(w * h * TREE_RATIO)
+        n_flores = round(w * h * FLOWER_RATIO)
+        pedidas = n_arboles + n_flores
+        self._sync_ocupantes()
+        # Una sola muestra al azar del pool (con margen para descartar senderos)
+        candidatas = [p for p in self._libres.muestra(pedidas + pedidas // 4 + 16, self.rng) if apta(p)]
+        if len(candidatas) < pedidas:
+            candidatas = [(x, y) for x in range(w) for y in range(h)
+                          if self._libres.libre((x, y)) and apta((x, y))]
+            self.rng.shuffle(candidatas)
+        self.tree_cells.update(candidatas[:n_arboles])
+        self.flower_cells.update(candidatas[n_arboles:pedidas])
+        for pos in candidatas[:n_arboles]:
+            self._libres.ocupar(pos)
+
+    def _muestrear_celda(self, apta) -> Optional[Tuple[int, int]]:
+        """Celda libre que cumple `apta`: muestreo con rechazo y, si falla, barrido."""
+        self._sync_ocupantes()
+        for _ in range(64):
+            pos = self._libres.muestrear(self.rng)
+            if pos is None:
+                return None
+            if apta(pos):
+                return pos
+        candidatas = [(x, y) for x in range(self.map_w) for y in range(self.map_h)
+                      if self._libres.libre((x, y)) and apta((x, y))]
+        return self.rng.choice(candidatas) if candidatas else None
+
+    @property
+    def animales(self) -> List[Animal]:
+        """Instancias vivas del repositorio (identidad estable)."""
+        return self.repo.animales
 
     def _normalize_animales(self) -> None:
         """Asegura que solo haya una mascota activa a la vez."""
-        activos = [idx for idx, a in enumerate(self.animales) if not a.rescatado and not a.is_dead()]
-        if len(activos) <= 1:
-            return
-        changed = False
-        for idx in activos[1:]:
-            self.animales[idx].rescatado = True
-            changed = True
-        if changed:
-            storage.guardar_animales(self.animales)
-            self.animales = storage.cargar_animales()
+        for a in self.repo.activos()[1:]:
+            self.repo.rescatar(a)
 
     def _active_animals(self) -> List[Animal]:
-        return [a for a in self.animales if not a.rescatado and not a.is_dead()]
+        return self.repo.activos()
+
+    # ---------- índice espacial ----------
+    def _agregar_item(self, it: Item) -> None:
+        fila = self.items.append(it)
+        self._idx_items.agregar(it.posicion, fila)
+        if it.tipo == "comida":
+            self._n_comida += 1
+
+    def _quitar_item(self, it: Item) -> None:
+        """Quita en O(1): la última fila del almacén pasa a ocupar la del item."""
+        fila, pos = it.fila, it.posicion
+        if it.tipo == "comida":
+            self._n_comida -= 1
+        self._idx_items.quitar(pos, fila)
+        movida = self.items.quitar(fila)
+        if movida is not None:
+            self._idx_items.reemplazar(self.items.posicion(fila), movida, fila)
+
+    def _indexar_trampa(self, fila: int) -> None:
+        tr = self.trampas
+        if not tr.estado[fila] & ACTIVO:
+            return
+        if tr.tipo[fila] == MOVING:
+            self._moviles.append(fila)
+            self._idx_moviles.agregar(tr.posicion(fila), (tr.dx[fila], tr.dy[fila]), fila)
+        else:
+            self._idx_trampas.agregar(tr.posicion(fila), fila)
+
+    def _desindexar_trampa(self, fila: int, nueva: Optional[int] = None) -> None:
+        """Quita `fila` de su índice o, con `nueva`, la reemplaza por ella (swap-remove)."""
+        tr = self.trampas
+        if not tr.estado[fila] & ACTIVO:
+            return
+        pos = tr.posicion(fila)
+        if tr.tipo[fila] == MOVING:
+            vel = (tr.dx[fila], tr.dy[fila])
+            if nueva is None:
+                self._idx_moviles.quitar(pos, vel, fila)
+            else:
+                self._idx_moviles.reemplazar(pos, vel, fila, nueva)
+            self._moviles_en_pool = False
+        elif nueva is None:
+            self._idx_trampas.quitar(pos, fila)
+        else:
+            self._idx_trampas.reemplazar(pos, fila, nueva)
+
+    def _desactivar_trampa(self, t: Trap) -> None:
+        self._desindexar_trampa(t.fila)
+        if t.tipo == "moving":
+            self._moviles.remove(t.fila)
+        t.activo = False
+
+    def entidades_en(self, pos: Tuple[int, int]) -> Dict[str, list]:
+        """Items, trampas activas y mascotas activas en una celda (O(1))."""
+        return {
+            "items": [self.items[f] for f in self._idx_items.en(pos)],
+            "trampas": [self.trampas[f] for f in self._trampas_en(pos)],
+            "animales": self._idx_animales.en(pos),
+        }
+
+    def en_rect(self, x0: int, y0: int, x1: int, y1: int) -> Dict[str, list]:
+        """
+        Lo que hay en las celdas [x0, x1) x [y0, y1), recorriendo solo esas celdas en los índices:
+        items y trampas activas como `(fila, posición, tipo)` (sin crear vistas) y mascotas activas.
+        """
+        it, tr = self.items, self.trampas
+        res: Dict[str, list] = {"items": [], "trampas": [], "animales": []}
+        for y in range(max(0, y0), min(self.map_h, y1)):
+            for x in range(max(0, x0), min(self.map_w, x1)):
+                pos = (x, y)
+                res["items"].extend((f, pos, TIPOS_ITEM[it.tipo[f]]) for f in self._idx_items.en(pos))
+                res["trampas"].extend((f, pos, TIPOS_TRAMPA[tr.tipo[f]]) for f in self._trampas_en(pos))
+                res["animales"].extend(self._idx_animales.en(pos))
+        return res
+
+    def _trampas_en(self, pos: Tuple[int, int]) -> List[int]:
+        """Filas de las trampas activas en `pos`: primero las fijas, después las móviles."""
+        return self._idx_trampas.en(pos) + self._idx_moviles.en(pos)
+
+    def celda_bloqueada(self, pos: Tuple[int, int]) -> bool:
+        return (pos in self.tree_cells or pos == self.jugador.posicion or pos == self.monster_pos
+                or pos in self._idx_items or pos in self._idx_trampas or pos in self._idx_moviles
+                or pos in self._idx_animales)
 
     def _blocked_cells(self) -> Set[Tuple[int, int]]:
         blocked = set(self.tree_cells)
-        blocked |= {self.jugador.posicion}
-        blocked |= {i.posicion for i in self.items}
-        blocked |= {t.posicion for t in self.trampas if t.activo}
-        blocked |= {a.posicion for a in self._active_animals()}
+        blocked.add(self.jugador.posicion)
+        blocked.update(self._idx_items.celdas())
+        blocked.update(self._idx_trampas.celdas())
+        tr = self.trampas
+        blocked.update((tr.x[i], tr.y[i]) for i in self._moviles)
+        blocked.update(self._idx_animales.celdas())
         if self.monster_pos:
             blocked.add(self.monster_pos)
         return blocked
 
+    def _sync_moviles(self) -> None:
+        """Refleja en el pool las celdas actuales de las trampas móviles (en bloque, solo si se movieron)."""
+        if not self._moviles_en_pool:
+            xs, ys = self.trampas.x, self.trampas.y
+            celdas = [(xs[i], ys[i]) for i in self._moviles]
+            self._libres.mover_varias(self._ocupa_moviles, celdas)
+            self._ocupa_moviles = celdas
+            self._moviles_en_pool = True
+
+    def _sync_ocupantes(self) -> None:
+        """Refleja en el pool las posiciones actuales del jugador, del monstruo y de las trampas móviles."""
+        self._sync_moviles()
+        if self._ocupa_jugador != self.jugador.posicion:
+            self._libres.mover(self._ocupa_jugador, self.jugador.posicion)
+            self._ocupa_jugador = self.jugador.posicion
+        if self._ocupa_monstruo != self.monster_pos:
+            self._libres.mover(self._ocupa_monstruo, self.monster_pos)
+            self._ocupa_monstruo = self.monster_pos
+
     def _random_free_cell(self, extra_blocked: Optional[Set[Tuple[int, int]]] = None) -> Optional[Tuple[int, int]]:
-        blocked = self._blocked_cells()
-        if extra_blocked:
-            blocked |= extra_blocked
-        libres = [(x, y) for x in range(MAP_W) for y in range(MAP_H) if (x, y) not in blocked]
-        return random.choice(libres) if libres else None
+        self._sync_ocupantes()
+        if not extra_blocked:
+            return self._libres.muestrear(self.rng)
+        return self._muestrear_celda(lambda pos: pos not in extra_blocked)
 
     def _ensure_food_tiles(self) -> None:
-        food = [i for i in self.items if i.tipo == "comida"]
         created = False
-        while len(food) < MIN_FOOD_TILES:
+        while self._n_comida < MIN_FOOD_TILES:
             pos = self._random_free_cell()
             if pos is None:
                 break
-            poder = random.randint(3, 8)
-            item = Item(nombre=f"Comida+{poder}", tipo="comida", poder=poder, posicion=pos)
-            self.items.append(item)
-            food.append(item)
+            poder = self.rng.randint(3, 8)
+            self._agregar_item(Item(nombre=f"Comida+{poder}", tipo="comida", poder=poder, posicion=pos))
             created = True
         if created:
-            storage.guardar_items(self.items)
+            self.persistencia.marcar("items")
 
     def _consume_comida(self) -> Optional[str]:
         for idx, nombre in enumerate(self.jugador.inventario):
@@ -126,15 +345,21 @@ class GameEngine:
     # --------------------------------------------------------------------- #
     # Ciclo principal
     # --------------------------------------------------------------------- #
+    @medido("tick")
     def tick(self, seconds: int = 1) -> None:
+        if self.grabador is not None:
+            self.grabador.anotar("t", seconds)
         if self.game_over:
             return
+        self._paso(seconds)
+        self.persistencia.tal_vez_flush()
+        self._publicar_cambios()
+
+    def _paso(self, seconds: int) -> None:
+        """Un tick del reloj, sin flush ni publicación del HUD."""
         self.remaining_time = max(0, self.remaining_time - max(0, seconds))
-        for t in self.trampas:
-            if t.tipo == "moving" and t.activo:
-                x, y = t.posicion
-                t.posicion = ((x + t.dx) % MAP_W, (y + t.dy) % MAP_H)
-        storage.guardar_trampas(self.trampas)
+        if self._moviles:
+            self._mover_trampas()
         self.jugador.tick_estado()
         if self._pet_respawn_delay is not None:
             if self._active_animals():
@@ -147,12 +372,95 @@ class GameEngine:
         if self.remaining_time == 0:
             self._set_game_over("Se acabó el tiempo")
 
+    @medido("advance")
+    def advance(self, seconds: int) -> None:
+        """
+        Adelanta `seconds` segundos con el mismo estado final que `seconds` llamadas a `tick(1)`.
+
+        Los tramos sin eventos se saltean en forma cerrada (posición de las
+        trampas móviles y cuentas regresivas); solo se simulan de a un tick
+        los que traen algo: golpe de una móvil, veneno, reaparición de
+        mascota o fin del tiempo. El HUD se publica una vez, al final.
+        """
+        if self.grabador is not None:
+            self.grabador.anotar("a", seconds)
+        restantes = max(0, seconds)
+        while restantes and not self.game_over:
+            salto = self._ticks_sin_eventos(restantes)
+            if salto:
+                self._saltar(salto)
+                restantes -= salto
+            if restantes:
+                self._paso(1)
+                restantes -= 1
+        self.persistencia.tal_vez_flush()
+        self._publicar_cambios()
+
+    def _ticks_sin_eventos(self, limite: int) -> int:
+        """Cuántos de los próximos `limite` ticks no hacen más que avanzar relojes y trampas móviles."""
+        if self.jugador.poison_ticks > 0:
+            return 0
+        tope = min(limite, max(1, self.remaining_time) - 1)
+        if self._pet_respawn_delay is not None:
+            if self._active_animals():
+                return 0
+            tope = min(tope, max(1, math.ceil(self._pet_respawn_delay)) - 1)
+        if tope > 0 and self._idx_moviles.en_movimiento:
+            golpe = self._idx_moviles.primer_encuentro(self.jugador.posicion, tope)
+            if golpe is not None:
+                tope = golpe - 1
+        return tope
+
+    def _saltar(self, pasos: int) -> None:
+        """`pasos` ticks sin eventos de una vez (ver `_ticks_sin_eventos`)."""
+        self.remaining_time -= pasos
+        j = self.jugador
+        j.invulnerable_ticks = max(0, j.invulnerable_ticks - pasos)
+        if self._pet_respawn_delay is not None:
+            self._pet_respawn_delay = max(0.0, self._pet_respawn_delay - pasos)
+        self._desplazar_moviles(pasos)
+
+    def _desplazar_moviles(self, pasos: int) -> bool:
+        """Avanza `pasos` pasos todas las trampas móviles: forma cerrada sobre las columnas del almacén."""
+        if not self._moviles or not self._idx_moviles.en_movimiento:
+            return False
+        tr, w, h = self.trampas, self.map_w, self.map_h
+        xs, ys, dxs, dys = tr.x, tr.y, tr.dx, tr.dy
+        filas = self._moviles
+        nxs = [(xs[i] + dxs[i] * pasos) % w for i in filas]
+        nys = [(ys[i] + dys[i] * pasos) % h for i in filas]
+        for i, x, y in zip(filas, nxs, nys):
+            xs[i] = x
+            ys[i] = y
+        self._idx_moviles.avanzar(pasos)
+        self._moviles_en_pool = False
+        self.persistencia.marcar("trampas")
+        return True
+
+    def _mover_trampas(self) -> None:
+        """
+        Avanza todas las trampas móviles en una pasada sobre las columnas del almacén.
+
+        El índice por velocidad avanza en bloque y el pool se actualiza recién
+        cuando alguien lo necesita (`_sync_moviles`). En el mismo paso se
+        detecta si una trampa que se movió cayó sobre el jugador.
+        """
+        if not self._desplazar_moviles(1):
+            return
+        golpe = self._idx_moviles.en(self.jugador.posicion, solo_moviendose=True)
+        if golpe:
+            self._resolver_trampa(self.trampas[golpe[0]])
+            self._evaluar_game_over()
+
+    @medido("mover")
     def mover_jugador(self, dx: int, dy: int) -> Tuple[int, int]:
+        if self.grabador is not None:
+            self.grabador.anotar("m", dx, dy)
         if self.game_over:
             return self.jugador.posicion
         x, y = self.jugador.posicion
-        nx = min(max(0, x + dx), MAP_W - 1)
-        ny = min(max(0, y + dy), MAP_H - 1)
+        nx = min(max(0, x + dx), self.map_w - 1)
+        ny = min(max(0, y + dy), self.map_h - 1)
         destino = (nx, ny)
         if destino in self.tree_cells and destino != self.jugador.posicion:
             self.jugador.log("Un árbol bloquea ese camino 🌳")
@@ -164,71 +472,71 @@ class GameEngine:
         self.jugador.log(f"Movido a {self.jugador.posicion}")
         self._check_celda()
         self._evaluar_game_over()
+        self._publicar_cambios()
         return self.jugador.posicion
 
     def _check_celda(self) -> None:
+        pos = self.jugador.posicion
         items_changed = False
         food_picked = False
-        for it in list(self.items):
-            if it.posicion == self.jugador.posicion:
-                if it.tipo == "comida":
-                    self.jugador.inventario.append(it.nombre)
-                    self.jugador.sumar_puntos(5)
-                    food_picked = True
-                    self.jugador.log(f"Comida (+5): {it.nombre}")
-                elif it.tipo == "escudo":
-                    self.jugador.escudos += 1
-                    self.jugador.log("¡Escudo!")
-                elif it.tipo == "detector":
-                    self.jugador.inventario.append("Detector")
-                    self.jugador.log("Detector")
-                else:
-                    self.jugador.sumar_puntos(3)
-                    self.jugador.log(f"Juguete (+3): {it.nombre}")
-                self.items.remove(it)
-                items_changed = True
+        for it in [self.items[f] for f in self._idx_items.en(pos)]:
+            if it.tipo == "comida":
+                self.jugador.inventario.append(it.nombre)
+                self.jugador.sumar_puntos(5)
+                food_picked = True
+                self.jugador.log(f"Comida (+5): {it.nombre}")
+            elif it.tipo == "escudo":
+                self.jugador.escudos += 1
+                self.jugador.log("¡Escudo!")
+            elif it.tipo == "detector":
+                self.jugador.inventario.append("Detector")
+                self.jugador.log("Detector")
+            else:
+                self.jugador.sumar_puntos(3)
+                self.jugador.log(f"Juguete (+3): {it.nombre}")
+            self._quitar_item(it)
+            items_changed = True
         if items_changed:
-            storage.guardar_items(self.items)
+            self.persistencia.marcar("items")
             if food_picked:
                 self._ensure_food_tiles()
 
-        trap_triggered = False
-        for t in self.trampas:
-            if t.activo and t.posicion == self.jugador.posicion:
-                self._resolver_trampa(t)
-                trap_triggered = True
-                break
-        if trap_triggered:
-            storage.guardar_trampas(self.trampas)
-
-        for a in self._active_animals():
-            if a.posicion == self.jugador.posicion:
-                comida = self._consume_comida()
-                if comida:
-                    a.rescatado = True
-                    self.jugador.sumar_puntos(20)
-                    self.jugador.log(f"Rescataste a {a.nombre} ({a.especie}) (+20)")
-                    storage.guardar_animales(self.animales)
-                    self.animales = storage.cargar_animales()
-                    self._pet_respawn_delay = PET_RESPAWN_DELAY
-                else:
-                    a.gastar_energia(1)
-                    storage.guardar_animales(self.animales)
-                    self.animales = storage.cargar_animales()
-                    self.jugador.log(f"{a.nombre} '{a.sonido()}' — necesita comida")
-                break
+        trampas = self._trampas_en(pos)
+        if trampas:
+            self._resolver_trampa(self.trampas[trampas[0]])
+            self.persistencia.marcar("trampas")
+
+        for a in self._idx_animales.en(pos):
+            comida = self._consume_comida()
+            if comida:
+                self._rescatar(a)
+            else:
+                self.repo.gastar_energia(a, 1)
+                self.jugador.log(f"{a.nombre} '{a.sonido()}' — necesita comida")
+            break
 
         if self.monster_active and self.monster_pos == self.jugador.posicion:
             self._set_game_over(MONSTER_HIT_MSG)
 
+    @medido("rescate")
+    def _rescatar(self, a: Animal) -> None:
+        self.repo.rescatar(a)
+        self.rescates += 1
+        self.jugador.sumar_puntos(20)
+        self.jugador.log(f"Rescataste a {a.nombre} ({a.especie}) (+20)")
+        self._pet_respawn_delay = PET_RESPAWN_DELAY
+        self.eventos.publicar(MascotaRescatada(a.nombre, a.especie))
+
+    @medido("trampas")
     def _resolver_trampa(self, trap: Trap) -> None:
+        self.eventos.publicar(TrampaActivada(trap.nombre, trap.tipo, trap.posicion))
         self.jugador.invulnerable_ticks = 0
         self.jugador.perder_vida(1)
         if trap.tipo == "poison":
             self.jugador.poison_ticks = max(self.jugador.poison_ticks, trap.daño)
             self.jugador.log(f"Veneno activo por {trap.daño} turnos")
         if trap.tipo != "moving":
-            trap.activo = False
+            self._desactivar_trampa(trap)
 
     def _spawn_nueva_mascota(self, force: bool = False) -> None:
         if not force and self._active_animals():
@@ -236,21 +544,22 @@ class GameEngine:
         pos = self._random_free_cell()
         if pos is None:
             return
-        especie = random.choice(["perro", "gato"])
-        nombre = random.choice(NOMBRES_MASCOTAS)
-        energia = random.randint(40, 90)
+        especie = self.rng.choice(["perro", "gato"])
+        nombre = self.rng.choice(NOMBRES_MASCOTAS)
+        energia = self.rng.randint(40, 90)
         cls = Perro if especie == "perro" else Gato
         mascota = cls(nombre=nombre, especie=especie, energia=energia, posicion=pos)
-        mascota.nivel = random.randint(1, 5)
-        self.animales.append(mascota)
-        storage.guardar_animales(self.animales)
-        self.animales = storage.cargar_animales()
+        mascota.nivel = self.rng.randint(1, 5)
+        self.repo.agregar(mascota)
         self.jugador.log(f"Nueva mascota en {pos}")
+        self.eventos.publicar(MascotaAparecio(nombre, especie, pos))
 
     # --------------------------------------------------------------------- #
     # Monstruo perseguidor
     # --------------------------------------------------------------------- #
     def spawn_monster(self) -> bool:
+        if self.grabador is not None:
+            self.grabador.anotar("s")
         if self.game_over or self.monster_active:
             return False
         pos = self._random_free_cell()
@@ -259,13 +568,32 @@ class GameEngine:
         self.monster_pos = pos
         self.monster_active = True
         self.jugador.log(f"¡Un monstruo apareció en {pos}!")
+        self.eventos.publicar(MonstruoMovio(None, pos))
         if self.monster_pos == self.jugador.posicion:
             self._set_game_over(MONSTER_HIT_MSG)
         return True
 
+    @medido("monstruo")
     def monster_step(self) -> None:
+        if self.grabador is not None:
+            self.grabador.anotar("k")
         if not self.monster_active or self.monster_pos is None or self.game_over:
             return
+        # El campo solo se recalcula si el jugador se movió desde el último paso
+        self.campo_monstruo.objetivo(self.jugador.posicion)
+        desde = self.monster_pos
+        paso = self.campo_monstruo.siguiente_paso(self.monster_pos)
+        if paso is not None:
+            self.monster_pos = paso
+        else:
+            self._monster_step_greedy()
+        if self.monster_pos != desde:
+            self.eventos.publicar(MonstruoMovio(desde, self.monster_pos))
+        if self.monster_pos == self.jugador.posicion:
+            self._set_game_over(MONSTER_HIT_MSG)
+
+    def _monster_step_greedy(self) -> None:
+        """Paso directo hacia el jugador (si no hay camino por el campo)."""
         mx, my = self.monster_pos
         px, py = self.jugador.posicion
         dx = 1 if px > mx else -1 if px < mx else 0
@@ -279,17 +607,15 @@ class GameEngine:
             candidates.append((mx + dx, my + dy))
         candidates.append((mx, my))
         for cx, cy in candidates:
-            if 0 <= cx < MAP_W and 0 <= cy < MAP_H and (cx, cy) not in self.tree_cells:
+            if 0 <= cx < self.map_w and 0 <= cy < self.map_h and (cx, cy) not in self.tree_cells:
                 self.monster_pos = (cx, cy)
                 break
-        if self.monster_pos == self.jugador.posicion:
-            self._set_game_over(MONSTER_HIT_MSG)
 
     # --------------------------------------------------------------------- #
     # Game over / CRUD
     # --------------------------------------------------------------------- #
     def _evaluar_game_over(self) -> None:
-        muertos = sum(1 for a in self.animales if a.is_dead())
+        muertos = self.repo.muertos
         if muertos >= self.max_animales_muertos:
             self._set_game_over(f"{muertos} animales murieron")
         if self.jugador.vidas <= 0:
@@ -299,36 +625,262 @@ class GameEngine:
         if self.game_over:
             return
         self.game_over = True
+        self.motivo_game_over = motivo
         self.monster_active = False
         self.jugador.log(f"GAME OVER: {motivo}")
+        self.persistencia.flush(esperar=True)
+        self._publicar_cambios()
+        self.eventos.publicar(FinDelJuego(motivo))
 
-    # CRUD passthrough (manteniendo las nuevas reglas)
-    def crear_animal(self, *args, **kwargs):
-        a = storage.crear_animal(*args, **kwargs)
-        self.animales = storage.cargar_animales()
+    # --------------------------------------------------------------------- #
+    # Persistencia
+    # --------------------------------------------------------------------- #
+    def flush(self) -> None:
+        """Fuerza la escritura de las colecciones con cambios pendientes (y la espera)."""
+        self.persistencia.flush(esperar=True)
+
+    def close(self) -> None:
+        self.persistencia.close()
+
+    # CRUD sobre el repositorio en memoria (manteniendo las nuevas reglas)
+    def _post_crud(self) -> None:
         self._normalize_animales()
         if not self._active_animals():
             self._spawn_nueva_mascota(force=True)
+        self._publicar_cambios()
+
+    # --------------------------------------------------------------------- #
+    # Eventos
+    # --------------------------------------------------------------------- #
+    def _publicar_cambios(self) -> None:
+        """Publica lo que cambió del HUD (puntos, vidas, inventario, tiempo, mascotas activas)."""
+        if not self.eventos:
+            return
+        j = self.jugador
+        actual = (("puntos", j.puntuacion), ("vidas", j.vidas), ("inventario", tuple(j.inventario)),
+                  ("tiempo", self.remaining_time), ("activas", self.repo.n_activos))
+        for clave, valor in actual:
+            if self._publicado.get(clave) != valor:
+                self._publicado[clave] = valor
+                self.eventos.publicar(_EVENTOS_HUD[clave](valor))
+
+    def snapshot(self) -> bytes:
+        """Estado completo en binario compacto y versionado (ver game/snapshot.py)."""
+        from game.snapshot import volcar
+        return volcar(self)
+
+    def restore(self, datos: bytes) -> None:
+        """Vuelve al estado de un `snapshot()`; las colecciones quedan marcadas para persistir."""
+        from game.snapshot import cargar
+        mundo = self.mundo
+        cargar(self, datos)
+        if self.mundo != mundo:
+            storage.guardar_mundo(self.mundo)
+        self.campo_monstruo = CampoDistancias(self.map_w, self.map_h, self.tree_cells)
+        for col in ("animales", "items", "trampas"):
+            self.persistencia.marcar(col)
+        self.publicar_estado()
+
+    def estado(self) -> dict:
+        """Estado observable completo (jugador, mundo, entidades, generador); base de `game/replay.py`."""
+        return {
+            "jugador": self.jugador.to_dict(),
+            "tiempo": self.remaining_time,
+            "game_over": self.game_over,
+            "motivo": self.motivo_game_over,
+            "rescates": self.rescates,
+            "monstruo": [self.monster_active, list(self.monster_pos) if self.monster_pos else None],
+            "respawn": self._pet_respawn_delay,
+            "animales": [a.to_dict() for a in self.repo.animales],
+            "items": self.items.a_dicts(),
+            "trampas": self.trampas.a_dicts(),
+            "arboles": sorted(self.tree_cells),
+            "flores": sorted(self.flower_cells),
+            "rng": list(self.rng.getstate()[1][-4:]),   # posición del generador
+        }
+
+    def publicar_estado(self) -> None:
+        """Vuelve a publicar todo el estado del HUD (p. ej. para un suscriptor nuevo)."""
+        self._publicado.clear()
+        self._publicar_cambios()
+
+    def crear_animal(self, *args, **kwargs):
+        if self.grabador is not None:
+            self.grabador.anotar("c", list(args), kwargs)
+        a = storage.nuevo_animal(*args, **kwargs)
+        if not self.dentro(a.posicion):
+            raise ValueError("Pos fuera de mapa")
+        self.repo.agregar(a)
+        self._post_crud()
         return a
 
     def leer_animal(self, nombre: str):
-        return storage.leer_animal(nombre)
+        return self.repo.buscar(nombre)
 
     def actualizar_animal(self, nombre: str, **campos):
-        pos = campos.get("posicion")
-        if pos and tuple(pos) in self.tree_cells:
-            raise ValueError("No se puede colocar una mascota sobre un árbol")
-        ok = storage.actualizar_animal(nombre, **campos)
-        self.animales = storage.cargar_animales()
-        self._normalize_animales()
-        if not self._active_animals():
-            self._spawn_nueva_mascota(force=True)
+        # Mismas reglas (y mensajes) que `actualizar_animales`
+        limpios = self._cambios_validos("animales", {nombre: campos})[nombre.lower()]
+        if self.grabador is not None:          # solo se graba lo que se aceptó
+            self.grabador.anotar("u", nombre, campos)
+        ok = self.repo.actualizar(nombre, **limpios)
+        self._post_crud()
         return ok
 
     def borrar_animal(self, nombre: str):
-        ok = storage.borrar_animal(nombre)
-        self.animales = storage.cargar_animales()
-        self._normalize_animales()
-        if not self._active_animals():
-            self._spawn_nueva_mascota(force=True)
+        if self.grabador is not None:
+            self.grabador.anotar("b", nombre)
+        ok = self.repo.borrar(nombre)
+        self._post_crud()
         return ok
+
+    # CRUD en lote: todo se valida antes de mutar, un solo aviso a la persistencia
+    # y una sola normalización al final.
+    def crear_animales(self, especs: Iterable) -> List[Animal]:
+        especs = list(especs)
+        if self.grabador is not None:
+            self.grabador.anotar("C", especs)
+        animales = storage.nuevos_animales(especs)
+        for a in animales:
+            if not self.dentro(a.posicion):
+                raise ValueError(f"{a.nombre}: pos fuera de mapa")
+        self.repo.agregar_varios(animales)
+        self._post_crud()
+        return animales
+
+    def actualizar_animales(self, cambios: Dict[str, dict]) -> int:
+        """`{nombre: campos}`; devuelve cuántos animales existían."""
+        if self.grabador is not None:
+            self.grabador.anotar("U", cambios)
+        n = self.repo.actualizar_varios(self._cambios_validos("animales", cambios))
+        self._post_crud()
+        return n
+
+    def borrar_animales(self, nombres: Iterable[str]) -> int:
+        nombres = list(nombres)
+        if self.grabador is not None:
+            self.grabador.anotar("B", nombres)
+        n = self.repo.borrar_varios(nombres)
+        self._post_crud()
+        return n
+
+    def _validar_ubicaciones(self, entidades: list) -> None:
+        for e in entidades:
+            if not self.dentro(e.posicion):
+                raise ValueError(f"{e.nombre}: pos fuera de mapa")
+            if e.posicion in self.tree_cells:
+                raise ValueError(f"{e.nombre}: no se puede colocar sobre un árbol")
+
+    def _filas_con_nombre(self, alm, nombres: Iterable[str]) -> List[int]:
+        """Filas de `alm` cuyos nombres están en `nombres`, de mayor a menor (aptas para swap-remove)."""
+        claves = {n.lower() for n in nombres}
+        codigos = {c for c, t in enumerate(alm.nombres.textos) if t.lower() in claves}
+        return [f for f in range(len(alm) - 1, -1, -1) if alm.nombre[f] in codigos]
+
+    def crear_items(self, items: Iterable) -> int:
+        """Agrega items (entidades o dicts de `to_dict()`); devuelve cuántos."""
+        items = list(items)
+        if self.grabador is not None:
+            self.grabador.anotar("I", storage.dicts_de(items))
+        nuevos = storage.nuevas_entidades("items", items)
+        self._validar_ubicaciones(nuevos)
+        for it in nuevos:
+            self._agregar_item(it)
+        if nuevos:
+            self.persistencia.marcar("items")
+        return len(nuevos)
+
+    def borrar_items(self, nombres: Iterable[str]) -> int:
+        nombres = list(nombres)
+        if self.grabador is not None:
+            self.grabador.anotar("i", nombres)
+        filas = self._filas_con_nombre(self.items, nombres)
+        for f in filas:
+            self._quitar_item(self.items[f])
+        if filas:
+            self.persistencia.marcar("items")
+        return len(filas)
+
+    def _cambios_validos(self, coleccion: str, cambios: Dict[str, dict]) -> Dict[str, dict]:
+        limpios = {}
+        for nombre, campos in cambios.items():
+            campos = limpios[nombre.lower()] = storage.validar_campos(coleccion, campos)
+            pos = campos.get("posicion")
+            if pos and not self.dentro(tuple(pos)):
+                raise ValueError(f"{nombre}: pos fuera de mapa")
+            if pos and tuple(pos) in self.tree_cells:
+                raise ValueError(f"{nombre}: no se puede colocar sobre un árbol")
+        return limpios
+
+    @staticmethod
+    def _aplicar(entidad, campos: dict) -> None:
+        for k, v in campos.items():
+            setattr(entidad, k, tuple(v) if k == "posicion" else v)
+
+    def actualizar_items(self, cambios: Dict[str, dict]) -> int:
+        """`{nombre: campos}` aplicado a todos los items con ese nombre; devuelve cuántos cambiaron."""
+        if self.grabador is not None:
+            self.grabador.anotar("J", cambios)
+        limpios = self._cambios_validos("items", cambios)
+        filas = self._filas_con_nombre(self.items, limpios)
+        for f in filas:
+            it = self.items[f]
+            self._idx_items.quitar(it.posicion, f)
+            self._n_comida -= it.tipo == "comida"
+            self._aplicar(it, limpios[it.nombre.lower()])
+            self._idx_items.agregar(it.posicion, f)
+            self._n_comida += it.tipo == "comida"
+        if filas:
+            self.persistencia.marcar("items")
+        return len(filas)
+
+    def crear_trampas(self, trampas: Iterable) -> int:
+        """Agrega trampas (entidades o dicts de `to_dict()`); devuelve cuántas."""
+        trampas = list(trampas)
+        if self.grabador is not None:
+            self.grabador.anotar("T", storage.dicts_de(trampas))
+        nuevas = storage.nuevas_entidades("trampas", trampas)
+        self._validar_ubicaciones(nuevas)
+        for t in nuevas:
+            self._indexar_trampa(self.trampas.append(t))
+        if nuevas:
+            self._moviles_en_pool = False
+            self.persistencia.marcar("trampas")
+        return len(nuevas)
+
+    def actualizar_trampas(self, cambios: Dict[str, dict]) -> int:
+        """Como `actualizar_items`; tipo, velocidad o `activo` pueden mover la trampa de índice."""
+        if self.grabador is not None:
+            self.grabador.anotar("V", cambios)
+        limpios = self._cambios_validos("trampas", cambios)
+        filas = self._filas_con_nombre(self.trampas, limpios)
+        for f in filas:
+            t = self.trampas[f]
+            self._desindexar_trampa(f)
+            self._aplicar(t, limpios[t.nombre.lower()])
+            self._indexar_trampa(f)
+        if filas:
+            self._listar_moviles()
+            self.persistencia.marcar("trampas")
+        return len(filas)
+
+    def _listar_moviles(self) -> None:
+        """Recalcula `_moviles` desde las columnas (tras cambios en lote)."""
+        tr = self.trampas
+        self._moviles = [f for f in range(len(tr)) if tr.estado[f] & ACTIVO and tr.tipo[f] == MOVING]
+        self._moviles_en_pool = False
+
+    def borrar_trampas(self, nombres: Iterable[str]) -> int:
+        nombres = list(nombres)
+        if self.grabador is not None:
+            self.grabador.anotar("x", nombres)
+        tr = self.trampas
+        filas = self._filas_con_nombre(tr, nombres)
+        for f in filas:     # de mayor a menor: la fila que sube nunca es una a borrar
+            self._desindexar_trampa(f)
+            if f != len(tr) - 1:
+                self._desindexar_trampa(len(tr) - 1, nueva=f)
+            tr.quitar(f)
+        if filas:
+            self._listar_moviles()
+            self.persistencia.marcar("trampas")
+        return len(filas)
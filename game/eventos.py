@@ -0,0 +1,102 @@
+"""
+Eventos tipados del motor y bus de suscripción.
+
+`GameEngine.eventos` es un `BusEventos`; la GUI (o cualquier observador) se
+suscribe por tipo de evento y reacciona solo a lo que cambió, sin sondear
+el estado. Publicar sin suscriptores cuesta una búsqueda en un dict.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+Celda = Tuple[int, int]
+
+
+class Evento:
+    """Base de todos los eventos (suscribirse a `Evento` recibe todos)."""
+    __slots__ = ()
+
+
+@dataclass(frozen=True)
+class PuntajeCambio(Evento):
+    puntos: int
+
+
+@dataclass(frozen=True)
+class VidasCambio(Evento):
+    vidas: int
+
+
+@dataclass(frozen=True)
+class InventarioCambio(Evento):
+    inventario: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class TiempoCambio(Evento):
+    restante: int
+
+
+@dataclass(frozen=True)
+class MascotasActivasCambio(Evento):
+    activas: int
+
+
+@dataclass(frozen=True)
+class MascotaAparecio(Evento):
+    nombre: str
+    especie: str
+    posicion: Celda
+
+
+@dataclass(frozen=True)
+class MascotaRescatada(Evento):
+    nombre: str
+    especie: str
+
+
+@dataclass(frozen=True)
+class TrampaActivada(Evento):
+    nombre: str
+    tipo: str
+    posicion: Celda
+
+
+@dataclass(frozen=True)
+class MonstruoMovio(Evento):
+    desde: Optional[Celda]      # None al aparecer
+    hasta: Celda
+
+
+@dataclass(frozen=True)
+class FinDelJuego(Evento):
+    motivo: str
+
+
+Suscriptor = Callable[[Evento], None]
+
+
+class BusEventos:
+    def __init__(self):
+        self._subs: Dict[type, List[Suscriptor]] = {}
+
+    def suscribir(self, tipo: Type[Evento], fn: Suscriptor) -> Callable[[], None]:
+        """Registra `fn` para `tipo`; devuelve una función que lo desuscribe."""
+        lista = self._subs.setdefault(tipo, [])
+        lista.append(fn)
+
+        def desuscribir() -> None:
+            if fn in lista:
+                lista.remove(fn)
+        return desuscribir
+
+    def publicar(self, evento: Evento) -> None:
+        subs = self._subs
+        if not subs:
+            return
+        for fn in subs.get(type(evento), ()):
+            fn(evento)
+        for fn in subs.get(Evento, ()):
+            fn(evento)
+
+    def __bool__(self) -> bool:
+        return any(self._subs.values())
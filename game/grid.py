@@ -0,0 +1,383 @@
+import random
+from array import array
+from math import gcd, lcm
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Celda = Tuple[int, int]
+
+
+def _congruencia(desde: int, vel: int, hasta: int, m: int) -> Optional[Tuple[int, int]]:
+    """(k0, periodo) tales que desde + k*vel ≡ hasta (mod m) sii k ≡ k0 (mod periodo); None si nunca."""
+    d = (hasta - desde) % m
+    g = gcd(vel, m)
+    if d % g:
+        return None
+    periodo = m // g
+    return (d // g * pow(vel // g, -1, periodo) % periodo if periodo > 1 else 0), periodo
+
+
+def primer_encuentro(pos: Celda, vel: Celda, destino: Celda, w: int, h: int) -> Optional[int]:
+    """Menor k >= 1 tal que `pos` avanzando `vel` por paso (mapa toroidal w x h) cae en `destino`."""
+    cx = _congruencia(pos[0], vel[0], destino[0], w)
+    cy = _congruencia(pos[1], vel[1], destino[1], h)
+    if cx is None or cy is None:
+        return None
+    (a1, m1), (a2, m2) = cx, cy
+    g = gcd(m1, m2)
+    if (a2 - a1) % g:
+        return None
+    paso = m2 // g
+    t = (a2 - a1) // g * pow(m1 // g, -1, paso) % paso if paso > 1 else 0
+    periodo = m1 * paso
+    k = (a1 + m1 * t) % periodo
+    return k or periodo
+
+
+class IndiceCeldas:
+    """
+    Índice espacial celda -> entidades.
+
+    Solo guarda celdas ocupadas; agregar, quitar, mover y consultar una celda
+    son O(1) (más el número de entidades apiladas en esa celda). La identidad
+    de las entidades (no la igualdad de dataclass) decide qué se quita; las
+    filas de un almacén columnar (`int`) se comparan por valor.
+
+    Con `libres` (un `CeldasLibres`), cada alta/baja ocupa o libera la celda
+    en el pool de celdas libres.
+    """
+
+    def __init__(self, entidades: Iterable = (), libres: Optional["CeldasLibres"] = None):
+        self._celdas: Dict[Celda, List] = {}
+        self.libres = libres
+        for e in entidades:
+            self.agregar(e.posicion, e)
+
+    def agregar(self, pos: Celda, ent) -> None:
+        self._celdas.setdefault(pos, []).append(ent)
+        if self.libres is not None:
+            self.libres.ocupar(pos)
+
+    def quitar(self, pos: Celda, ent) -> None:
+        lista = self._celdas.get(pos)
+        if not lista:
+            return
+        for i, e in enumerate(lista):
+            if e is ent or (type(ent) is int and e == ent):
+                del lista[i]
+                if self.libres is not None:
+                    self.libres.liberar(pos)
+                break
+        if not lista:
+            del self._celdas[pos]
+
+    def mover(self, ent, desde: Celda, hasta: Celda) -> None:
+        if desde == hasta:
+            return
+        self.quitar(desde, ent)
+        self.agregar(hasta, ent)
+
+    def reemplazar(self, pos: Celda, viejo, nuevo) -> None:
+        """Cambia `viejo` por `nuevo` en `pos` sin tocar el pool (p. ej. una fila que se movió)."""
+        lista = self._celdas.get(pos, ())
+        for i, e in enumerate(lista):
+            if e is viejo or (type(viejo) is int and e == viejo):
+                lista[i] = nuevo
+                return
+
+    def en(self, pos: Celda) -> List:
+        """Copia de las entidades en `pos` (segura para mutar el índice al iterar)."""
+        lista = self._celdas.get(pos)
+        return list(lista) if lista else []
+
+    def __contains__(self, pos: Celda) -> bool:
+        return pos in self._celdas
+
+    def celdas(self):
+        return self._celdas.keys()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._celdas.values())
+
+
+class IndiceMoviles:
+    """
+    Índice celda -> entidades que se trasladan a velocidad constante por un mapa toroidal.
+
+    Agrupa las entidades por velocidad `(dx, dy)`: cada grupo guarda sus
+    posiciones en un marco que viaja con él (un `IndiceCeldas`) más el
+    desplazamiento acumulado. Avanzar `n` pasos cuesta O(grupos), no
+    O(entidades), y consultar una celda también es O(grupos).
+    """
+
+    def __init__(self, w: int, h: int):
+        self.w, self.h = w, h
+        self._grupos: Dict[Celda, list] = {}     # (dx, dy) -> [ox, oy, IndiceCeldas en el marco]
+
+    def _marco(self, pos: Celda, g: list) -> Celda:
+        return ((pos[0] - g[0]) % self.w, (pos[1] - g[1]) % self.h)
+
+    def agregar(self, pos: Celda, vel: Celda, ent) -> None:
+        vel = (vel[0] % self.w, vel[1] % self.h)
+        g = self._grupos.get(vel)
+        if g is None:
+            g = self._grupos[vel] = [0, 0, IndiceCeldas()]
+        g[2].agregar(self._marco(pos, g), ent)
+
+    def quitar(self, pos: Celda, vel: Celda, ent) -> None:
+        g = self._grupos.get((vel[0] % self.w, vel[1] % self.h))
+        if g is not None:
+            g[2].quitar(self._marco(pos, g), ent)
+
+    def reemplazar(self, pos: Celda, vel: Celda, viejo, nuevo) -> None:
+        g = self._grupos[(vel[0] % self.w, vel[1] % self.h)]
+        g[2].reemplazar(self._marco(pos, g), viejo, nuevo)
+
+    def avanzar(self, pasos: int = 1) -> None:
+        w, h = self.w, self.h
+        for (dx, dy), g in self._grupos.items():
+            g[0] = (g[0] + dx * pasos) % w
+            g[1] = (g[1] + dy * pasos) % h
+
+    @property
+    def en_movimiento(self) -> bool:
+        """Hay alguna entidad con velocidad no nula (algo cambia al avanzar)."""
+        return any(vel != (0, 0) and g[2].celdas() for vel, g in self._grupos.items())
+
+    def primer_encuentro(self, pos: Celda, limite: int) -> Optional[int]:
+        """
+        Menor k en 1..limite tal que, tras avanzar k pasos, alguna entidad en
+        movimiento está en `pos` (None si ninguna llega).
+
+        Por grupo elige lo más barato: recorrer los pasos (hasta el período
+        del grupo) o resolver en forma cerrada la congruencia de cada celda.
+        """
+        w, h = self.w, self.h
+        mejor = None
+        for (dx, dy), g in self._grupos.items():
+            celdas = g[2].celdas()
+            tope = limite if mejor is None else mejor - 1
+            if (dx, dy) == (0, 0) or not celdas or tope < 1:
+                continue
+            pasos = min(tope, lcm(w // gcd(dx, w), h // gcd(dy, h)))
+            if pasos <= len(celdas):
+                px, py = pos[0] - g[0], pos[1] - g[1]
+                for k in range(1, pasos + 1):
+                    if ((px - k * dx) % w, (py - k * dy) % h) in celdas:
+                        mejor = k
+                        break
+            else:
+                for rx, ry in celdas:
+                    k = primer_encuentro((rx + g[0], ry + g[1]), (dx, dy), pos, w, h)
+                    if k is not None and k <= tope:
+                        mejor, tope = k, k - 1
+        return mejor
+
+    def en(self, pos: Celda, solo_moviendose: bool = False) -> List:
+        res: List = []
+        for vel, g in self._grupos.items():
+            if solo_moviendose and vel == (0, 0):
+                continue
+            res += g[2].en(self._marco(pos, g))
+        return res
+
+    def __contains__(self, pos: Celda) -> bool:
+        return any(self._marco(pos, g) in g[2] for g in self._grupos.values())
+
+
+class CeldasLibres:
+    """
+    Pool de celdas libres de un mapa `w` x `h` con muestreo aleatorio O(1).
+
+    Arreglo compacto de celdas libres (swap-remove) + mapa celda -> posición
+    en ese arreglo + contador de ocupantes por celda, todo en `array` de
+    enteros (unos pocos bytes por celda). Una celda vuelve al pool recién
+    cuando se va su último ocupante. Las celdas fuera del mapa se ignoran.
+    """
+
+    def __init__(self, w: int, h: int):
+        self.w, self.h = w, h
+        n = w * h
+        self._libres = array("i", range(n))
+        self._pos = array("i", self._libres)   # -1 si la celda está ocupada
+        self._ocupantes = array("H", bytes(2 * n))
+
+    def _id(self, pos: Celda) -> int:
+        x, y = pos
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return y * self.w + x
+        return -1
+
+    def __len__(self) -> int:
+        return len(self._libres)
+
+    def libre(self, pos: Celda) -> bool:
+        c = self._id(pos)
+        return c >= 0 and self._pos[c] >= 0
+
+    def ocupar(self, pos: Celda) -> None:
+        c = self._id(pos)
+        if c < 0:
+            return
+        self._ocupantes[c] += 1
+        if self._ocupantes[c] == 1:
+            i = self._pos[c]
+            ultimo = self._libres[-1]
+            self._libres[i] = ultimo
+            self._pos[ultimo] = i
+            self._libres.pop()
+            self._pos[c] = -1
+
+    def liberar(self, pos: Celda) -> None:
+        c = self._id(pos)
+        if c < 0 or self._ocupantes[c] == 0:
+            return
+        self._ocupantes[c] -= 1
+        if self._ocupantes[c] == 0:
+            self._pos[c] = len(self._libres)
+            self._libres.append(c)
+
+    def mover(self, desde: Optional[Celda], hasta: Optional[Celda]) -> None:
+        if desde == hasta:
+            return
+        if desde is not None:
+            self.liberar(desde)
+        if hasta is not None:
+            self.ocupar(hasta)
+
+    def mover_varias(self, desde: Iterable[Celda], hasta: Iterable[Celda]) -> None:
+        """Libera todas las celdas de `desde` y ocupa las de `hasta` (ocupantes que se movieron juntos)."""
+        for pos in desde:
+            self.liberar(pos)
+        for pos in hasta:
+            self.ocupar(pos)
+
+    def muestrear(self, rng=random) -> Optional[Celda]:
+        """Celda libre al azar (sin ocuparla) o None si el mapa está lleno."""
+        if not self._libres:
+            return None
+        c = self._libres[rng.randrange(len(self._libres))]
+        return (c % self.w, c // self.w)
+
+    def muestra(self, k: int, rng=random) -> List[Celda]:
+        """Hasta `k` celdas libres distintas al azar (sin ocuparlas)."""
+        w = self.w
+        idxs = rng.sample(range(len(self._libres)), min(k, len(self._libres)))
+        return [(c % w, c // w) for c in (self._libres[i] for i in idxs)]
+
+    def tomar(self, rng=random) -> Optional[Celda]:
+        """Muestrea una celda libre y la ocupa."""
+        pos = self.muestrear(rng)
+        if pos is not None:
+            self.ocupar(pos)
+        return pos
+
+    @property
+    def orden(self) -> array:
+        """Arreglo de celdas libres (ids y*w+x) en su orden actual; no mutarlo por fuera."""
+        return self._libres
+
+    def reordenar(self, orden: array) -> None:
+        """Adopta `orden` (mismas celdas libres, otro orden): el muestreo queda igual que donde se guardó."""
+        if len(orden) != len(self._libres) or len(set(orden)) != len(orden):
+            raise ValueError("El orden no coincide con las celdas libres del pool")
+        pos = self._pos
+        for c in orden:         # se valida todo antes de tocar el pool
+            if not 0 <= c < len(pos) or pos[c] < 0:
+                raise ValueError(f"Celda {c} no está libre en el pool")
+        for i, c in enumerate(orden):
+            pos[c] = i
+        self._libres = array("i", orden)
+
+
+class MapaBits:
+    """
+    Conjunto de celdas guardado como bitmap (1 bit por celda).
+
+    Mismo uso que un `set` de tuplas (`in`, `add`, `discard`, iteración,
+    `len`) pero con memoria acotada: un mapa de 1000x1000 ocupa ~125 KB.
+    """
+
+    def __init__(self, w: int, h: int, celdas: Iterable[Celda] = ()):
+        self.w, self.h = w, h
+        self._bits = bytearray((w * h + 7) // 8)
+        self._n = 0
+        self.update(celdas)
+
+    def _id(self, pos: Celda) -> int:
+        x, y = pos
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return y * self.w + x
+        return -1
+
+    def __contains__(self, pos) -> bool:
+        if pos is None:
+            return False
+        c = self._id(pos)
+        return c >= 0 and bool(self._bits[c >> 3] & (1 << (c & 7)))
+
+    def add(self, pos: Celda) -> None:
+        c = self._id(pos)
+        if c < 0:
+            raise ValueError(f"Celda fuera del mapa: {pos}")
+        mask = 1 << (c & 7)
+        if not self._bits[c >> 3] & mask:
+            self._bits[c >> 3] |= mask
+            self._n += 1
+
+    def update(self, celdas: Iterable[Celda]) -> None:
+        """Agrega muchas celdas de una vez (bucle sin llamadas por celda)."""
+        w, h, bits = self.w, self.h, self._bits
+        n = self._n
+        for x, y in celdas:
+            if not (0 <= x < w and 0 <= y < h):
+                raise ValueError(f"Celda fuera del mapa: {(x, y)}")
+            c = y * w + x
+            mask = 1 << (c & 7)
+            if not bits[c >> 3] & mask:
+                bits[c >> 3] |= mask
+                n += 1
+        self._n = n
+
+    def discard(self, pos: Celda) -> None:
+        c = self._id(pos)
+        if c < 0:
+            return
+        mask = 1 << (c & 7)
+        if self._bits[c >> 3] & mask:
+            self._bits[c >> 3] &= ~mask & 0xFF
+            self._n -= 1
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __bool__(self) -> bool:
+        return self._n > 0
+
+    def __iter__(self):
+        w = self.w
+        for i, byte in enumerate(self._bits):
+            if not byte:
+                continue
+            base = i << 3
+            for b in range(8):
+                if byte & (1 << b):
+                    c = base + b
+                    yield (c % w, c // w)
+
+    def a_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    @classmethod
+    def desde_bytes(cls, w: int, h: int, datos) -> "MapaBits":
+        nuevo = cls(w, h)
+        if len(datos) != len(nuevo._bits):
+            raise ValueError("Tamaño de bitmap inválido")
+        nuevo._bits[:] = datos
+        nuevo._n = int.from_bytes(nuevo._bits, "little").bit_count()
+        return nuevo
+
+    def copy(self) -> "MapaBits":
+        nuevo = MapaBits(self.w, self.h)
+        nuevo._bits[:] = self._bits
+        nuevo._n = self._n
+        return nuevo
@@ -0,0 +1,95 @@
+from array import array
+from collections import deque
+from typing import Optional, Tuple
+
+Celda = Tuple[int, int]
+INALCANZABLE = -1
+
+# Vecindad de 8 (el monstruo puede moverse en diagonal); primero las ortogonales.
+_VECINOS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class CampoDistancias:
+    """
+    Campo de distancias (flow field) hacia un objetivo, por BFS sobre celdas
+    caminables, compartido por todos los perseguidores.
+
+    El BFS es perezoso y reanudable: cada consulta expande la frontera solo
+    hasta conocer la celda pedida, y las consultas siguientes (otros
+    monstruos, el paso siguiente) continúan desde ahí. Cambiar el objetivo o
+    la caminabilidad invalida el campo en O(1) subiendo una generación (las
+    celdas con sello viejo cuentan como no visitadas), sin limpiar arreglos.
+    """
+
+    def __init__(self, w: int, h: int, obstaculos):
+        self.w, self.h = w, h
+        self.obstaculos = obstaculos          # cualquier contenedor con `in` (p. ej. MapaBits)
+        n = w * h
+        self._dist = array("i", bytes(4 * n))
+        self._sello = array("I", bytes(4 * n))
+        self._gen = 0
+        self._cola: deque = deque()
+        self._objetivo: Optional[Celda] = None
+        self.expansiones = 0                  # celdas expandidas desde la última invalidación
+
+    def invalidar(self) -> None:
+        """La caminabilidad cambió (o cambia el objetivo): el campo se recalcula perezosamente."""
+        self._gen += 1
+        self._cola.clear()
+        self.expansiones = 0
+        if self._objetivo is not None:
+            self._sembrar(self._objetivo)
+
+    def objetivo(self, pos: Celda) -> None:
+        if pos != self._objetivo:
+            self._objetivo = pos
+            self.invalidar()
+
+    def _sembrar(self, pos: Celda) -> None:
+        x, y = pos
+        if 0 <= x < self.w and 0 <= y < self.h:
+            c = y * self.w + x
+            self._sello[c] = self._gen
+            self._dist[c] = 0
+            self._cola.append(c)
+
+    def _expandir_hasta(self, c: int) -> None:
+        w, h = self.w, self.h
+        dist, sello, gen, cola = self._dist, self._sello, self._gen, self._cola
+        obst = self.obstaculos
+        while sello[c] != gen and cola:
+            actual = cola.popleft()
+            self.expansiones += 1
+            ax, ay = actual % w, actual // w
+            d = dist[actual] + 1
+            for dx, dy in _VECINOS:
+                nx, ny = ax + dx, ay + dy
+                if 0 <= nx < w and 0 <= ny < h:
+                    v = ny * w + nx
+                    if sello[v] != gen and (nx, ny) not in obst:
+                        sello[v] = gen
+                        dist[v] = d
+                        cola.append(v)
+
+    def distancia(self, pos: Celda) -> int:
+        """Pasos hasta el objetivo, o INALCANZABLE."""
+        x, y = pos
+        if self._objetivo is None or not (0 <= x < self.w and 0 <= y < self.h):
+            return INALCANZABLE
+        c = y * self.w + x
+        self._expandir_hasta(c)
+        return self._dist[c] if self._sello[c] == self._gen else INALCANZABLE
+
+    def siguiente_paso(self, pos: Celda) -> Optional[Celda]:
+        """Vecino caminable que más acerca al objetivo; None si no hay camino."""
+        actual = self.distancia(pos)
+        if actual == INALCANZABLE:
+            return None
+        if actual == 0:
+            return pos
+        x, y = pos
+        for dx, dy in _VECINOS:
+            vecino = (x + dx, y + dy)
+            if self.distancia(vecino) == actual - 1:
+                return vecino
+        return pos
@@ -0,0 +1,150 @@
+"""
+Grabación y reproducción determinista de partidas.
+
+`Grabador` se engancha al motor (`GameEngine(..., grabador=g)`): al construir
+guarda la semilla y el mundo cargado, y después anota cada entrada (mover,
+tick, advance, aparición y pasos del monstruo, CRUD) con su instante en ms. Como todo
+el azar del motor sale de `engine.rng`, reproducir las mismas entradas sobre
+el mismo mundo con la misma semilla da exactamente el mismo estado final.
+
+`reproducir()` re-ejecuta una grabación sin GUI, sin esperas y sin escribir a
+`_data/`, y verifica la huella del estado final.
+
+Formato (JSON compacto):
+  {"version": 1, "semilla": S, "inicio": {...},
+   "entradas": [[dt_ms, op, *args], ...],   # dt relativo a la entrada anterior
+   "final": {"huella": "...", "resumen": {...}}}
+"""
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from classes.jugador import Jugador
+from data import storage
+from game.engine import GameEngine
+
+VERSION = 1
+
+# op -> (método del motor, ¿puede rechazar la entrada con ValueError?)
+_OPS = {
+    "m": ("mover_jugador", False),
+    "t": ("tick", False),
+    "a": ("advance", False),
+    "s": ("spawn_monster", False),
+    "k": ("monster_step", False),
+    "c": ("crear_animal", True),
+    "u": ("actualizar_animal", True),
+    "b": ("borrar_animal", True),
+    "C": ("crear_animales", True),
+    "U": ("actualizar_animales", True),
+    "B": ("borrar_animales", True),
+    "I": ("crear_items", True),
+    "J": ("actualizar_items", True),
+    "i": ("borrar_items", False),
+    "T": ("crear_trampas", True),
+    "V": ("actualizar_trampas", True),
+    "x": ("borrar_trampas", False),
+}
+
+
+class ReproduccionDivergente(AssertionError):
+    """La reproducción no llegó al mismo estado final que la partida grabada."""
+
+
+def huella(estado: dict) -> str:
+    texto = json.dumps(estado, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def resumen(engine: GameEngine) -> dict:
+    j = engine.jugador
+    return {"puntos": j.puntuacion, "vidas": j.vidas, "posicion": list(j.posicion),
+            "tiempo": engine.remaining_time, "motivo": engine.motivo_game_over,
+            "rescates": engine.rescates, "entidades": [len(engine.animales), len(engine.items), len(engine.trampas)]}
+
+
+class Grabador:
+    def __init__(self, reloj: Callable[[], float] = time.monotonic):
+        self._reloj = reloj
+        self._ultimo = reloj()
+        self.semilla: Optional[int] = None
+        self.inicio: Optional[dict] = None
+        self.entradas: List[list] = []
+
+    def comenzar(self, engine: GameEngine) -> None:
+        """Lo llama el motor al construirse, con lo cargado y antes de usar el generador."""
+        self.semilla = engine.semilla
+        self.inicio = {
+            "jugador": engine.jugador.to_dict(),
+            "mundo": engine.mundo,
+            "remaining_time": engine.remaining_time,
+            "max_animales_muertos": engine.max_animales_muertos,
+            "animales": [a.to_dict() for a in engine.repo.animales],
+            "items": engine.items.a_dicts(),
+            "trampas": engine.trampas.a_dicts(),
+        }
+        self._ultimo = self._reloj()
+
+    def anotar(self, op: str, *args) -> None:
+        ahora = self._reloj()
+        self.entradas.append([round((ahora - self._ultimo) * 1000), op, *args])
+        self._ultimo = ahora
+
+    def grabacion(self, engine: GameEngine) -> dict:
+        if self.inicio is None:
+            raise ValueError("El grabador no se conectó a ningún motor")
+        return {"version": VERSION, "semilla": self.semilla, "inicio": self.inicio,
+                "entradas": self.entradas,
+                "final": {"huella": huella(engine.estado()), "resumen": resumen(engine)}}
+
+    def guardar(self, path, engine: GameEngine) -> None:
+        texto = json.dumps(self.grabacion(engine), ensure_ascii=False, separators=(",", ":"))
+        Path(path).write_text(texto, encoding="utf-8")
+
+
+def cargar(path) -> dict:
+    g = json.loads(Path(path).read_text(encoding="utf-8"))
+    if g.get("version") != VERSION:
+        raise ValueError(f"Versión de grabación no soportada: {g.get('version')}")
+    return g
+
+
+def reproducir(grabacion: dict, verificar: bool = True) -> Tuple[GameEngine, float]:
+    """Re-ejecuta la grabación en un directorio de datos aislado; devuelve (motor, segundos)."""
+    ini = grabacion["inicio"]
+    tmp = Path(tempfile.mkdtemp(prefix="patitas-replay-"))
+    try:
+        with storage.usando(storage.BackendJson(tmp)):
+            storage.guardar_mundo(ini["mundo"])
+            storage.guardar_animales([storage.animal_desde_dict(a) for a in ini["animales"]])
+            storage.guardar_items([storage.item_desde_dict(i) for i in ini["items"]])
+            storage.guardar_trampas([storage.trampa_desde_dict(t) for t in ini["trampas"]])
+            t0 = time.perf_counter()
+            engine = GameEngine(Jugador.desde_dict(ini["jugador"]),
+                                max_animales_muertos=ini["max_animales_muertos"],
+                                remaining_time=ini["remaining_time"], semilla=grabacion["semilla"])
+            engine.persistencia.intervalo = None      # a máxima velocidad: sin escrituras intermedias
+            for _, op, *args in grabacion["entradas"]:
+                metodo, rechazable = _OPS[op]
+                kwargs = {}
+                if op == "c":                         # [args, kwargs] de crear_animal
+                    args, kwargs = args
+                elif op == "u":                       # nombre, campos
+                    args, kwargs = args[:1], args[1]
+                try:
+                    getattr(engine, metodo)(*args, **kwargs)
+                except ValueError:
+                    if not rechazable:
+                        raise
+            segundos = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if verificar and huella(engine.estado()) != grabacion["final"]["huella"]:
+        esperado, obtenido = grabacion["final"]["resumen"], resumen(engine)
+        difs = {k: (esperado.get(k), obtenido[k]) for k in obtenido if esperado.get(k) != obtenido[k]}
+        raise ReproduccionDivergente(f"Estado final distinto (esperado, obtenido): {difs or 'difiere el detalle'}")
+    return engine, segundos
@@ -0,0 +1,166 @@
+"""
+Simulación headless por lotes: corre N partidas completas contra `GameEngine`
+con un jugador scripteado, repartidas en un pool de procesos.
+
+    python main.py --simulate 1000 --policy greedy --workers 4
+
+Cada partida usa un directorio de datos propio (temporal) y reproduce los
+tiempos de la GUI: tick cada 1 s, monstruo 5 s después del primer movimiento
+y un paso suyo cada 0.5 s; el jugador actúa cada `MOVE_MS`.
+"""
+import multiprocessing
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from classes.jugador import Jugador
+from data import storage
+from data.seeds import pool_de_siembra, rng_de_siembra, seed_animales, seed_items, seed_trampas
+from game.engine import GameEngine, MAP_W, MAP_H
+
+MOVE_MS = 250
+TICK_MS = 1000
+MONSTER_SPAWN_MS = 5000
+MONSTER_STEP_MS = 500
+PARTIDA_S = 65          # misma duración que la GUI (1:05)
+DIRECCIONES = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+POLITICAS = ("random", "greedy")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Políticas de jugador
+# ──────────────────────────────────────────────────────────────────────────────
+def _politica_random(eng: GameEngine, rng: random.Random) -> Tuple[int, int]:
+    return rng.choice(DIRECCIONES)
+
+
+def _politica_greedy(eng: GameEngine, rng: random.Random) -> Tuple[int, int]:
+    """Va a la comida más cercana (o a la mascota si ya tiene), esquivando trampas visibles."""
+    px, py = eng.jugador.posicion
+    tiene_comida = any(n.lower().startswith("comida") for n in eng.jugador.inventario)
+    objetivos = [a.posicion for a in eng._active_animals()] if tiene_comida else []
+    if not objetivos:
+        objetivos = [i.posicion for i in eng.items if i.tipo == "comida"]
+    if not objetivos:
+        return rng.choice(DIRECCIONES)
+    tx, ty = min(objetivos, key=lambda p: abs(p[0] - px) + abs(p[1] - py))
+    detector = "Detector" in eng.jugador.inventario
+
+    def segura(pos) -> bool:
+        if not eng.dentro(pos) or pos in eng.tree_cells or pos == eng.monster_pos:
+            return False
+        return not any(t.tipo != "camo" or detector for t in eng.entidades_en(pos)["trampas"])
+
+    opciones = [(dx, dy) for dx, dy in DIRECCIONES if segura((px + dx, py + dy))]
+    if not opciones:
+        return rng.choice(DIRECCIONES)
+    return min(opciones, key=lambda d: (abs(px + d[0] - tx) + abs(py + d[1] - ty), rng.random()))
+
+
+_POLITICAS = {"random": _politica_random, "greedy": _politica_greedy}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Una partida
+# ──────────────────────────────────────────────────────────────────────────────
+def jugar_partida(engine: GameEngine, politica: str, rng: random.Random,
+                  max_ms: int = (PARTIDA_S + 5) * 1000) -> int:
+    """Avanza el reloj simulado hasta el game over; devuelve los ms simulados."""
+    mover = _POLITICAS[politica]
+    t = 0
+    spawn_en: Optional[int] = None
+    while not engine.game_over and t < max_ms:
+        t += MOVE_MS
+        engine.mover_jugador(*mover(engine, rng))
+        if spawn_en is None and engine.first_move_done:
+            spawn_en = t + MONSTER_SPAWN_MS
+        if t % TICK_MS == 0:
+            engine.tick(1)
+        if spawn_en is not None and t >= spawn_en and not engine.monster_active and not engine.game_over:
+            engine.spawn_monster()
+        elif engine.monster_active and t % MONSTER_STEP_MS == 0:
+            engine.monster_step()
+    return t
+
+
+def simular_partida(args) -> Dict:
+    """Worker: partida completa en un directorio de datos aislado."""
+    indice, politica, semilla, ancho, alto = args
+    rng = random.Random(semilla)
+    tmp = Path(tempfile.mkdtemp(prefix=f"patitas-sim-{indice}-"))
+    try:
+        with storage.usando(storage.BackendJson(tmp)):
+            storage.guardar_mundo({"ancho": ancho, "alto": alto})
+            mundo = rng_de_siembra(semilla)
+            libres = pool_de_siembra(ancho, alto)
+            seed_animales(n=8, w=ancho, h=alto, libres=libres, rng=mundo)
+            seed_items(m=10, w=ancho, h=alto, libres=libres, rng=mundo)
+            seed_trampas(w=ancho, h=alto, libres=libres, rng=mundo)
+            engine = GameEngine(Jugador(nombre="Sim", posicion=(0, 0)), remaining_time=PARTIDA_S, semilla=semilla)
+            ms = jugar_partida(engine, politica, rng)
+            engine.close()
+            return {
+                "puntuacion": engine.jugador.puntuacion,
+                "motivo": engine.motivo_game_over or "sin terminar",
+                "rescates": engine.rescates,
+                "vidas": engine.jugador.vidas,
+                "segundos": ms / 1000,
+            }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Lote + reporte
+# ──────────────────────────────────────────────────────────────────────────────
+def ejecutar(n: int, politica: str = "random", workers: int = 1, semilla: int = 0,
+             ancho: int = MAP_W, alto: int = MAP_H) -> Tuple[List[Dict], float]:
+    if politica not in _POLITICAS:
+        raise ValueError(f"Política desconocida: {politica} (opciones: {', '.join(POLITICAS)})")
+    tareas = [(i, politica, semilla + i, ancho, alto) for i in range(n)]
+    t0 = time.perf_counter()
+    if workers <= 1:
+        resultados = [simular_partida(t) for t in tareas]
+    else:
+        chunk = max(1, n // (workers * 8))
+        with multiprocessing.get_context().Pool(workers) as pool:
+            resultados = list(pool.imap_unordered(simular_partida, tareas, chunksize=chunk))
+    return resultados, time.perf_counter() - t0
+
+
+def _percentil(valores: List[int], q: float) -> float:
+    orden = sorted(valores)
+    k = (len(orden) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(orden) - 1)
+    return orden[lo] + (orden[hi] - orden[lo]) * (k - lo)
+
+
+def reporte(resultados: List[Dict], segundos: float, politica: str, workers: int) -> str:
+    n = len(resultados)
+    if not n:
+        return "Sin partidas."
+    puntos = [r["puntuacion"] for r in resultados]
+    rescates = [r["rescates"] for r in resultados]
+    lineas = [
+        f"Partidas: {n} | política: {politica} | workers: {workers}",
+        f"Tiempo: {segundos:.2f} s  ({n / segundos:.1f} partidas/s)" if segundos > 0 else "Tiempo: 0 s",
+        "Puntuación: min {} | p25 {:.0f} | mediana {:.0f} | p75 {:.0f} | max {} | media {:.1f}".format(
+            min(puntos), _percentil(puntos, .25), _percentil(puntos, .5), _percentil(puntos, .75),
+            max(puntos), statistics.fmean(puntos)),
+        f"Rescates: total {sum(rescates)} | media {statistics.fmean(rescates):.2f} | max {max(rescates)}",
+        "Distribución de puntuación:",
+    ]
+    ancho_balde = max(10, (max(puntos) // 10 + 9) // 10 * 10)
+    baldes = Counter(p // ancho_balde * ancho_balde for p in puntos)
+    for base in sorted(baldes):
+        cant = baldes[base]
+        lineas.append(f"  {base:>5}-{base + ancho_balde - 1:<5} {cant:>6}  {'█' * max(1, cant * 40 // n)}")
+    lineas.append("Motivos de game over:")
+    for motivo, cant in Counter(r["motivo"] for r in resultados).most_common():
+        lineas.append(f"  {cant:>6} ({cant * 100 / n:5.1f}%)  {motivo}")
+    return "\n".join(lineas)
@@ -0,0 +1,257 @@
+"""
+Snapshot binario del estado completo de un `GameEngine`.
+
+Formato (little-endian, versión 1):
+  cabecera   magia "PTSN", versión, banderas, ancho, alto
+  motor      tiempo, rescates, máx. muertos, respawn, monstruo y ocupantes del pool, motivo
+  jugador    nombre, posición, puntos, vidas, ticks de invulnerabilidad/veneno, escudos
+  conteos    textos, animales, items, trampas, celdas libres
+  textos     largos (uint32[]) + UTF-8 concatenado; todo nombre/tipo es un índice acá
+  columnas   una `array` por campo de cada colección (posiciones empaquetadas y*ancho+x)
+  decor      bitmaps de sendero, árboles y flores (1 bit por celda)
+  pool       orden de las celdas libres (el muestreo sigue igual tras restaurar)
+  rng        estado de `engine.rng`
+
+Todo es `struct` + `array.tobytes/frombytes`: costo lineal en entidades y
+celdas, sin JSON ni objetos intermedios.
+"""
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from classes.gato import Gato
+from classes.item import Item
+from classes.perro import Perro
+from classes.trap import Trap
+from game.almacen import TIPOS_ITEM, TIPOS_TRAMPA, Internado
+from game.grid import MapaBits
+
+MAGIA = b"PTSN"
+VERSION = 1
+NADA = 0xFFFFFFFF          # posición / texto ausente
+
+_CABECERA = struct.Struct("<4sHBxII")        # magia, versión, banderas, ancho, alto
+_MOTOR = struct.Struct("<iIIdIIII")          # tiempo, rescates, máx. muertos, respawn, monstruo, ocupa_j, ocupa_m, motivo
+_JUGADOR = struct.Struct("<IIiiiiiI")        # nombre, pos, puntos, vidas, invulnerable, veneno, escudos, n_inventario
+_CONTEOS = struct.Struct("<IIIII")           # textos, animales, items, trampas, libres
+_GAUSS = struct.Struct("<?d")
+
+_GAME_OVER, _MONSTRUO, _PRIMER_MOV, _RESPAWN = 1, 2, 4, 8
+
+# (campo, typecode) por colección, en el orden en que se escriben
+_COLS_ANIMAL = (("nombre", "I"), ("especie", "I"), ("energia", "i"), ("nivel", "B"), ("pos", "I"), ("rescatado", "B"))
+_COLS_ITEM = (("nombre", "I"), ("tipo", "I"), ("poder", "i"), ("pos", "I"))
+_COLS_TRAMPA = (("nombre", "I"), ("tipo", "I"), ("dano", "i"), ("pos", "I"), ("banderas", "B"),
+                ("dx", "i"), ("dy", "i"))
+
+_SWAP = sys.byteorder == "big"
+
+
+def _bytes(a: array) -> bytes:
+    if _SWAP:
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+class _Textos:
+    """Tabla de textos internados: cada nombre/tipo distinto se guarda una vez."""
+
+    def __init__(self):
+        self.indice: Dict[str, int] = {}
+        self.lista: List[str] = []
+
+    def __call__(self, s: Optional[str]) -> int:
+        if s is None:
+            return NADA
+        i = self.indice.get(s)
+        if i is None:
+            i = self.indice[s] = len(self.lista)
+            self.lista.append(s)
+        return i
+
+
+def _recodificar(codigos: array, tabla: Internado, txt: _Textos) -> array:
+    mapa = [txt(s) for s in tabla.textos]
+    return array("I", [mapa[c] for c in codigos])
+
+
+def volcar(eng) -> bytes:
+    w = eng.map_w
+    txt = _Textos()
+
+    def pack(p: Optional[Tuple[int, int]]) -> int:
+        return NADA if p is None else p[1] * w + p[0]
+
+    j = eng.jugador
+    banderas = ((_GAME_OVER if eng.game_over else 0) | (_MONSTRUO if eng.monster_active else 0)
+                | (_PRIMER_MOV if eng.first_move_done else 0)
+                | (_RESPAWN if eng._pet_respawn_delay is not None else 0))
+    motor = _MOTOR.pack(eng.remaining_time, eng.rescates, eng.max_animales_muertos,
+                        eng._pet_respawn_delay or 0.0, pack(eng.monster_pos),
+                        pack(eng._ocupa_jugador), pack(eng._ocupa_monstruo), txt(eng.motivo_game_over))
+    jugador = _JUGADOR.pack(txt(j.nombre), pack(j.posicion), j.puntuacion, j.vidas,
+                            j.invulnerable_ticks, j.poison_ticks, j.escudos, len(j.inventario))
+    inventario = array("I", [txt(n) for n in j.inventario])
+
+    an = eng.repo.animales
+    cols_a = (array("I", [txt(a.nombre) for a in an]), array("I", [txt(a.especie) for a in an]),
+              array("i", [a.energia for a in an]), array("B", [a.nivel for a in an]),
+              array("I", [a.posicion[1] * w + a.posicion[0] for a in an]),
+              array("B", [a.rescatado for a in an]))
+    # Items y trampas: columna a columna desde el almacén (códigos re-mapeados a esta tabla)
+    it = eng.items
+    cols_i = (_recodificar(it.nombre, it.nombres, txt), _recodificar(it.tipo, TIPOS_ITEM, txt),
+              it.poder, array("I", [y * w + x for x, y in zip(it.x, it.y)]))
+    tr = eng.trampas
+    cols_t = (_recodificar(tr.nombre, tr.nombres, txt), _recodificar(tr.tipo, TIPOS_TRAMPA, txt),
+              tr.dano, array("I", [y * w + x for x, y in zip(tr.x, tr.y)]), tr.estado,
+              array("i", tr.dx), array("i", tr.dy))
+
+    codificados = [s.encode("utf-8") for s in txt.lista]
+    eng._sync_moviles()                     # el pool guardado refleja las trampas móviles actuales
+    libres = eng._libres.orden
+    version_rng, estado_rng, gauss = eng.rng.getstate()
+    partes = [
+        _CABECERA.pack(MAGIA, VERSION, banderas, w, eng.map_h), motor, jugador,
+        _CONTEOS.pack(len(codificados), len(an), len(it), len(tr), len(libres)),
+        _bytes(array("I", [len(b) for b in codificados])), b"".join(codificados),
+        _bytes(inventario),
+        *(_bytes(c) for c in cols_a + cols_i + cols_t),
+        eng.path_cells.a_bytes(), eng.tree_cells.a_bytes(), eng.flower_cells.a_bytes(),
+        _bytes(array("i", libres)),
+        _bytes(array("I", estado_rng)), _GAUSS.pack(gauss is not None, gauss or 0.0),
+    ]
+    return b"".join(partes)
+
+
+class _Lector:
+    def __init__(self, datos: bytes):
+        self.datos = memoryview(datos)
+        self.i = 0
+
+    def struct(self, s: struct.Struct) -> tuple:
+        try:
+            v = s.unpack_from(self.datos, self.i)
+        except struct.error:
+            raise ValueError("Snapshot truncado") from None
+        self.i += s.size
+        return v
+
+    def bytes(self, n: int) -> memoryview:
+        if self.i + n > len(self.datos):
+            raise ValueError("Snapshot truncado")
+        v = self.datos[self.i:self.i + n]
+        self.i += n
+        return v
+
+    def array(self, tc: str, n: int) -> array:
+        a = array(tc)
+        a.frombytes(self.bytes(n * a.itemsize))
+        if _SWAP:
+            a.byteswap()
+        return a
+
+
+def _chequear(valores, tope: int, que: str, opcional: bool = False) -> None:
+    """ValueError si algún índice (texto o celda empaquetada) cae fuera de `0..tope-1`."""
+    for v in valores:
+        if v >= tope and not (opcional and v == NADA):
+            raise ValueError(f"Snapshot corrupto: {que} fuera de rango ({v})")
+
+
+def cargar(eng, datos: bytes) -> None:
+    """
+    Reemplaza el estado de `eng` por el del snapshot. El formato (rangos de
+    textos, celdas y pool) se valida antes de tocar nada; si igual falla al
+    armar el estado, el motor vuelve al que tenía.
+    """
+    from game.engine import validar_dimensiones
+    lec = _Lector(datos)
+    magia, version, banderas, w, h = lec.struct(_CABECERA)
+    if magia != MAGIA:
+        raise ValueError("No es un snapshot de Patitas")
+    if version != VERSION:
+        raise ValueError(f"Versión de snapshot no soportada: {version}")
+    validar_dimensiones(w, h)
+    tiempo, rescates, max_muertos, respawn, monstruo, ocupa_j, ocupa_m, motivo = lec.struct(_MOTOR)
+    j_nombre, j_pos, puntos, vidas, invul, veneno, escudos, n_inv = lec.struct(_JUGADOR)
+    n_txt, n_an, n_it, n_tr, n_libres = lec.struct(_CONTEOS)
+    largos = lec.array("I", n_txt)
+    blob = bytes(lec.bytes(sum(largos)))
+    textos: List[str] = []
+    k = 0
+    for n in largos:
+        textos.append(blob[k:k + n].decode("utf-8"))
+        k += n
+    cod_inventario = lec.array("I", n_inv)
+    cols_a = [lec.array(tc, n_an) for _, tc in _COLS_ANIMAL]
+    cols_i = [lec.array(tc, n_it) for _, tc in _COLS_ITEM]
+    cols_t = [lec.array(tc, n_tr) for _, tc in _COLS_TRAMPA]
+    nbits = (w * h + 7) // 8
+    sendero, arboles, flores = (MapaBits.desde_bytes(w, h, lec.bytes(nbits)) for _ in range(3))
+    libres = lec.array("i", n_libres)
+    estado_rng = lec.array("I", 625)
+    hay_gauss, gauss = lec.struct(_GAUSS)
+    if lec.i != len(lec.datos):
+        raise ValueError("Snapshot con datos sobrantes")
+
+    celdas = w * h
+    _chequear((j_nombre, *cod_inventario, *cols_a[0], *cols_a[1], *cols_i[0], *cols_i[1],
+               *cols_t[0], *cols_t[1]), n_txt, "texto")
+    _chequear((motivo,), n_txt, "texto", opcional=True)
+    _chequear((j_pos, *cols_a[4], *cols_i[3], *cols_t[3]), celdas, "celda")
+    _chequear((monstruo, ocupa_j, ocupa_m), celdas, "celda", opcional=True)
+    if any(not 0 <= c < celdas for c in libres) or len(set(libres)) != len(libres):
+        raise ValueError("Snapshot corrupto: pool de celdas libres inválido")
+    inventario = [textos[i] for i in cod_inventario]
+
+    def unpack(c: int) -> Optional[Tuple[int, int]]:
+        return None if c == NADA else (c % w, c // w)
+
+    animales = []
+    for nombre, especie, energia, nivel, pos, rescatado in zip(*cols_a):
+        cls = Perro if textos[especie] == "perro" else Gato
+        a = cls(nombre=textos[nombre], especie=textos[especie], energia=energia,
+                posicion=(pos % w, pos // w), rescatado=bool(rescatado))
+        a.nivel = nivel
+        animales.append(a)
+    items = [Item(nombre=textos[n], tipo=textos[t], poder=p, posicion=(c % w, c // w))
+             for n, t, p, c in zip(*cols_i)]
+    trampas = [Trap(nombre=textos[n], tipo=textos[t], daño=d, posicion=(c % w, c // w),
+                    visible=bool(b & 1), activo=bool(b & 2), dx=dx, dy=dy)
+               for n, t, d, c, b, dx, dy in zip(*cols_t)]
+
+    # --- a partir de acá se modifica el motor ---
+    # Que el pool guardado coincida con las celdas libres solo se sabe al rearmarlo:
+    # si no coincide se vuelve al estado previo, así nunca queda a medio restaurar.
+    respaldo = volcar(eng)
+    try:
+        eng.map_w, eng.map_h = w, h
+        eng._montar(animales, items, trampas)
+        eng.path_cells, eng.tree_cells, eng.flower_cells = sendero, arboles, flores
+        for pos in arboles:
+            eng._libres.ocupar(pos)
+        eng._ocupa_jugador, eng._ocupa_monstruo = unpack(ocupa_j), unpack(ocupa_m)
+        for pos in (eng._ocupa_jugador, eng._ocupa_monstruo):
+            if pos is not None:
+                eng._libres.ocupar(pos)
+        eng._libres.reordenar(libres)
+    except ValueError:
+        cargar(eng, respaldo)
+        raise
+
+    j = eng.jugador
+    j.nombre, j.posicion, j.inventario = textos[j_nombre], unpack(j_pos), inventario
+    j._Jugador__puntuacion, j._Jugador__vidas = puntos, vidas
+    j.invulnerable_ticks, j.poison_ticks, j.escudos = invul, veneno, escudos
+
+    eng.remaining_time, eng.rescates, eng.max_animales_muertos = tiempo, rescates, max_muertos
+    eng.game_over = bool(banderas & _GAME_OVER)
+    eng.motivo_game_over = None if motivo == NADA else textos[motivo]
+    eng.monster_active = bool(banderas & _MONSTRUO)
+    eng.monster_pos = unpack(monstruo)
+    eng.first_move_done = bool(banderas & _PRIMER_MOV)
+    eng._pet_respawn_delay = respawn if banderas & _RESPAWN else None
+    eng.rng.setstate((3, tuple(estado_rng), gauss if hay_gauss else None))
@@ -0,0 +1,112 @@
+"""
+Animación por grupos de tags con tablas de onda precalculadas.
+
+Cada grupo (un tag de canvas) recibe una sola transformación por cuadro:
+`canvas.move(tag, …)` con la diferencia entre el desfase deseado y el ya
+aplicado, así el costo depende de la cantidad de grupos y no de ítems, y
+solo se toca el canvas cuando el desfase entero cambia. Las ondas se leen
+de tablas (`TablaOnda`) indexadas por el tiempo de juego: si se saltean
+cuadros, la animación simplemente cae en la fase correcta.
+
+`deslizar()` interpola el desfase de una entidad hasta cero (ease-out):
+la escena ya movió la entidad a su celda nueva y el tween la hace llegar
+desde la anterior.
+"""
+import math
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+Fijador = Callable[[str, int, int], None]
+
+
+class TablaOnda:
+    """`n` muestras enteras de `forma(θ)` en un período (θ en [0, 2π))."""
+    __slots__ = ("valores",)
+
+    def __init__(self, forma: Callable[[float], int], n: int = 32):
+        self.valores: Tuple[int, ...] = tuple(int(forma(2 * math.pi * i / n)) for i in range(n))
+
+    def en(self, fase: float) -> int:
+        """Valor para `fase` en períodos (cualquier real; se toma la parte fraccionaria)."""
+        v = self.valores
+        return v[int(fase * len(v)) % len(v)]
+
+
+@lru_cache(maxsize=None)
+def onda_seno(amplitud: int, n: int = 32) -> TablaOnda:
+    return TablaOnda(lambda t: round(amplitud * math.sin(t)), n)
+
+
+class _Onda:
+    __slots__ = ("tag", "tabla", "periodo", "fase", "eje_x", "fijar")
+
+    def __init__(self, tag, tabla, periodo, fase, eje_x, fijar):
+        self.tag, self.tabla, self.periodo = tag, tabla, periodo
+        self.fase, self.eje_x, self.fijar = fase, eje_x, fijar
+
+
+class _Tween:
+    __slots__ = ("dx", "dy", "inicio", "duracion")
+
+    def __init__(self, dx: int, dy: int, inicio: float, duracion: float):
+        self.dx, self.dy, self.inicio, self.duracion = dx, dy, inicio, duracion
+
+
+class Animador:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._ondas: List[_Onda] = []
+        self._tweens: Dict[str, _Tween] = {}
+        self._desfases: Dict[str, Tuple[int, int]] = {}
+        self.ahora_ms = 0.0
+        self.movimientos = 0              # llamadas a canvas.move (para métricas y tests)
+
+    # ---------- desfases absolutos ----------
+    def fijar_desfase(self, tag: str, dx: int, dy: int) -> None:
+        vx, vy = self._desfases.get(tag, (0, 0))
+        if (dx, dy) != (vx, vy):
+            self.canvas.move(tag, dx - vx, dy - vy)
+            self._desfases[tag] = (dx, dy)
+            self.movimientos += 1
+
+    # ---------- registro ----------
+    def onda(self, tag: str, tabla: TablaOnda, periodo_ms: float, eje: str = "y",
+             fase: float = 0.0, fijar: Optional[Fijador] = None) -> None:
+        """Oscila el grupo `tag`; `fijar(tag, dx, dy)` aplica el desfase (por defecto, el del animador)."""
+        self._ondas.append(_Onda(tag, tabla, periodo_ms, fase, eje == "x", fijar or self.fijar_desfase))
+
+    def deslizar(self, tag: str, dx: int, dy: int, duracion_ms: float) -> None:
+        """Corre el grupo a (dx, dy) y lo trae de vuelta a (0, 0) en `duracion_ms`."""
+        previo = self._tweens.get(tag)
+        if previo is not None:                 # encadena con lo que faltaba recorrer
+            vx, vy = self._desfases.get(tag, (0, 0))
+            dx, dy = dx + vx, dy + vy
+        self._tweens[tag] = _Tween(dx, dy, self.ahora_ms, duracion_ms)
+        self.fijar_desfase(tag, dx, dy)
+
+    def en_movimiento(self, tag: str) -> bool:
+        return tag in self._tweens
+
+    # ---------- cuadro ----------
+    def avanzar(self, ahora_ms: float) -> None:
+        """Aplica ondas y tweens para el instante `ahora_ms` (tiempo de juego)."""
+        self.ahora_ms = ahora_ms
+        for o in self._ondas:
+            v = o.tabla.en(ahora_ms / o.periodo + o.fase)
+            if o.eje_x:
+                o.fijar(o.tag, v, 0)
+            else:
+                o.fijar(o.tag, 0, v)
+        if self._tweens:
+            terminados = []
+            for tag, tw in self._tweens.items():
+                p = (ahora_ms - tw.inicio) / tw.duracion if tw.duracion > 0 else 1.0
+                if p >= 1.0:
+                    self.fijar_desfase(tag, 0, 0)
+                    terminados.append(tag)
+                    continue
+                resto = (1.0 - p) ** 2             # ease-out
+                self.fijar_desfase(tag, round(tw.dx * resto), round(tw.dy * resto))
+            for tag in terminados:
+                del self._tweens[tag]
+                self._desfases.pop(tag, None)
@@ -1,12 +1,33 @@
 import math
 import random
 import tkinter as tk
-from pathlib import Path
+from typing import Tuple
 from tkinter import ttk, messagebox
-from game.engine import GameEngine, MAP_W, MAP_H
+from data.metricas import medido
+from gui.animacion import Animador, TablaOnda, onda_seno
+from gui.assets import Recursos
+from game.engine import GameEngine
+from game.eventos import (FinDelJuego, InventarioCambio, MascotasActivasCambio, PuntajeCambio,
+                          TiempoCambio, VidasCambio)
+from gui.escena import Escena
+from gui.raster import FondoRaster, Lienzo
+from gui.scheduler import Planificador
 from classes.jugador import Jugador
 
 CELL = 56
+VIEW_CELLS = 12  # tamaño máximo visible del tablero; mapas más grandes hacen scroll
+FRAME_MS = 16           # paso fijo del planificador (~60 cuadros/s)
+MAX_DECOR_ANIMADA = 12  # flores que quedan como ítems vivos; el resto va horneado al fondo
+PERIODO_REBOTE_MS = 3000   # latido de mascotas/jugador y vaivén de flores
+PERIODO_TRONCOS_MS = 4200  # ondulación del borde del inventario
+GRUPOS_TRONCOS = 4         # troncos agrupados por fase (el grupo 0 queda quieto)
+DESLIZ_JUGADOR_MS = 120    # tween del jugador entre celdas
+DESLIZ_MONSTRUO_MS = 300
+
+# Tablas de onda (desfase vertical en píxeles por fase)
+ONDA_REBOTE = TablaOnda(lambda t: -int(1 + math.sin(t)))
+ONDA_REBOTE_MONSTRUO = TablaOnda(lambda t: -max(1, int(1 + math.sin(t)) // 2))
+ONDA_FLOR = TablaOnda(lambda t: round(math.cos(t)))
 
 # Paleta pastel
 COL_BG   = "#FFF6E9"  # crema
@@ -31,6 +52,32 @@ HUD_FONT   = ("Helvetica", 14)
 UI_FONT    = ("Helvetica", 12, "bold")
 INV_FONT   = ("Helvetica", 12)  # mismo “family” que el título
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Figuras de reemplazo (sin sprites): se hornean una vez por tamaño de celda
+# ──────────────────────────────────────────────────────────────────────────────
+def pintar_huella(cell: int) -> Lienzo:
+    """Fallback minimalista en caso de que falten sprites (se hornea una vez)."""
+    lz = Lienzo(cell, cell, None)
+    c = cell // 2
+    base_r, toe_r = 10, 6
+    for dx, dy in [(-8, -10), (0, -12), (8, -10)]:
+        lz.ovalo(c+dx-toe_r, c+dy-toe_r, c+dx+toe_r, c+dy+toe_r, COL_PAW)
+    lz.ovalo(c-base_r, c-base_r, c+base_r, c+base_r, COL_PAW_ACCENT)
+    return lz
+
+def pintar_jugador(cell: int) -> Lienzo:
+    """Figura del jugador sin sprite: cabeza, cuerpo y piernas (sobresale 10 px de la celda)."""
+    lz = Lienzo(cell, cell + 10, None)
+    c = cell // 2
+    head_r, body_w, body_h = 12, cell//3, cell//2
+    lz.ovalo(c-head_r, 10, c+head_r, 10+head_r*2, "#5B5F97")
+    lz.rect(c-body_w//2, 20, c+body_w//2, 20+body_h, "#F45D5D")
+    leg_y = 20 + body_h
+    lz.rect(c-body_w//2, leg_y, c-body_w//2+6, leg_y+18, "#5B5F97")
+    lz.rect(c+body_w//2-6, leg_y, c+body_w//2, leg_y+18, "#5B5F97")
+    return lz
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Inventario custom (canvas con borde de troncos animados)
 # ──────────────────────────────────────────────────────────────────────────────
@@ -41,13 +88,28 @@ class InventoryWidget(tk.Canvas):
         self.items: list[str] = []
         self.trunk_ids: list[int] = []
         self.text_ids: list[int] = []
-        self._phase = 0.0
+        self.anim = Animador(self)
+        for k in range(1, GRUPOS_TRONCOS):
+            self.anim.onda(f"trunk{k}", onda_seno(1), PERIODO_TRONCOS_MS, fase=k / GRUPOS_TRONCOS)
         self._draw_frame()
         self._draw_items()
 
     def set_items(self, items: list[str]):
-        self.items = list(items)
-        self._draw_items()
+        """Actualiza solo las filas que cambiaron (itemconfig), agrega o borra las sobrantes."""
+        nuevos = list(items)
+        x0, y0 = 20, 24
+        for i, name in enumerate(nuevos[:len(self.items)]):
+            if name != self.items[i]:
+                self.itemconfig(self.text_ids[i], text=f"• {name}")
+        for i in range(len(self.items), len(nuevos)):
+            self.text_ids.append(
+                self.create_text(x0, y0 + i*22, anchor="nw", text=f"• {nuevos[i]}",
+                                 font=INV_FONT, fill="#5C4033", tags=("invtext",))
+            )
+        for tid in self.text_ids[len(nuevos):]:
+            self.delete(tid)
+        del self.text_ids[len(nuevos):]
+        self.items = nuevos
 
     def _draw_frame(self):
         self.delete("frame")
@@ -59,12 +121,17 @@ class InventoryWidget(tk.Canvas):
         seg = 24
         # superior e inferior
         for x in range(12, w-12, seg):
-            self.trunk_ids.append(self.create_rectangle(x, 4, x+18, 14, fill=COL_TRUNK, outline="", tags=("frame","trunk")))
-            self.trunk_ids.append(self.create_rectangle(x, h-14, x+18, h-4, fill=COL_TRUNK, outline="", tags=("frame","trunk")))
+            self._tronco(x, 4, x+18, 14)
+            self._tronco(x, h-14, x+18, h-4)
         # laterales
         for y in range(20, h-20, seg):
-            self.trunk_ids.append(self.create_rectangle(4, y, 14, y+18, fill=COL_TRUNK, outline="", tags=("frame","trunk")))
-            self.trunk_ids.append(self.create_rectangle(w-14, y, w-4, y+18, fill=COL_TRUNK, outline="", tags=("frame","trunk")))
+            self._tronco(4, y, 14, y+18)
+            self._tronco(w-14, y, w-4, y+18)
+
+    def _tronco(self, x0, y0, x1, y1):
+        grupo = f"trunk{len(self.trunk_ids) % GRUPOS_TRONCOS}"
+        self.trunk_ids.append(self.create_rectangle(x0, y0, x1, y1, fill=COL_TRUNK, outline="",
+                                                    tags=("frame", "trunk", grupo)))
 
     def _draw_items(self):
         for tid in self.find_withtag("invtext"): self.delete(tid)
@@ -76,34 +143,26 @@ class InventoryWidget(tk.Canvas):
                                  font=INV_FONT, fill="#5C4033", tags=("invtext",))
             )
 
-    def animate(self):
-        self._phase += 0.18
-        for i, rid in enumerate(self.trunk_ids):
-            dy = int(1 * math.sin(self._phase + i * 0.6))
-            self.move(rid, 0, dy)
-            if i % 4 == 0:
-                self.move(rid, 0, -dy)
+    def animate(self, ahora_ms: float):
+        """Ondulación de los troncos: un `move` por grupo de fase, no por tronco."""
+        self.anim.avanzar(ahora_ms)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # App principal
 # ──────────────────────────────────────────────────────────────────────────────
 class App(tk.Tk):
-    def __init__(self, jugador: Jugador):
+    def __init__(self, jugador: Jugador, grabador=None):
         super().__init__()
         self.title("Patitas en Aventura 🐾")
         self.configure(bg=COL_BG)
         self.resizable(False, False)
-        self.engine = GameEngine(jugador, remaining_time=65)  # 1:05
+        self.engine = GameEngine(jugador, remaining_time=65, grabador=grabador)  # 1:05
+        self.metricas = self.engine.metricas
 
-        # Animación (fase global)
-        self._anim_phase = 0.0
-        self._monster_spawn_job: int | None = None
-        self._monster_move_job: int | None = None
         self._monster_timer_started = False
 
-        # Cargar sprites de animales (PNG con fondo transparente)
-        self._load_animal_images()
-        self._load_player_assets()
+        # Sprites: se cargan y escalan a CELL la primera vez que se dibujan
+        self.recursos = Recursos(self, CELL)
         # asignación de sprite por nombre (para que no cambie al redibujar)
         self._sprite_idx: dict[str, int] = {}
 
@@ -120,7 +179,9 @@ class App(tk.Tk):
             w.pack(side="left", padx=6)
 
         # --------- TABLERO ----------
-        self.canvas = tk.Canvas(self, width=MAP_W*CELL, height=MAP_H*CELL, bg=COL_BG, highlightthickness=0)
+        mw, mh = self.engine.map_w, self.engine.map_h
+        self.canvas = tk.Canvas(self, width=min(mw, VIEW_CELLS)*CELL, height=min(mh, VIEW_CELLS)*CELL,
+                                bg=COL_BG, highlightthickness=0, scrollregion=(0, 0, mw*CELL, mh*CELL))
         self.canvas.grid(row=1, column=0, padx=16, pady=12)
 
         # --------- Lateral ----------
@@ -149,7 +210,13 @@ class App(tk.Tk):
         # Decor (sendero + árboles + flores)
         self._build_decor()
 
-        # Dibujo inicial
+        # Dibujo inicial (las entidades viven en una escena retenida)
+        self.escena = Escena(self.canvas, CELL)
+        self.anim = Animador(self.canvas)
+        self.anim.onda("anim_flower", ONDA_FLOR, PERIODO_REBOTE_MS)
+        for tag, onda in (("anim_animal", ONDA_REBOTE), ("anim_player", ONDA_REBOTE),
+                          ("anim_monster", ONDA_REBOTE_MONSTRUO)):
+            self.anim.onda(tag, onda, PERIODO_REBOTE_MS, fijar=self.escena.fijar_desfase)
         self._draw_grid()
         self._draw_world()
 
@@ -159,97 +226,42 @@ class App(tk.Tk):
         self.bind("<Left>",  lambda e: self._move(-1,0))
         self.bind("<Right>", lambda e: self._move(1,0))
 
-        # Loops
-        self.after(200, self._refresh_sidebar)
-        self._schedule_tick()
-        self._schedule_anim()
-
-    # ---------- Carga de imágenes ----------
-    def _load_animal_images(self):
-        """Carga PNGs desde assets/animals. Sin PIL, tamaños nativos."""
-        self.sprites = {"gato": [], "perro": []}
-        root = Path(__file__).resolve().parents[1]
-        asset_dir = root / "assets" / "animals"
-        patterns = {
-            "gato": ["cat_orange.png", "cat_gray.png"],
-            "perro": ["dog_brown.png", "dog_gold.png"],
-        }
-        for especie, files in patterns.items():
-            for fn in files:
-                p = asset_dir / fn
-                if p.exists():
-                    try:
-                        img = tk.PhotoImage(file=str(p))
-                        self.sprites[especie].append(img)
-                    except Exception as e:
-                        print(f"[WARN] No se pudo cargar {p}: {e}")
-        # Si no hay imágenes, luego usaremos fallback vectorial.
-
-    def _load_player_assets(self):
-        """Carga sprites opcionales del jugador/monstruo."""
-        self.player_sprite = None
-        self.monster_sprite = None
-        root = Path(__file__).resolve().parents[1]
-        player_dir = root / "assets" / "player"
-        if not player_dir.exists():
-            return
-        player_png = player_dir / "player.png"
-        monster_png = player_dir / "monster.png"
-        try:
-            if player_png.exists():
-                self.player_sprite = tk.PhotoImage(file=str(player_png))
-        except Exception as exc:
-            print(f"[WARN] No se pudo cargar {player_png}: {exc}")
-            self.player_sprite = None
-        try:
-            if monster_png.exists():
-                self.monster_sprite = tk.PhotoImage(file=str(monster_png))
-        except Exception as exc:
-            print(f"[WARN] No se pudo cargar {monster_png}: {exc}")
-            self.monster_sprite = None
-
+        # Cierre: vuelca a disco los cambios pendientes del motor
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Bucle único: simulación a paso fijo + a lo sumo un redibujo por cuadro
+        self.frames = Planificador(self, paso_ms=FRAME_MS)
+        self.frames.al_dibujar(self._render)
+        self.frames.al_cuadro(self._animate)
+        self.frames.cada("tick", 1000, self._tick_gui)
+        self.frames.iniciar()
+
+        # HUD por eventos del motor: cada widget se actualiza solo cuando cambia lo suyo
+        ev = self.engine.eventos
+        ev.suscribir(PuntajeCambio, lambda e: self.lbl_pts.config(text=f"🟡 {e.puntos}"))
+        ev.suscribir(VidasCambio, lambda e: self.lbl_life.config(text=f"❤️ Vidas: {e.vidas}"))
+        ev.suscribir(MascotasActivasCambio, lambda e: self.lbl_resc.config(text=f"🐾 Por rescatar: {e.activas}"))
+        ev.suscribir(InventarioCambio, lambda e: self.inv_box.set_items(e.inventario))
+        ev.suscribir(TiempoCambio, self._on_tiempo)
+        ev.suscribir(FinDelJuego, lambda e: self.frames.invalidar())
+        self.engine.publicar_estado()
+
+    # ---------- Imágenes ----------
     def _sprite_for(self, nombre: str, especie: str):
         """Retorna la PhotoImage asignada a este animal, o None si no hay."""
-        if not self.sprites.get(especie):
+        variantes = self.recursos.variantes(especie)
+        if not variantes:
             return None
         if nombre not in self._sprite_idx:
-            self._sprite_idx[nombre] = random.randrange(len(self.sprites[especie]))
-        return self.sprites[especie][self._sprite_idx[nombre]]
-
-    def _draw_paw_placeholder(self, cx:int, cy:int):
-        """Fallback minimalista en caso de que falten sprites."""
-        base_r = 10
-        toe_r = 6
-        offsets = [(-8, -10), (0, -12), (8, -10), (0, 0)]
-        for dx, dy in offsets[:-1]:
-            self.canvas.create_oval(
-                cx + dx - toe_r, cy + dy - toe_r,
-                cx + dx + toe_r, cy + dy + toe_r,
-                fill=COL_PAW, outline="", tags=("obj","anim_animal")
-            )
-        dx, dy = offsets[-1]
-        self.canvas.create_oval(
-            cx + dx - base_r, cy + dy - base_r,
-            cx + dx + base_r, cy + dy + base_r,
-            fill=COL_PAW_ACCENT, outline="", tags=("obj","anim_animal")
-        )
+            self._sprite_idx[nombre] = random.randrange(len(variantes))
+        return variantes[self._sprite_idx[nombre] % len(variantes)]
 
     # ---------- Decor helpers ----------
     def _build_decor(self):
-        """Usa el layout calculado por el engine para mantener coherencia."""
-        if self.engine.path_cells:
-            self.path_cells = set(self.engine.path_cells)
-        else:
-            cx = MAP_W // 2
-            self.path_cells = {(cx, y) for y in range(MAP_H)}
-        if self.engine.tree_cells:
-            self.tree_cells = set(self.engine.tree_cells)
-        else:
-            self.tree_cells = set()
-        if self.engine.flower_cells:
-            self.flower_cells = set(self.engine.flower_cells)
-        else:
-            self.flower_cells = set()
+        """Usa el layout calculado por el engine (bitmaps, sin copiarlos)."""
+        self.path_cells = self.engine.path_cells
+        self.tree_cells = self.engine.tree_cells
+        self.flower_cells = self.engine.flower_cells
 
     # ---------- Mostrar/Ocultar CRUD ----------
     def _toggle_crud(self):
@@ -258,23 +270,15 @@ class App(tk.Tk):
 
     # ---------- Grid y Mundo ----------
     def _draw_grid(self):
+        """Tablero estático horneado en trozos de imagen; solo unas pocas flores quedan vivas."""
         self.canvas.delete("grid")
-        for x in range(MAP_W):
-            for y in range(MAP_H):
-                fill = COL_PATH if (x,y) in self.path_cells else COL_GRID
-                self.canvas.create_rectangle(
-                    x*CELL+6, y*CELL+6, (x+1)*CELL-6, (y+1)*CELL-6,
-                    outline="#F2E8D5", fill=fill, width=2, tags=("grid",)
-                )
-        for (x,y) in self.path_cells:
-            cx, cy = x*CELL+CELL//2, y*CELL+CELL//2
-            self.canvas.create_oval(cx-5, cy-3, cx+5, cy+3, fill="#EBCB9A", outline="", tags=("grid","anim_path"))
-        for (x,y) in self.tree_cells:
-            ox, oy = x*CELL, y*CELL
-            self.canvas.create_oval(ox+10, oy+6, ox+CELL-10, oy+CELL-18, fill=COL_TREE_LIGHT, outline="", tags=("grid","anim_tree"))
-            self.canvas.create_oval(ox+14, oy+10, ox+CELL-14, oy+CELL-22, fill=COL_TREE_DARK, outline="", tags=("grid","anim_tree"))
-            self.canvas.create_rectangle(ox+CELL//2-4, oy+CELL-22, ox+CELL//2+4, oy+CELL-8, fill=COL_TRUNK, outline="", tags=("grid","anim_tree"))
-        for (x,y) in self.flower_cells:
+        mw, mh = self.engine.map_w, self.engine.map_h
+        jx, jy = self.engine.jugador.posicion
+        cerca = sorted(self.flower_cells, key=lambda c: abs(c[0]-jx) + abs(c[1]-jy))
+        self._flores_vivas = set(cerca[:MAX_DECOR_ANIMADA])
+        self.fondo = FondoRaster(self.canvas, CELL, mw, mh, self._clave_celda, self._pintar_baldosa)
+        self._asegurar_fondo()
+        for (x,y) in self._flores_vivas:
             cx, cy = x*CELL+CELL//2, y*CELL+CELL//2
             r = 8
             for ang in [0, 72, 144, 216, 288]:
@@ -284,84 +288,117 @@ class App(tk.Tk):
                 self.canvas.create_oval(px-r, py-r, px+r, py+r, fill=COL_FLOWER_PETAL, outline="", tags=("grid","anim_flower"))
             self.canvas.create_oval(cx-6, cy-6, cx+6, cy+6, fill=COL_FLOWER_CENTER, outline="", tags=("grid","anim_flower"))
 
+    def _asegurar_fondo(self):
+        """Hornea los trozos de fondo alrededor de la vista actual."""
+        x, y = self.engine.jugador.posicion
+        x0, y0 = int(x - VIEW_CELLS / 2) - 1, int(y - VIEW_CELLS / 2) - 1
+        self.fondo.asegurar(x0, y0, x0 + VIEW_CELLS + 2, y0 + VIEW_CELLS + 2)
+
+    def _clave_celda(self, x: int, y: int):
+        c = (x, y)
+        flor = c in self.flower_cells and c not in self._flores_vivas
+        return (c in self.path_cells, c in self.tree_cells, flor)
+
+    def _pintar_baldosa(self, clave) -> Lienzo:
+        """Misma celda que dibujaba el canvas (cuadro, piedritas, árbol, flor), en píxeles."""
+        sendero, arbol, flor = clave
+        lz = Lienzo(CELL, CELL, COL_BG)
+        lz.rect(6, 6, CELL-6, CELL-6, COL_PATH if sendero else COL_GRID)
+        lz.borde(5, 5, CELL-5, CELL-5, "#F2E8D5", 2)
+        c = CELL//2
+        if sendero:
+            lz.ovalo(c-5, c-3, c+5, c+3, "#EBCB9A")
+        if arbol:
+            lz.ovalo(10, 6, CELL-10, CELL-18, COL_TREE_LIGHT)
+            lz.ovalo(14, 10, CELL-14, CELL-22, COL_TREE_DARK)
+            lz.rect(c-4, CELL-22, c+4, CELL-8, COL_TRUNK)
+        if flor:
+            r = 8
+            for ang in [0, 72, 144, 216, 288]:
+                rad = math.radians(ang)
+                px = c + int(12 * math.cos(rad))
+                py = c + int(12 * math.sin(rad))
+                lz.ovalo(px-r, py-r, px+r, py+r, COL_FLOWER_PETAL)
+            lz.ovalo(c-6, c-6, c+6, c+6, COL_FLOWER_CENTER)
+        return lz
+
+    def _rect_visible(self) -> Tuple[int, int, int, int]:
+        """Celdas [x0, x1) x [y0, y1) que muestra el canvas (con una de margen para el scroll)."""
+        mw, mh = self.engine.map_w, self.engine.map_h
+        x0 = max(0, int(self.canvas.xview()[0] * mw) - 1)
+        y0 = max(0, int(self.canvas.yview()[0] * mh) - 1)
+        return x0, y0, min(mw, x0 + VIEW_CELLS + 2), min(mh, y0 + VIEW_CELLS + 2)
+
+    @medido("dibujar")
     def _draw_world(self):
-        self.canvas.delete("obj")
-        # Items
-        for it in self.engine.items:
-            x,y = it.posicion
-            self.canvas.create_oval(x*CELL+14, y*CELL+14, x*CELL+CELL-14, y*CELL+CELL-14,
-                                    fill=COL_ITEM, outline="", tags="obj")
-            ch = "🍖" if it.tipo=="comida" else ("🛡" if it.tipo=="escudo" else ("🔎" if it.tipo=="detector" else "⭐"))
-            self.canvas.create_text(x*CELL+CELL//2, y*CELL+CELL//2, text=ch, tags=("obj","anim_item"))
-
-        # Trampas
-        for t in self.engine.trampas:
-            if not t.activo: continue
-            vis = (t.tipo!="camo") or ("Detector" in self.engine.jugador.inventario)
-            if vis:
-                x,y = t.posicion
-                self.canvas.create_rectangle(x*CELL+12, y*CELL+12, x*CELL+CELL-12, y*CELL+CELL-12,
-                                             outline="", fill=COL_TRAP, tags=("obj","anim_trap"))
-                self.canvas.create_text(x*CELL+CELL//2, y*CELL+CELL//2,
-                                        text="☠" if t.tipo=="pit" else "✖", tags=("obj","anim_trap"))
-
-        # Mascotas con PNG kawaii (solo la activa)
-        for a in self.engine.animales:
-            if a.rescatado or a.is_dead():
-                continue
-            x, y = a.posicion
-            cx = x*CELL + CELL//2
-            cy = y*CELL + CELL//2
-            # sombra suave para dar profundidad
-            self.canvas.create_oval(
-                cx-14, y*CELL+CELL-14, cx+14, y*CELL+CELL-6,
-                fill=COL_SHADOW, outline="", tags=("obj","anim_shadow")
-            )
+        """
+        Sincroniza la escena retenida con el estado del engine (solo toca lo que cambió).
+        Solo recorre las celdas visibles vía los índices del engine; items y trampas se
+        identifican por fila del almacén (sin crear vistas) y lo que sale de la vista se poda.
+        """
+        eng, escena = self.engine, self.escena
+        escena.comenzar()
+        en_vista = eng.en_rect(*self._rect_visible())
+        for fila, pos, tipo in en_vista["items"]:
+            escena.sincronizar(("item", fila), pos, tipo,
+                               lambda cx, cy, tags, tipo=tipo: self._crear_item(tipo, cx, cy, tags), "anim_item")
+
+        detector = "Detector" in eng.jugador.inventario
+        for fila, pos, tipo in en_vista["trampas"]:
+            if tipo != "camo" or detector:
+                escena.sincronizar(("trampa", fila), pos, tipo,
+                                   lambda cx, cy, tags, tipo=tipo: self._crear_trampa(tipo, cx, cy, tags), "anim_trap")
+
+        # Mascotas con PNG kawaii (solo las activas)
+        for a in en_vista["animales"]:
             img = self._sprite_for(a.nombre, "gato" if a.especie == "gato" else "perro")
-            if img:
-                self.canvas.create_image(cx, cy, image=img, tags=("obj","anim_animal"), anchor="c")
-            else:
-                self._draw_paw_placeholder(cx, cy)
-
-        # Jugador
-        x,y = self.engine.jugador.posicion
-        cx, cy = x*CELL + CELL//2, y*CELL + CELL//2
-        if self.player_sprite:
-            self.canvas.create_image(cx, cy, image=self.player_sprite, tags=("obj","anim_player"), anchor="c")
-        else:
-            head_r = 12
-            body_w = CELL//3
-            body_h = CELL//2
-            # cabeza
-            self.canvas.create_oval(
-                cx-head_r, y*CELL+10, cx+head_r, y*CELL+10+head_r*2,
-                fill="#5B5F97", outline="", tags=("obj","anim_player")
-            )
-            # cuerpo
-            self.canvas.create_rectangle(
-                cx-body_w//2, y*CELL+20, cx+body_w//2, y*CELL+20+body_h,
-                fill="#F45D5D", outline="", tags=("obj","anim_player")
-            )
-            # piernas
-            leg_y = y*CELL+20+body_h
-            self.canvas.create_rectangle(
-                cx-body_w//2, leg_y, cx-body_w//2+6, leg_y+18, fill="#5B5F97", outline="", tags=("obj","anim_player")
-            )
-            self.canvas.create_rectangle(
-                cx+body_w//2-6, leg_y, cx+body_w//2, leg_y+18, fill="#5B5F97", outline="", tags=("obj","anim_player")
-            )
+            escena.sincronizar(id(a), a.posicion, (a.especie, id(img)),
+                               lambda cx, cy, tags, img=img: self._crear_mascota(img, cx, cy, tags), "anim_animal")
+
+        paso = escena.sincronizar("jugador", eng.jugador.posicion, None, self._crear_jugador, "anim_player")
+        if paso:    # llega deslizándose desde la celda anterior
+            self.anim.deslizar(escena.tag_de("jugador"), -paso[0], -paso[1], DESLIZ_JUGADOR_MS)
 
         # Monstruo perseguidor
-        if self.engine.monster_active and self.engine.monster_pos:
-            mx, my = self.engine.monster_pos
-            mcx, mcy = mx*CELL + CELL//2, my*CELL + CELL//2
-            if self.monster_sprite:
-                self.canvas.create_image(mcx, mcy, image=self.monster_sprite, tags=("obj","anim_monster"), anchor="c")
-            else:
-                self.canvas.create_oval(
-                    mcx-18, mcy-18, mcx+18, mcy+18, fill="#6D2E46", outline="", tags=("obj","anim_monster")
-                )
-                self.canvas.create_text(mcx, mcy, text="👾", tags=("obj","anim_monster"))
+        if eng.monster_active and eng.monster_pos:
+            paso = escena.sincronizar("monstruo", eng.monster_pos, None, self._crear_monstruo, "anim_monster")
+            if paso:
+                self.anim.deslizar(escena.tag_de("monstruo"), -paso[0], -paso[1], DESLIZ_MONSTRUO_MS)
+        escena.podar()
+
+    def _crear_item(self, tipo: str, cx: int, cy: int, tags):
+        self.canvas.create_oval(cx-CELL//2+14, cy-CELL//2+14, cx+CELL//2-14, cy+CELL//2-14,
+                                fill=COL_ITEM, outline="", tags=tags)
+        ch = "🍖" if tipo=="comida" else ("🛡" if tipo=="escudo" else ("🔎" if tipo=="detector" else "⭐"))
+        self.canvas.create_text(cx, cy, text=ch, tags=tags)
+
+    def _crear_trampa(self, tipo: str, cx: int, cy: int, tags):
+        self.canvas.create_rectangle(cx-CELL//2+12, cy-CELL//2+12, cx+CELL//2-12, cy+CELL//2-12,
+                                     outline="", fill=COL_TRAP, tags=tags)
+        self.canvas.create_text(cx, cy, text="☠" if tipo=="pit" else "✖", tags=tags)
+
+    def _crear_mascota(self, img, cx: int, cy: int, tags):
+        # sombra suave para dar profundidad (no rebota con la mascota)
+        self.canvas.create_oval(cx-14, cy+CELL//2-14, cx+14, cy+CELL//2-6,
+                                fill=COL_SHADOW, outline="", tags=tags[:-1] + ("anim_shadow",))
+        img = img or self.recursos.figura("huella", pintar_huella)
+        self.canvas.create_image(cx, cy, image=img, tags=tags, anchor="c")
+
+    def _crear_jugador(self, cx: int, cy: int, tags):
+        sprite = self.recursos.sprite("jugador")
+        if sprite:
+            self.canvas.create_image(cx, cy, image=sprite, tags=tags, anchor="c")
+            return
+        self.canvas.create_image(cx - CELL//2, cy - CELL//2, image=self.recursos.figura("jugador", pintar_jugador),
+                                 tags=tags, anchor="nw")
+
+    def _crear_monstruo(self, cx: int, cy: int, tags):
+        sprite = self.recursos.sprite("monstruo")
+        if sprite:
+            self.canvas.create_image(cx, cy, image=sprite, tags=tags, anchor="c")
+            return
+        self.canvas.create_oval(cx-18, cy-18, cx+18, cy+18, fill="#6D2E46", outline="", tags=tags)
+        self.canvas.create_text(cx, cy, text="👾", tags=tags)
 
     # ---------- Movimiento ----------
     def _move(self, dx:int, dy:int):
@@ -369,98 +406,78 @@ class App(tk.Tk):
         if (not self._monster_timer_started and not self.engine.game_over and
                 self.engine.first_move_done):
             self._monster_timer_started = True
-            self._monster_spawn_job = self.after(5000, self._activate_monster)
-        self._draw_world()
-        if self.engine.game_over:
-            self._handle_game_over()
+            self.frames.una_vez("spawn_monstruo", 5000, self._activate_monster)
+        self._follow_player()
+        self.frames.invalidar()
+
+    def _follow_player(self):
+        """En mapas más grandes que la vista, centra el scroll en el jugador."""
+        mw, mh = self.engine.map_w, self.engine.map_h
+        x, y = self.engine.jugador.posicion
+        if mw > VIEW_CELLS:
+            self.canvas.xview_moveto(max(0.0, (x - VIEW_CELLS / 2) / mw))
+        if mh > VIEW_CELLS:
+            self.canvas.yview_moveto(max(0.0, (y - VIEW_CELLS / 2) / mh))
+        if mw > VIEW_CELLS or mh > VIEW_CELLS:
+            self._asegurar_fondo()
 
     def _activate_monster(self):
-        self._monster_spawn_job = None
         if self.engine.game_over:
             return
         spawned = self.engine.spawn_monster()
-        self._draw_world()
+        self.frames.invalidar()
         if spawned and not self.engine.game_over:
-            self._monster_move_job = self.after(500, self._monster_step_loop)
+            self.frames.cada("monstruo", 500, self._monster_step)
 
-    def _monster_step_loop(self):
+    def _monster_step(self):
         if self.engine.game_over or not self.engine.monster_active:
+            self.frames.cancelar("monstruo")
             return
         self.engine.monster_step()
+        self.frames.invalidar()
+
+    def _render(self):
+        """Único punto de redibujo (lo llama el planificador si hubo cambios en el cuadro)."""
         self._draw_world()
         if self.engine.game_over:
             self._handle_game_over()
-            return
-        self._monster_move_job = self.after(500, self._monster_step_loop)
 
     # ---------- Sidebar/HUD ----------
-    def _refresh_sidebar(self):
-        self.lbl_pts.config(text=f"🟡 {self.engine.jugador.puntuacion}")
-        self.lbl_life.config(text=f"❤️ Vidas: {self.engine.jugador.vidas}")
-        activos = sum(1 for a in self.engine.animales if not a.rescatado and not a.is_dead())
-        self.lbl_resc.config(text=f"🐾 Por rescatar: {activos}")
-        self.inv_box.set_items(self.engine.jugador.inventario)
-        if self.engine.game_over:
-            self._handle_game_over(); return
-        self.after(300, self._refresh_sidebar)
+    def _on_tiempo(self, e: TiempoCambio):
+        mm, ss = divmod(max(0, e.restante), 60)
+        self.lbl_time.config(text=f"⏱️ {mm:02d}:{ss:02d}")
 
     def _handle_game_over(self):
         if getattr(self, "_game_over_shown", False): return
         self._game_over_shown = True
-        if self._monster_spawn_job:
-            self.after_cancel(self._monster_spawn_job)
-            self._monster_spawn_job = None
-        if self._monster_move_job:
-            self.after_cancel(self._monster_move_job)
-            self._monster_move_job = None
+        self.frames.detener()
         messagebox.showerror("Game Over", "¡Perdiste! 😢")
         self.unbind("<Up>"); self.unbind("<Down>"); self.unbind("<Left>"); self.unbind("<Right>")
 
+    def _on_close(self):
+        self.frames.detener()
+        self.engine.close()
+        self.destroy()
+
     # ---------- Tick / reloj ----------
-    def _schedule_tick(self): self.after(1000, self._tick_gui)
     def _tick_gui(self):
-        if self.engine.game_over: self._handle_game_over(); return
+        if self.engine.game_over: self.frames.invalidar(); return
         self.engine.tick(1)
-        t = max(0, self.engine.remaining_time)
-        mm, ss = divmod(t, 60)
-        self.lbl_time.config(text=f"⏱️ {mm:02d}:{ss:02d}")
-        self._draw_world()
-        self._schedule_tick()
+        self.frames.invalidar()
 
     # ---------- Animaciones suaves ----------
-    def _schedule_anim(self): self.after(120, self._animate)
-    def _animate(self):
+    def _animate(self, ahora_ms: float):
+        """Una vez por cuadro: ondas por grupo (flores, latidos, troncos) y tweens de movimiento."""
         if self.engine.game_over: return
-        self._anim_phase += 0.25
-
-        # balanceo árboles / flores
-        sway = int(1 * math.sin(self._anim_phase))
-        for item in self.canvas.find_withtag("anim_tree"):
-            self.canvas.move(item, sway, 0)
-        petal_dy = int(1 * math.cos(self._anim_phase))
-        for item in self.canvas.find_withtag("anim_flower"):
-            self.canvas.move(item, 0, petal_dy)
-
-        # latido mascotas / pequeño rebote del jugador
-        bounce = int(1 * (1 + math.sin(self._anim_phase)))
-        for tag in self.canvas.find_withtag("anim_animal"):
-            self.canvas.move(tag, 0, -bounce)
-        for tag in self.canvas.find_withtag("anim_player"):
-            self.canvas.move(tag, 0, -bounce)
-        for tag in self.canvas.find_withtag("anim_monster"):
-            self.canvas.move(tag, 0, -max(1, bounce//2))
-
-        # borde de troncos del inventario
-        self.inv_box.animate()
-
-        self._schedule_anim()
+        self.anim.avanzar(ahora_ms)
+        self.inv_box.animate(ahora_ms)
 
     # ---------- CRUD ----------
     def _parse_pos(self, s:str) -> tuple[int,int]:
         xs = [p.strip() for p in s.split(",")]
         if len(xs)!=2: raise ValueError("Pos debe ser x,y")
         x,y = int(xs[0]), int(xs[1])
-        if not (0<=x<MAP_W and 0<=y<MAP_H): raise ValueError("Pos fuera de mapa")
+        if not self.engine.dentro((x,y)): raise ValueError("Pos fuera de mapa")
         return (x,y)
 
     def _crud_crear(self):
@@ -468,7 +485,7 @@ class App(tk.Tk):
             self.engine.crear_animal(
                 self.ent_nom.get().strip(), self.ent_esp.get().strip(),
                 int(self.ent_en.get()), int(self.ent_niv.get()), self._parse_pos(self.ent_pos.get()))
-            messagebox.showinfo("OK","Creado"); self._draw_world()
+            messagebox.showinfo("OK","Creado"); self.frames.invalidar()
         except Exception as e: messagebox.showerror("Error", str(e))
 
     def _crud_leer(self):
@@ -486,9 +503,9 @@ class App(tk.Tk):
             if self.ent_niv.get(): campos["nivel"]=int(self.ent_niv.get())
             if self.ent_pos.get(): campos["posicion"]=self._parse_pos(self.ent_pos.get())
             ok = self.engine.actualizar_animal(self.ent_nom.get().strip(), **campos)
-            messagebox.showinfo("OK","Actualizado" if ok else "No se encontró"); self._draw_world()
+            messagebox.showinfo("OK","Actualizado" if ok else "No se encontró"); self.frames.invalidar()
         except Exception as e: messagebox.showerror("Error", str(e))
 
     def _crud_borrar(self):
         ok = self.engine.borrar_animal(self.ent_nom.get().strip())
-        messagebox.showinfo("OK","Eliminado" if ok else "No se encontró"); self._draw_world()
+        messagebox.showinfo("OK","Eliminado" if ok else "No se encontró"); self.frames.invalidar()
@@ -0,0 +1,157 @@
+"""
+Gestor de recursos gráficos: sprites perezosos, escalados por tamaño de celda.
+
+Nada se lee del disco hasta que una entidad pide su sprite. Cada PNG se
+decodifica una sola vez y se guarda una variante escalada por tamaño de
+celda (`zoom`/`subsample` enteros, sin PIL). Las figuras vectoriales de
+reemplazo (huella, jugador) se pintan una vez en un `Lienzo` y quedan como
+una imagen: un ítem de canvas por entidad en lugar de varias formas.
+
+Si existe `assets/atlas.png` + `atlas.json` (ver `construir_atlas`), todos
+los sprites salen de esa única imagen con `copy -from`.
+"""
+import json
+from fractions import Fraction
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gui.raster import Lienzo
+
+RAIZ = Path(__file__).resolve().parents[1] / "assets"
+
+# clave -> rutas relativas a RAIZ (las que falten se ignoran)
+CATALOGO: Dict[str, Tuple[str, ...]] = {
+    "gato": ("animals/cat_orange.png", "animals/cat_gray.png"),
+    "perro": ("animals/dog_brown.png", "animals/dog_gold.png"),
+    "jugador": ("player/player.png",),
+    "monstruo": ("player/monster.png",),
+}
+MARGEN = 8          # px libres alrededor del sprite dentro de la celda
+MAX_FACTOR = 8      # tope de zoom/subsample (ambos cuestan proporcional al factor)
+
+
+def escala(lado: int, objetivo: int, max_factor: int = MAX_FACTOR) -> Tuple[int, int]:
+    """(zoom, subsample) enteros tales que `lado * zoom / subsample` ≈ `objetivo`."""
+    f = Fraction(objetivo, max(1, lado)).limit_denominator(max_factor)
+    if f == 0:
+        return 1, max_factor
+    if f.numerator > max_factor:
+        return max_factor, 1
+    return f.numerator, f.denominator
+
+
+def empaquetar(tamanos: Dict[str, Tuple[int, int]], ancho_max: int = 1024
+               ) -> Tuple[Dict[str, Tuple[int, int]], int, int]:
+    """Empaquetado por estantes (más altos primero): (posiciones, ancho, alto) del atlas."""
+    pos: Dict[str, Tuple[int, int]] = {}
+    x = y = alto_estante = ancho = 0
+    for clave, (w, h) in sorted(tamanos.items(), key=lambda kv: (-kv[1][1], kv[0])):
+        if x and x + w > ancho_max:
+            x, y, alto_estante = 0, y + alto_estante, 0
+        pos[clave] = (x, y)
+        x += w
+        ancho, alto_estante = max(ancho, x), max(alto_estante, h)
+    return pos, ancho, y + alto_estante
+
+
+class Recursos:
+    def __init__(self, master, cell: int, raiz: Path = RAIZ,
+                 catalogo: Dict[str, Tuple[str, ...]] = CATALOGO):
+        self.master = master
+        self.cell = cell
+        self.raiz = raiz
+        self.catalogo = catalogo
+        self._nativas: Dict[str, object] = {}                      # ruta -> PhotoImage original
+        self._variantes: Dict[Tuple[str, int], List[object]] = {}  # (clave, cell) -> escaladas
+        self._figuras: Dict[Tuple[str, int], object] = {}
+        self._atlas = None                                         # (foto, {ruta: [x, y, w, h]})
+        self.decodificados = 0                                     # archivos leídos (tests/métricas)
+
+    # ---------- sprites ----------
+    def variantes(self, clave: str, cell: Optional[int] = None) -> List[object]:
+        """Sprites de `clave` escalados a la celda (se cargan la primera vez que se piden)."""
+        cell = cell or self.cell
+        imgs = self._variantes.get((clave, cell))
+        if imgs is None:
+            imgs = []
+            for ruta in self.catalogo.get(clave, ()):
+                img = self._nativa(ruta)
+                if img is not None:
+                    imgs.append(self._escalar(img, cell - MARGEN))
+            self._variantes[(clave, cell)] = imgs
+        return imgs
+
+    def sprite(self, clave: str, i: int = 0) -> Optional[object]:
+        imgs = self.variantes(clave)
+        return imgs[i % len(imgs)] if imgs else None
+
+    def figura(self, clave: str, pintar: Callable[[int], Lienzo]):
+        """Imagen horneada de `pintar(cell)` (figura vectorial de reemplazo), una vez por celda."""
+        img = self._figuras.get((clave, self.cell))
+        if img is None:
+            img = self._figuras[(clave, self.cell)] = pintar(self.cell).foto(self.master)
+        return img
+
+    # ---------- carga ----------
+    def _nativa(self, ruta: str):
+        if ruta in self._nativas:
+            return self._nativas[ruta]
+        import tkinter as tk
+        img = None
+        atlas = self._cargar_atlas()
+        try:
+            if atlas is not None and ruta in atlas[1]:
+                x, y, w, h = atlas[1][ruta]
+                img = tk.PhotoImage(master=self.master, width=w, height=h)
+                img.tk.call(str(img), "copy", str(atlas[0]), "-from", x, y, x + w, y + h)
+            elif (self.raiz / ruta).is_file():
+                img = tk.PhotoImage(master=self.master, file=str(self.raiz / ruta))
+                self.decodificados += 1
+        except tk.TclError as e:
+            print(f"[WARN] No se pudo cargar {self.raiz / ruta}: {e}")
+            img = None
+        self._nativas[ruta] = img
+        return img
+
+    def _cargar_atlas(self):
+        if self._atlas is None:
+            png, idx = self.raiz / "atlas.png", self.raiz / "atlas.json"
+            self._atlas = False
+            if png.is_file() and idx.is_file():
+                import tkinter as tk
+                try:
+                    self._atlas = (tk.PhotoImage(master=self.master, file=str(png)),
+                                   json.loads(idx.read_text(encoding="utf-8"))["sprites"])
+                    self.decodificados += 1
+                except (tk.TclError, ValueError, KeyError) as e:
+                    print(f"[WARN] Atlas inválido ({png}): {e}")
+        return self._atlas or None
+
+    @staticmethod
+    def _escalar(img, objetivo: int):
+        zoom, sub = escala(max(img.width(), img.height()), objetivo)
+        if zoom > 1:
+            img = img.zoom(zoom)
+        if sub > 1:
+            img = img.subsample(sub)
+        return img
+
+
+def construir_atlas(raiz: Path = RAIZ, catalogo: Dict[str, Tuple[str, ...]] = CATALOGO,
+                    master=None) -> Optional[Path]:
+    """Empaqueta los PNG del catálogo en `atlas.png` + `atlas.json`; None si no hay sprites."""
+    import tkinter as tk
+    rec = Recursos(master, 0, raiz, catalogo)
+    rec._atlas = False                                   # leer los PNG sueltos, no un atlas viejo
+    fotos = {r: img for rutas in catalogo.values() for r in rutas
+             if (img := rec._nativa(r)) is not None}
+    if not fotos:
+        return None
+    pos, ancho, alto = empaquetar({r: (img.width(), img.height()) for r, img in fotos.items()})
+    atlas = tk.PhotoImage(master=master, width=ancho, height=alto)
+    for r, img in fotos.items():
+        atlas.tk.call(str(atlas), "copy", str(img), "-to", *pos[r])
+    atlas.write(str(raiz / "atlas.png"), format="png")
+    sprites = {r: [*pos[r], img.width(), img.height()] for r, img in fotos.items()}
+    (raiz / "atlas.json").write_text(json.dumps({"sprites": sprites}, indent=2), encoding="utf-8")
+    return raiz / "atlas.png"
@@ -0,0 +1,99 @@
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+Celda = Tuple[int, int]
+
+
+class _Nodo:
+    __slots__ = ("tag", "pos", "estado", "anim", "pasada")
+
+    def __init__(self, tag: str, pos: Celda, estado, anim: Optional[str], pasada: int):
+        self.tag, self.pos, self.estado, self.anim, self.pasada = tag, pos, estado, anim, pasada
+
+
+class Escena:
+    """
+    Escena retenida sobre un `tk.Canvas`: un grupo persistente de ítems por entidad.
+
+    Cada pasada de dibujo llama `sincronizar()` por entidad visible y
+    `podar()` al final. Si la entidad es nueva se crean sus ítems; si cambió
+    de celda se mueve su grupo (un tag por entidad) con `canvas.move`; si
+    cambió su `estado` visual (tipo, sprite, visibilidad) se recrea; las que
+    no aparecieron en la pasada se borran. Sin cambios no se toca el canvas.
+
+    Los grupos animados (`anim`) tienen un desfase absoluto (`fijar_desfase`)
+    que se aplica también a los ítems creados después, así las animaciones
+    no acumulan deriva.
+    """
+
+    def __init__(self, canvas, cell: int):
+        self.canvas = canvas
+        self.cell = cell
+        self._nodos: Dict[Hashable, _Nodo] = {}
+        self._desfases: Dict[str, Tuple[int, int]] = {}
+        self._pasada = 0
+        self._siguiente = 0
+        self.creados = 0          # grupos creados/recreados (para métricas y tests)
+
+    def __len__(self) -> int:
+        return len(self._nodos)
+
+    def __contains__(self, clave) -> bool:
+        return clave in self._nodos
+
+    def comenzar(self) -> None:
+        self._pasada += 1
+
+    def sincronizar(self, clave: Hashable, pos: Celda, estado,
+                    crear: Callable[[int, int, Tuple[str, ...]], None],
+                    anim: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """
+        Asegura que `clave` esté dibujada en `pos` con `estado`; `crear(cx, cy, tags)` la dibuja.
+        Devuelve el desplazamiento en píxeles si la entidad cambió de celda (si no, None).
+        """
+        nodo = self._nodos.get(clave)
+        if nodo is not None and nodo.estado != estado:
+            self.canvas.delete(nodo.tag)
+            nodo = None
+        if nodo is None:
+            self._siguiente += 1
+            tag = f"ent{self._siguiente}"
+            tags = (tag, "obj") + ((anim,) if anim else ())
+            cx, cy = pos[0] * self.cell + self.cell // 2, pos[1] * self.cell + self.cell // 2
+            crear(cx, cy, tags)
+            dx, dy = self._desfases.get(anim, (0, 0)) if anim else (0, 0)
+            if dx or dy:
+                self.canvas.move(f"{tag}&&{anim}", dx, dy)
+            self._nodos[clave] = _Nodo(tag, pos, estado, anim, self._pasada)
+            self.creados += 1
+            return None
+        nodo.pasada = self._pasada
+        if nodo.pos == pos:
+            return None
+        dx, dy = (pos[0] - nodo.pos[0]) * self.cell, (pos[1] - nodo.pos[1]) * self.cell
+        self.canvas.move(nodo.tag, dx, dy)
+        nodo.pos = pos
+        return dx, dy
+
+    def tag_de(self, clave: Hashable) -> Optional[str]:
+        """Tag del grupo de ítems de `clave` (para animarlo), o None si no está en escena."""
+        nodo = self._nodos.get(clave)
+        return nodo.tag if nodo is not None else None
+
+    def podar(self) -> int:
+        """Borra las entidades que no se sincronizaron en esta pasada; devuelve cuántas."""
+        viejas: List[Hashable] = [c for c, n in self._nodos.items() if n.pasada != self._pasada]
+        for c in viejas:
+            self.canvas.delete(self._nodos.pop(c).tag)
+        return len(viejas)
+
+    def fijar_desfase(self, anim: str, dx: int, dy: int) -> None:
+        """Lleva el grupo animado `anim` al desfase absoluto (dx, dy) respecto de su celda."""
+        vx, vy = self._desfases.get(anim, (0, 0))
+        if (dx, dy) != (vx, vy):
+            self.canvas.move(anim, dx - vx, dy - vy)
+            self._desfases[anim] = (dx, dy)
+
+    def limpiar(self) -> None:
+        for n in self._nodos.values():
+            self.canvas.delete(n.tag)
+        self._nodos.clear()
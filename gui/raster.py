@@ -0,0 +1,139 @@
+"""
+Rasterizado del tablero estático a `tk.PhotoImage`.
+
+`Lienzo` pinta formas simples (rectángulos, bordes, óvalos) en un buffer
+de píxeles en Python; se convierte una sola vez en una foto con `put` por
+filas. `FondoRaster` compone esas fotos-baldosa (una por tipo de celda) en
+trozos de `TROZO` x `TROZO` celdas con `copy -to`, y cada trozo es un único
+ítem de canvas. Los trozos se hornean a demanda (los que entran en la vista)
+y se descartan los menos usados por encima de `MAX_TROZOS`.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+TROZO = 16          # celdas por lado de cada trozo horneado
+MAX_TROZOS = 16     # trozos retenidos a la vez (~3 MB c/u con celdas de 56 px)
+
+
+class Lienzo:
+    """Buffer de píxeles `ancho` x `alto` con colores '#rrggbb' (None = transparente)."""
+
+    def __init__(self, ancho: int, alto: int, fondo: Optional[str]):
+        self.ancho, self.alto = ancho, alto
+        self.px: List[List[Optional[str]]] = [[fondo] * ancho for _ in range(alto)]
+
+    def rect(self, x0: int, y0: int, x1: int, y1: int, color: str) -> None:
+        """Rectángulo relleno [x0, x1) x [y0, y1), recortado al lienzo."""
+        x0, x1 = max(0, x0), min(self.ancho, x1)
+        for y in range(max(0, y0), min(self.alto, y1)):
+            fila = self.px[y]
+            fila[x0:x1] = [color] * max(0, x1 - x0)
+
+    def borde(self, x0: int, y0: int, x1: int, y1: int, color: str, grosor: int = 1) -> None:
+        self.rect(x0, y0, x1, y0 + grosor, color)
+        self.rect(x0, y1 - grosor, x1, y1, color)
+        self.rect(x0, y0, x0 + grosor, y1, color)
+        self.rect(x1 - grosor, y0, x1, y1, color)
+
+    def ovalo(self, x0: int, y0: int, x1: int, y1: int, color: str) -> None:
+        """Óvalo relleno inscripto en la caja (mismas coordenadas que `create_oval`)."""
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        rx, ry = (x1 - x0) / 2, (y1 - y0) / 2
+        if rx <= 0 or ry <= 0:
+            return
+        for y in range(max(0, int(y0)), min(self.alto, int(y1) + 1)):
+            dy = (y + 0.5 - cy) / ry
+            if dy * dy > 1:
+                continue
+            medio = rx * (1 - dy * dy) ** 0.5
+            xa, xb = max(0, round(cx - medio)), min(self.ancho, round(cx + medio))
+            if xb > xa:
+                self.px[y][xa:xb] = [color] * (xb - xa)
+
+    def datos(self) -> str:
+        """Filas en el formato de `PhotoImage.put` ("{#.. #..} {#.. #..}")."""
+        return " ".join("{" + " ".join(c or "#000000" for c in fila) + "}" for fila in self.px)
+
+    def foto(self, master=None):
+        import tkinter as tk
+        img = tk.PhotoImage(master=master, width=self.ancho, height=self.alto)
+        img.put(self.datos())
+        for y, fila in enumerate(self.px):
+            for x, c in enumerate(fila):
+                if c is None:
+                    img.transparency_set(x, y, True)
+        return img
+
+
+def trozos_en(x0: int, y0: int, x1: int, y1: int, map_w: int, map_h: int) -> List[Tuple[int, int]]:
+    """Trozos que cubren las celdas [x0, x1) x [y0, y1) (recortado al mapa)."""
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(map_w, x1), min(map_h, y1)
+    return [(tx, ty) for ty in range(y0 // TROZO, (y1 - 1) // TROZO + 1)
+            for tx in range(x0 // TROZO, (x1 - 1) // TROZO + 1)] if x1 > x0 and y1 > y0 else []
+
+
+class FondoRaster:
+    """
+    Capa de fondo horneada por trozos.
+
+    `clave_celda(x, y)` devuelve la clave de baldosa de una celda y
+    `pintar(clave)` un `Lienzo` de `cell` x `cell` para esa clave; cada
+    baldosa se convierte en foto una sola vez.
+    """
+
+    def __init__(self, canvas, cell: int, map_w: int, map_h: int,
+                 clave_celda: Callable[[int, int], Hashable], pintar: Callable[[Hashable], Lienzo],
+                 tags: Iterable[str] = ("grid", "fondo")):
+        self.canvas = canvas
+        self.cell, self.map_w, self.map_h = cell, map_w, map_h
+        self._clave_celda, self._pintar = clave_celda, pintar
+        self.tags = tuple(tags)
+        self._baldosas: Dict[Hashable, object] = {}
+        self._trozos: "OrderedDict[Tuple[int, int], Tuple[object, int]]" = OrderedDict()
+
+    def baldosa(self, clave: Hashable):
+        img = self._baldosas.get(clave)
+        if img is None:
+            img = self._baldosas[clave] = self._pintar(clave).foto(self.canvas)
+        return img
+
+    def asegurar(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        """Hornea los trozos que cubren las celdas [x0, x1) x [y0, y1); devuelve cuántos nuevos."""
+        nuevos = 0
+        visibles = trozos_en(x0, y0, x1, y1, self.map_w, self.map_h)
+        for t in visibles:
+            if t in self._trozos:
+                self._trozos.move_to_end(t)
+            else:
+                self._hornear(t)
+                nuevos += 1
+        while len(self._trozos) > max(MAX_TROZOS, len(visibles)):
+            _, (_, item) = self._trozos.popitem(last=False)
+            self.canvas.delete(item)
+        return nuevos
+
+    def _hornear(self, trozo: Tuple[int, int]) -> None:
+        import tkinter as tk
+        tx, ty = trozo
+        c = self.cell
+        cx0, cy0 = tx * TROZO, ty * TROZO
+        cols, filas = min(TROZO, self.map_w - cx0), min(TROZO, self.map_h - cy0)
+        img = tk.PhotoImage(master=self.canvas, width=cols * c, height=filas * c)
+        copiar = img.tk.call
+        nombre = str(img)
+        for y in range(filas):
+            for x in range(cols):
+                baldosa = self.baldosa(self._clave_celda(cx0 + x, cy0 + y))
+                copiar(nombre, "copy", str(baldosa), "-to", x * c, y * c)
+        item = self.canvas.create_image(cx0 * c, cy0 * c, image=img, anchor="nw", tags=self.tags)
+        self.canvas.tag_lower(item)
+        self._trozos[trozo] = (img, item)
+
+    def __len__(self) -> int:
+        return len(self._trozos)
+
+    def limpiar(self) -> None:
+        for _, item in self._trozos.values():
+            self.canvas.delete(item)
+        self._trozos.clear()
@@ -0,0 +1,139 @@
+"""
+Planificador de cuadros único para la App (reemplaza las cadenas de `after`).
+
+La simulación avanza en pasos fijos de `paso_ms` sobre un reloj simulado;
+las tareas periódicas (`cada`) y diferidas (`una_vez`) se disparan según ese
+reloj, así un tick de 1 s siempre son 1000 ms de juego aunque la máquina se
+atrase. El render es variable: los cambios de estado solo llaman
+`invalidar()` y se dibuja a lo sumo una vez por cuadro; la animación
+(`al_cuadro`) corre una vez por cuadro real con el reloj de juego, así un
+cuadro atrasado salta directo a la fase correcta. Si un cuadro llega
+con más de `max_pasos` pasos atrasados, se simulan esos y el resto se
+descarta (salto de cuadros) en lugar de entrar en espiral.
+"""
+import time
+from typing import Callable, Dict, Optional
+
+
+class _Tarea:
+    __slots__ = ("fn", "periodo", "proxima")
+
+    def __init__(self, fn: Callable[[], None], periodo: Optional[float], proxima: float):
+        self.fn, self.periodo, self.proxima = fn, periodo, proxima
+
+
+class Planificador:
+    def __init__(self, widget, paso_ms: int = 16, max_pasos: int = 8,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.widget = widget
+        self.paso_ms = paso_ms
+        self.max_pasos = max_pasos
+        self._reloj = reloj
+        self._tareas: Dict[str, _Tarea] = {}
+        self._dibujar: Optional[Callable[[], None]] = None
+        self._por_cuadro: Optional[Callable[[float], None]] = None
+        self._sucio = False
+        self._job = None
+        self._corriendo = False
+        self._ultimo = 0.0
+        self._acumulado = 0.0
+        self.ahora_ms = 0.0                 # reloj simulado
+        # estadísticas
+        self.cuadros = 0
+        self.dibujos = 0
+        self.pasos_descartados = 0
+        self.cuadros_excedidos = 0
+        self.ultimo_cuadro_ms = 0.0
+
+    @property
+    def presupuesto_ms(self) -> float:
+        """Tiempo de pared disponible por cuadro."""
+        return float(self.paso_ms)
+
+    # ---------- tareas ----------
+    def cada(self, nombre: str, periodo_ms: float, fn: Callable[[], None],
+             retraso_ms: Optional[float] = None) -> None:
+        """Corre `fn` cada `periodo_ms` de juego (reemplaza una tarea con el mismo nombre)."""
+        inicio = periodo_ms if retraso_ms is None else retraso_ms
+        self._tareas[nombre] = _Tarea(fn, periodo_ms, self.ahora_ms + inicio)
+
+    def una_vez(self, nombre: str, retraso_ms: float, fn: Callable[[], None]) -> None:
+        self._tareas[nombre] = _Tarea(fn, None, self.ahora_ms + retraso_ms)
+
+    def cancelar(self, nombre: str) -> None:
+        self._tareas.pop(nombre, None)
+
+    def activa(self, nombre: str) -> bool:
+        return nombre in self._tareas
+
+    # ---------- render ----------
+    def al_dibujar(self, fn: Callable[[], None]) -> None:
+        self._dibujar = fn
+
+    def al_cuadro(self, fn: Callable[[float], None]) -> None:
+        """`fn(ahora_ms)` corre una vez por cuadro, antes del redibujo (animaciones)."""
+        self._por_cuadro = fn
+
+    def invalidar(self) -> None:
+        """Pide un redibujo; varios pedidos dentro del mismo cuadro se juntan en uno."""
+        self._sucio = True
+
+    # ---------- bucle ----------
+    def iniciar(self) -> None:
+        if self._job is None:
+            self._corriendo = True
+            self._ultimo = self._reloj()
+            self._job = self.widget.after(self.paso_ms, self._cuadro)
+
+    def detener(self) -> None:
+        """Corta el bucle y descarta las tareas (se puede llamar desde una tarea o el render)."""
+        self._corriendo = False
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self._tareas.clear()
+
+    def avanzar(self, ms: float) -> None:
+        """Simula `ms` de juego en pasos fijos, disparando las tareas vencidas en orden."""
+        fin = self.ahora_ms + ms
+        while True:
+            vencidas = [(t.proxima, n) for n, t in self._tareas.items() if t.proxima <= fin]
+            if not vencidas:
+                break
+            proxima, nombre = min(vencidas)
+            tarea = self._tareas[nombre]
+            self.ahora_ms = max(self.ahora_ms, proxima)
+            if tarea.periodo is None:
+                del self._tareas[nombre]
+            else:
+                tarea.proxima = proxima + tarea.periodo
+            tarea.fn()
+        self.ahora_ms = fin
+
+    def _cuadro(self) -> None:
+        self._job = None
+        inicio = self._reloj()
+        self._acumulado += (inicio - self._ultimo) * 1000.0
+        self._ultimo = inicio
+        pasos = int((self._acumulado + 1e-6) // self.paso_ms)   # tolera el redondeo del reloj
+        if pasos > self.max_pasos:
+            self.pasos_descartados += pasos - self.max_pasos
+            pasos = self.max_pasos
+            self._acumulado = 0.0
+        else:
+            self._acumulado = max(0.0, self._acumulado - pasos * self.paso_ms)
+        if pasos:
+            self.avanzar(pasos * self.paso_ms)
+        if self._por_cuadro is not None and self._corriendo:
+            self._por_cuadro(self.ahora_ms)
+        if self._sucio and self._dibujar is not None:
+            self._sucio = False
+            self._dibujar()
+            self.dibujos += 1
+        self.cuadros += 1
+        self.ultimo_cuadro_ms = (self._reloj() - inicio) * 1000.0
+        if self.ultimo_cuadro_ms > self.presupuesto_ms:
+            self.cuadros_excedidos += 1
+        if self._corriendo:
+            espera = max(1, int(self.paso_ms - self.ultimo_cuadro_ms))
+            self._job = self.widget.after(espera, self._cuadro)
@@ -1,38 +1,211 @@
+import os
 import sys
-from pathlib import Path
-from classes.jugador import Jugador
-from data.seeds import seed_animales, seed_items, seed_trampas
-from data import storage
-from data.storage import cargar_animales
-
-def _ensure_seeds() -> None:
-    base = Path(__file__).resolve().parent
-    data = base / "_data"
-    data.mkdir(exist_ok=True)
-    if not (data/"animals.json").exists(): seed_animales(n=8)
-    if not (data/"items.json").exists():   seed_items(m=10)
-    if not (data/"traps.json").exists():   seed_trampas()
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+# Imports diferidos: cada camino (selftest, simulate, bench, GUI) carga solo lo
+# que usa, y Tk/GUI recién cuando se abre la ventana.
+
+class _Arranque:
+    """Cronómetro de las etapas de arranque (`--startup-profile`)."""
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append((nombre, time.perf_counter() - t0))
+
+    def reporte(self) -> str:
+        total = time.perf_counter() - self.inicio
+        filas = [f"  {n:<18} {s * 1000:8.1f} ms" for n, s in self.etapas]
+        return "\n".join(["Arranque:", *filas, f"  {'total':<18} {total * 1000:8.1f} ms",
+                          f"  módulos cargados   {len(sys.modules)}"])
+
+    def informar(self) -> None:
+        if "--startup-profile" in sys.argv:
+            print(self.reporte(), file=sys.stderr)
+
+ARRANQUE = _Arranque()
+
+def _configure_storage() -> None:
+    """`--storage sqlite|journal` (o PATITAS_STORAGE) elige el backend de persistencia."""
+    from data import storage
+    backend = os.environ.get("PATITAS_STORAGE", "json")
+    if "--storage" in sys.argv:
+        idx = sys.argv.index("--storage")
+        if idx + 1 < len(sys.argv):
+            backend = sys.argv[idx + 1]
+    storage.configurar(backend)
+
+def _map_arg() -> Tuple[int, int] | None:
+    """`--map ANCHOxALTO` (p. ej. --map 200x200)."""
+    if "--map" not in sys.argv:
+        return None
+    from game.engine import validar_dimensiones
+    idx = sys.argv.index("--map")
+    try:
+        w, h = (int(v) for v in sys.argv[idx + 1].lower().split("x"))
+    except (IndexError, ValueError):
+        raise SystemExit("Uso: --map ANCHOxALTO")
+    validar_dimensiones(w, h)
+    return w, h
+
+def _seed_arg() -> Optional[int]:
+    """`--seed S` (entero) o None si no se pidió."""
+    if "--seed" not in sys.argv:
+        return None
     try:
-        if len(cargar_animales()) == 0:
-            seed_animales(n=8)
-    except Exception:
-        seed_animales(n=8)
+        return int(_arg("--seed", ""))
+    except ValueError:
+        raise SystemExit("Uso: --seed S (entero)")
+
+def _ensure_seeds(semilla: Optional[int] = None) -> None:
+    """
+    Siembra lo que falte. Con datos ya guardados no parsea nada (ni importa las semillas).
+    Las posiciones salen de `semilla` (al azar si es None); la usada se informa por stderr
+    para poder reconstruir el mismo mundo con `--seed S`.
+    """
+    from data import storage
+    mundo = storage.cargar_mundo()
+    if mundo is None:
+        from game.engine import MAP_W, MAP_H
+        mundo = {"ancho": MAP_W, "alto": MAP_H}
+    pedido = _map_arg()
+    redimensionado = bool(pedido and pedido != (mundo["ancho"], mundo["alto"]))
+    if redimensionado:
+        # Cambiar el tamaño invalida las posiciones guardadas: se re-siembra todo.
+        mundo = {"ancho": pedido[0], "alto": pedido[1]}
+        storage.guardar_mundo(mundo)
+    w, h = mundo["ancho"], mundo["alto"]
+    faltan = ([True] * 3 if redimensionado else
+              [not storage.tiene_datos("animales"), not storage.existe("items"), not storage.existe("trampas")])
+    if not any(faltan):
+        return
+    from data.seeds import pool_de_siembra, rng_de_siembra, seed_animales, seed_items, seed_trampas
+    if semilla is None:
+        import random
+        semilla = random.randrange(1 << 32)
+    rng = rng_de_siembra(semilla)
+    # Un solo pool para toda la pasada: lo ya guardado ocupa su celda y nada se siembra encima.
+    libres = pool_de_siembra(w, h, (e.posicion for col, falta in zip(("animales", "items", "trampas"), faltan)
+                                    if not falta for e in getattr(storage, f"cargar_{col}")()))
+    try:
+        if faltan[0]: seed_animales(n=8, w=w, h=h, libres=libres, rng=rng)
+        if faltan[1]: seed_items(m=10, w=w, h=h, libres=libres, rng=rng)
+        if faltan[2]: seed_trampas(w=w, h=h, libres=libres, rng=rng)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"Mundo sembrado con --seed {semilla}", file=sys.stderr)
+
+def _arg(nombre: str, defecto: str) -> str:
+    if nombre in sys.argv:
+        idx = sys.argv.index(nombre)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return defecto
+
+def _configure_metrics() -> None:
+    """`--metrics RUTA.json` vuelca las métricas al salir; `--metrics-log SEG` las loguea periódicamente."""
+    if "--metrics" not in sys.argv and "--metrics-log" not in sys.argv:
+        return
+    from data.metricas import METRICAS
+    METRICAS.activar()
+    if "--metrics" in sys.argv:
+        import atexit
+        atexit.register(METRICAS.guardar_json, _arg("--metrics", "metricas.json"))
+    if "--metrics-log" in sys.argv:
+        import logging
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+        METRICAS.registrar_cada(float(_arg("--metrics-log", "10")))
+
+def simulate() -> None:
+    """`--simulate N --policy random|greedy --workers K [--seed S] [--map WxH]` (sin GUI)."""
+    with ARRANQUE.etapa("importar simulación"):
+        from game.simulacion import ejecutar, reporte
+        from game.engine import MAP_W, MAP_H
+    try:
+        n = int(_arg("--simulate", "100"))
+        workers = int(_arg("--workers", str(os.cpu_count() or 1)))
+        semilla = int(_arg("--seed", "0"))
+    except ValueError:
+        raise SystemExit("Uso: --simulate N --policy random|greedy --workers K [--seed S]")
+    politica = _arg("--policy", "random")
+    w, h = _map_arg() or (MAP_W, MAP_H)
+    ARRANQUE.informar()
+    try:
+        resultados, seg = ejecutar(n, politica, workers, semilla, w, h)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(reporte(resultados, seg, politica, workers))
 
 def bootstrap(gui: bool = True) -> None:
-    _ensure_seeds()
+    with ARRANQUE.etapa("storage"):
+        _configure_storage()
+    with ARRANQUE.etapa("semillas"):
+        _ensure_seeds(_seed_arg())
     if not gui:
-        from tests.selftest import run as run_tests
+        with ARRANQUE.etapa("importar tests"):
+            from tests.selftest import run as run_tests
+        ARRANQUE.informar()
         run_tests(); return
 
-    from gui.app import App
+    with ARRANQUE.etapa("importar gui"):
+        from classes.jugador import Jugador
+        from data import storage
+        from gui.app import App
+    # Desde acá las escrituras no bloquean el loop de Tk (game over y cierre las esperan)
+    storage.escribir_en_segundo_plano()
     nombre = "Rubia"
     storage.guardar_player(nombre)
-    jugador = Jugador(nombre=nombre, posicion=(0, 0))
-    App(jugador).mainloop()
+    grabador = None
+    if "--record" in sys.argv:
+        from game.replay import Grabador
+        grabador = Grabador()
+    with ARRANQUE.etapa("ventana"):
+        app = App(Jugador(nombre=nombre, posicion=(0, 0)), grabador=grabador)
+        app.update_idletasks()
+    ARRANQUE.informar()
+    try:
+        app.mainloop()
+    finally:
+        storage.escribir_en_segundo_plano(False)
+    if grabador is not None:
+        grabador.guardar(_arg("--record", "partida.json"), app.engine)
+
+def replay() -> None:
+    """`--replay RUTA`: reproduce una partida grabada sin GUI y verifica el estado final."""
+    from game.replay import ReproduccionDivergente, cargar, reproducir
+    grabacion = cargar(_arg("--replay", "partida.json"))
+    try:
+        engine, seg = reproducir(grabacion)
+    except ReproduccionDivergente as e:
+        raise SystemExit(f"✘ {e}")
+    print(f"✔ {len(grabacion['entradas'])} entradas reproducidas en {seg * 1000:.1f} ms; "
+          f"puntos {engine.jugador.puntuacion}, motivo: {engine.motivo_game_over or 'sin terminar'}")
 
 if __name__ == "__main__":
+    with ARRANQUE.etapa("métricas"):
+        _configure_metrics()
     if "--selftest" in sys.argv:
         bootstrap(gui=False)
+    elif "--simulate" in sys.argv:
+        simulate()
+    elif "--replay" in sys.argv:
+        replay()
+    elif "--bench" in sys.argv:
+        from tests.bench import run as run_bench
+        sys.exit(run_bench())
+    elif "--build-atlas" in sys.argv:
+        import tkinter as tk
+        from gui.assets import construir_atlas
+        raiz = tk.Tk(); raiz.withdraw()
+        print(construir_atlas(master=raiz) or "No hay sprites para empaquetar")
     else:
         try:
             bootstrap(gui=True)
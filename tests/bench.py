@@ -0,0 +1,364 @@
+"""
+Microbenchmarks de los caminos calientes (motor, storage, render).
+
+    python main.py --bench                  # corre, guarda JSON y compara con la línea base
+    python main.py --bench --bench-save     # además actualiza la línea base
+    python main.py --bench --bench-filter storage --bench-tolerance 0.5
+
+Cada caso reporta la mediana y el mínimo del tiempo por operación sobre
+varias repeticiones. Una regresión es una mediana más lenta que la de la
+línea base por encima de la tolerancia (25 % por defecto).
+"""
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from classes.gato import Gato
+from classes.item import Item
+from classes.jugador import Jugador
+from classes.perro import Perro
+from classes.trap import Trap
+from data import storage
+
+BASE = Path(__file__).resolve().parents[1]
+LINEA_BASE = Path(__file__).resolve().parent / "bench_baseline.json"
+RESULTADOS = BASE / "_data" / "bench.json"
+TOLERANCIA = 0.25
+TAMANIOS_STORAGE = (10, 1_000, 100_000)
+
+# Un caso devuelve (fn, n): `fn()` ejecuta `n` operaciones y es lo único que se cronometra.
+Preparar = Callable[[], Tuple[Callable[[], None], int]]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Medición
+# ──────────────────────────────────────────────────────────────────────────────
+def medir(preparar: Preparar, repeticiones: int = 5, minimo_s: float = 0.05) -> Dict:
+    """Tiempo por operación en µs; cada repetición se agranda hasta durar `minimo_s`."""
+    muestras: List[float] = []
+    for _ in range(repeticiones):
+        total, ops = 0.0, 0
+        while total < minimo_s:
+            fn, n = preparar()
+            t0 = time.perf_counter()
+            fn()
+            total += time.perf_counter() - t0
+            ops += n
+        muestras.append(total / ops * 1e6)
+    return {"mediana_us": statistics.median(muestras), "min_us": min(muestras),
+            "repeticiones": repeticiones}
+
+
+@contextmanager
+def _datos_temporales(backend: str = "json"):
+    """Backend aislado en un directorio temporal (no toca `_data/`)."""
+    tmp = Path(tempfile.mkdtemp(prefix="patitas-bench-"))
+    try:
+        if backend == "sqlite":
+            from data.sqlite_backend import BackendSqlite
+            b = BackendSqlite(tmp / "bench.sqlite3", migrar_desde=None)
+        elif backend == "journal":
+            from data.journal_backend import BackendJournal
+            b = BackendJournal(tmp / "journal", migrar_desde=None)
+        else:
+            b = storage.BackendJson(tmp)
+        with storage.usando(b):
+            yield b
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _mundo(ancho: int, alto: int, animales=(), items=(), trampas=()) -> None:
+    storage.guardar_mundo({"ancho": ancho, "alto": alto})
+    storage.guardar_animales(list(animales))
+    storage.guardar_items(list(items))
+    storage.guardar_trampas(list(trampas))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Casos: motor
+# ──────────────────────────────────────────────────────────────────────────────
+def _engine(**kw):
+    from game.engine import GameEngine
+    return GameEngine(Jugador(nombre="Bench", posicion=(0, 0)), remaining_time=10**9, **kw)
+
+
+def bench_engine_init(ancho: int, alto: int) -> Preparar:
+    rng = random.Random(1)
+    n = ancho * alto // 50
+    _mundo(ancho, alto,
+           animales=[Perro(f"A{i}", "perro", 50, (rng.randrange(ancho), rng.randrange(1, alto)))
+                     for i in range(n // 4 or 1)],
+           items=[Item(f"Comida {i}", "comida", 10, (rng.randrange(ancho), rng.randrange(1, alto)))
+                  for i in range(n)],
+           trampas=[Trap(f"T{i}", "spike", 1, (rng.randrange(ancho), rng.randrange(1, alto)))
+                    for i in range(n)])
+
+    def preparar():
+        return (lambda: _engine().close()), 1
+    return preparar
+
+
+def bench_mover(con_recogida: bool) -> Preparar:
+    """Recorre una fila de 199 celdas ida y vuelta; con recogida, cada celda tiene comida."""
+    _mundo(200, 3)
+    eng = _engine()
+    for x in range(200):                      # fila 0 despejada: sin árboles ni comida del spawn
+        eng.tree_cells.discard((x, 0))
+    for it in list(eng.items):
+        eng._quitar_item(it)
+
+    def preparar():
+        eng.jugador.posicion = (0, 0)
+        eng.jugador.inventario.clear()
+        if con_recogida:
+            for x in range(1, 200):
+                eng._agregar_item(Item("Comida", "comida", 10, (x, 0)))
+
+        def fn():
+            for _ in range(199):
+                eng.mover_jugador(1, 0)
+        return fn, 199
+    return preparar
+
+
+def bench_tick_trampas(n_trampas: int, lado: int = 200) -> Preparar:
+    """`tick` con muchas trampas móviles en filas que el jugador (fila 0) nunca pisa."""
+    rng = random.Random(2)
+    trampas = [Trap(f"M{i}", "moving", 1, (rng.randrange(lado), rng.randrange(1, lado)),
+                    dx=rng.choice((-1, 1)), dy=0) for i in range(n_trampas)]
+    _mundo(lado, lado, trampas=trampas)
+    eng = _engine()
+    # Solo el trabajo del tick: el volcado a disco se mide aparte en los casos de storage.
+    eng.persistencia.intervalo, eng.persistencia.max_cambios = float("inf"), 10**9
+
+    def preparar():
+        def fn():
+            for _ in range(10):
+                eng.tick(1)
+        return fn, 10
+    return preparar
+
+
+def bench_monster_step(lado: int = 100) -> Preparar:
+    """El monstruo arranca en la esquina opuesta y da 20 pasos (sin alcanzar al jugador)."""
+    _mundo(lado, lado)
+    eng = _engine()
+    eng.monster_active = True
+
+    def preparar():
+        eng.monster_pos = (lado - 1, lado - 1)
+
+        def fn():
+            for _ in range(20):
+                eng.monster_step()
+        return fn, 20
+    return preparar
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Casos: storage
+# ──────────────────────────────────────────────────────────────────────────────
+def _coleccion(col: str, n: int) -> list:
+    if col == "animales":
+        return [(Gato if i % 2 else Perro)(f"Mascota{i}", "gato" if i % 2 else "perro", 50,
+                                           (i % 1000, i // 1000)) for i in range(n)]
+    if col == "items":
+        return [Item(f"Comida {i}", "comida", 10, (i % 1000, i // 1000)) for i in range(n)]
+    return [Trap(f"Trampa{i}", "moving", 1, (i % 1000, i // 1000), dx=1) for i in range(n)]
+
+
+def bench_storage(col: str, n: int, operacion: str) -> Preparar:
+    """`cargar_<col>` o `guardar_<col>` con un cambio por guardado (evita el atajo de bytes iguales)."""
+    datos = _coleccion(col, n)
+    getattr(storage, f"guardar_{col}")(datos)
+    cargar = getattr(storage, f"cargar_{col}")
+    guardar = getattr(storage, f"guardar_{col}")
+    cambio = [0]
+
+    def preparar():
+        if operacion == "cargar":
+            return cargar, 1
+
+        def fn():
+            cambio[0] ^= 1
+            x, y = datos[0].posicion
+            datos[0].posicion = (x, cambio[0])
+            guardar(datos)
+        return fn, 1
+    return preparar
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Casos: render
+# ──────────────────────────────────────────────────────────────────────────────
+def _vista_fuera_de_pantalla():
+    """(raíz Tk oculta, vista con los métodos de App) o None si no hay display."""
+    try:
+        import tkinter as tk
+        from types import MethodType, SimpleNamespace
+        from gui.app import App, CELL
+        from gui.animacion import Animador
+        from gui.assets import Recursos
+        from gui.escena import Escena
+        raiz = tk.Tk()
+    except Exception:
+        return None
+    raiz.withdraw()
+
+    class Vista(SimpleNamespace):
+        # Lo que no se define acá se toma de App, ligado a la vista (sin construir la ventana).
+        def __getattr__(self, nombre):
+            return MethodType(getattr(App, nombre), self)
+
+    canvas = tk.Canvas(raiz, width=672, height=672)
+    eng = _engine()
+    vista = Vista(engine=eng, canvas=canvas, escena=Escena(canvas, CELL), anim=Animador(canvas),
+                  recursos=Recursos(canvas, CELL), _sprite_idx={}, metricas=storage.METRICAS,
+                  path_cells=eng.path_cells, tree_cells=eng.tree_cells, flower_cells=eng.flower_cells)
+    return raiz, vista
+
+
+def bench_draw_world() -> Optional[Preparar]:
+    """`App._draw_world` sobre un canvas fuera de pantalla (None si no hay display)."""
+    rng = random.Random(3)
+    _mundo(12, 12,
+           animales=[Perro(f"A{i}", "perro", 50, (rng.randrange(12), rng.randrange(1, 12))) for i in range(4)],
+           items=[Item(f"Comida {i}", "comida", 10, (rng.randrange(12), rng.randrange(1, 12))) for i in range(20)],
+           trampas=[Trap(f"T{i}", "spike", 1, (rng.randrange(12), rng.randrange(1, 12))) for i in range(20)])
+    creada = _vista_fuera_de_pantalla()
+    if creada is None:
+        return None
+    raiz, vista = creada
+    from gui.app import App
+    paso = [1]
+
+    def preparar():
+        # Cuadro típico: el jugador se movió una celda y el resto de la escena quedó igual.
+        paso[0] = -paso[0]
+        vista.engine.mover_jugador(paso[0], 0)
+
+        def fn():
+            App._draw_world(vista)
+            raiz.update_idletasks()
+        return fn, 1
+    return preparar
+
+
+def bench_draw_grid(lado: int) -> Optional[Preparar]:
+    """`App._draw_grid` (fondo horneado + flores vivas) en un mapa `lado` x `lado`."""
+    _mundo(lado, lado)
+    creada = _vista_fuera_de_pantalla()
+    if creada is None:
+        return None
+    raiz, vista = creada
+    from gui.app import App
+
+    def preparar():
+        def fn():
+            App._draw_grid(vista)
+            raiz.update_idletasks()
+        return fn, 1
+    return preparar
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Suite
+# ──────────────────────────────────────────────────────────────────────────────
+def casos(backend: str = "json"):
+    """(nombre, backend del directorio temporal, constructor del caso, repeticiones)."""
+    yield "engine.init 10x10", "json", lambda: bench_engine_init(10, 10), 5
+    yield "engine.init 200x200", "json", lambda: bench_engine_init(200, 200), 5
+    yield "engine.mover_jugador sin recogida", "json", lambda: bench_mover(False), 5
+    yield "engine.mover_jugador con recogida", "json", lambda: bench_mover(True), 5
+    yield "engine.tick 5000 trampas móviles", "json", lambda: bench_tick_trampas(5000), 5
+    yield "engine.tick 50000 trampas móviles", "json", lambda: bench_tick_trampas(50000, 400), 3
+    yield "engine.monster_step 100x100", "json", lambda: bench_monster_step(100), 5
+    for n in TAMANIOS_STORAGE:
+        reps = 3 if n >= 100_000 else 5
+        for col in ("animales", "items", "trampas"):
+            for op in ("cargar", "guardar"):
+                yield (f"storage[{backend}].{op}_{col} n={n}", backend,
+                       lambda c=col, n=n, op=op: bench_storage(c, n, op), reps)
+    yield "gui.draw_world 12x12", "json", bench_draw_world, 5
+    yield "gui.draw_grid 100x100", "json", lambda: bench_draw_grid(100), 5
+
+
+def correr(filtro: str = "", backend: str = "json", salida=print) -> Dict[str, Dict]:
+    resultados: Dict[str, Dict] = {}
+    for nombre, back, crear, reps in casos(backend):
+        if filtro and filtro not in nombre:
+            continue
+        with _datos_temporales(back):
+            preparar = crear()
+            if preparar is None:
+                salida(f"  {nombre:<45} (omitido: sin display)")
+                continue
+            r = medir(preparar, repeticiones=reps)
+        resultados[nombre] = r
+        salida(f"  {nombre:<45} {r['mediana_us']:>12.1f} µs  (min {r['min_us']:.1f})")
+    return resultados
+
+
+def comparar(actual: Dict[str, Dict], base: Dict[str, Dict], tolerancia: float = TOLERANCIA) -> List[str]:
+    """Casos cuya mediana empeoró más que `tolerancia` (fracción) respecto a la línea base."""
+    regresiones = []
+    for nombre, r in actual.items():
+        previo = base.get(nombre)
+        if not previo:
+            continue
+        ratio = r["mediana_us"] / previo["mediana_us"]
+        if ratio > 1 + tolerancia:
+            regresiones.append(f"{nombre}: {previo['mediana_us']:.1f} → {r['mediana_us']:.1f} µs (x{ratio:.2f})")
+    return regresiones
+
+
+def _arg(nombre: str, defecto: str) -> str:
+    if nombre in sys.argv:
+        idx = sys.argv.index(nombre)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return defecto
+
+
+def run() -> int:
+    """Punto de entrada de `--bench`; devuelve 1 si hubo regresiones."""
+    filtro = _arg("--bench-filter", "")
+    backend = _arg("--storage", "json")
+    tolerancia = float(_arg("--bench-tolerance", str(TOLERANCIA)))
+    salida = Path(_arg("--bench-out", str(RESULTADOS)))
+    print(f"Benchmarks (storage: {backend}, Python {platform.python_version()})")
+    resultados = correr(filtro, backend)
+    doc = {"python": platform.python_version(), "plataforma": platform.platform(),
+           "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "resultados": resultados}
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Resultados en {salida}")
+
+    base = json.loads(LINEA_BASE.read_text(encoding="utf-8"))["resultados"] if LINEA_BASE.exists() else {}
+    if "--bench-save" in sys.argv:
+        LINEA_BASE.write_text(json.dumps({**doc, "resultados": {**base, **resultados}},
+                                         ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Línea base actualizada: {LINEA_BASE}")
+        return 0
+    if not base:
+        print("Sin línea base (usá --bench-save para crearla).")
+        return 0
+    regresiones = comparar(resultados, base, tolerancia)
+    for r in regresiones:
+        print(f"✘ REGRESIÓN {r}")
+    if not regresiones:
+        print(f"✔ Sin regresiones (tolerancia {tolerancia:.0%})")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -8,7 +8,7 @@ from game.engine import GameEngine
 
 def reset_data(base: Path):
     (base/"_data").mkdir(exist_ok=True)
-    for fn in ["animals.json","items.json","player.json","traps.json"]:
+    for fn in ["animals.json","items.json","player.json","traps.json","world.json"]:
         p = base/"_data"/fn
         if p.exists(): p.unlink()
 
@@ -54,9 +54,649 @@ def test_tiempo_game_over(base: Path):
     eng.tick(1); assert eng.remaining_time==1 and not eng.game_over
     eng.tick(1); assert eng.remaining_time==0 and eng.game_over
 
+def test_persistencia_diferida(base: Path):
+    reset_data(base)
+    from data.storage import guardar_animales, guardar_items, guardar_trampas, cargar_items
+    from data.persistencia import PersistenciaDiferida
+    guardar_animales([]); guardar_trampas([])
+    guardar_items([Item(nombre="Juguete+3", tipo="juguete", poder=3, posicion=(1,0))])
+    j = Jugador(nombre="Tester", posicion=(0,0))
+    eng = GameEngine(j, remaining_time=30)
+    eng.persistencia = PersistenciaDiferida(eng.persistencia._fuentes, intervalo=None, max_cambios=None)
+    eng.mover_jugador(1,0)  # recoge el juguete
+    assert any(i.nombre == "Juguete+3" for i in cargar_items()), "No debe escribir antes del flush"
+    eng.flush()
+    assert not any(i.nombre == "Juguete+3" for i in cargar_items()), "El flush debe persistir el cambio"
+    assert not eng.persistencia.sucias
+
+def test_escritor_asincrono(base: Path):
+    import tempfile, threading
+    from data.escritor import EscritorAsincrono
+    from data.storage import BackendJson
+    orden, empezo, soltar = [], threading.Event(), threading.Event()
+    def escritura(nombre, bloquear=False):
+        def f():
+            empezo.set()
+            if bloquear: soltar.wait(5)
+            orden.append(nombre)
+        return f
+    esc = EscritorAsincrono(max_pendientes=4)
+    esc.encolar("animales", escritura("a1", bloquear=True)); empezo.wait(5)
+    for nombre in ("i1", "a2", "i2", "a3"):
+        esc.encolar(nombre[0], escritura(nombre))
+    assert esc.pendientes == 3, "Una escritura en curso más una pendiente por clave"
+    soltar.set(); esc.flush()
+    assert orden == ["a1", "i2", "a3"], "Se coalesce por clave y se respeta el orden de llegada"
+    esc.encolar("x", lambda: 1 / 0)
+    try:
+        esc.flush(); assert False, "El error del hilo se re-lanza en flush()"
+    except ZeroDivisionError:
+        pass
+    esc.cerrar()
+
+    class Lento(BackendJson):
+        def guardar_items(self, items):
+            soltar.wait(5); super().guardar_items(items)
+    soltar.clear()
+    with tempfile.TemporaryDirectory() as tmp, storage.usando(Lento(Path(tmp))):
+        storage.escribir_en_segundo_plano()
+        try:
+            items = [Item("Comida A", "comida", 1, (0,0))]
+            storage.guardar_items(items)            # vuelve enseguida aunque el disco esté "lento"
+            items[0].poder = 9
+            assert storage._escritor.pendientes == 1
+            soltar.set()
+            assert [i.poder for i in storage.cargar_items()] == [1], "Leer espera lo encolado (una copia)"
+        finally:
+            storage.escribir_en_segundo_plano(False)
+
+def test_repositorio_identidad(base: Path):
+    reset_data(base)
+    from data.storage import guardar_animales, guardar_items, guardar_trampas
+    from classes.perro import Perro
+    guardar_animales([Perro(nombre="Toby", especie="perro", energia=50, posicion=(1,0))])
+    guardar_items([Item(nombre="Comida+5", tipo="comida", poder=5, posicion=(0,0))])
+    guardar_trampas([])
+    j = Jugador(nombre="Tester", posicion=(0,0))
+    eng = GameEngine(j, remaining_time=30)
+    toby = eng.leer_animal("toby")
+    assert toby is eng.animales[0]
+    try:
+        eng.actualizar_animal("Toby", energia=0, nivel=11)
+        assert False, "Nivel fuera de rango"
+    except ValueError:
+        assert toby.energia == 50 and not toby.is_dead() and eng.repo.n_activos == 1, "Un rechazo no aplica nada"
+    arbol = next(iter(eng.tree_cells))
+    for campos in ({"nivel": 11}, {"rescatado": "quizas"}, {"posicion": (-1, 0)}, {"posicion": arbol}, {"color": 1}):
+        errores = []
+        for actualizar in (lambda: eng.actualizar_animal("Toby", **campos),
+                           lambda: eng.actualizar_animales({"Toby": campos})):
+            try:
+                actualizar(); assert False, f"{campos} debe rechazarse"
+            except ValueError as e:
+                errores.append(str(e))
+        assert errores[0] == errores[1], f"Individual y en lote rechazan igual: {errores}"
+    eng.actualizar_animal("Toby", energia=70)
+    eng.mover_jugador(0,0); eng.mover_jugador(1,0)  # rescate
+    assert toby.rescatado and toby.energia == 70
+    assert eng.leer_animal("TOBY") is toby, "El rescate no debe reconstruir instancias"
+
+def test_backend_sqlite(base: Path):
+    import tempfile
+    from data.storage import BackendJson
+    from data.sqlite_backend import BackendSqlite
+    from classes.gato import Gato
+    with tempfile.TemporaryDirectory() as tmp:
+        origen = BackendJson(Path(tmp))
+        origen.guardar_animales([Gato(nombre="Ñata", especie="gato", energia=50, posicion=(1,2))])
+        origen.guardar_items([]); origen.guardar_trampas([])
+        db = BackendSqlite(Path(tmp)/"test.sqlite3", migrar_desde=Path(tmp))
+        try:
+            assert db.existe("animales") and db.existe("trampas")
+            assert db.leer_animal("ñATA").posicion == (1,2), "Búsqueda sin mayúsculas (con tildes/ñ)"
+            assert db.actualizar_animal("ñata", energia=80, posicion=(3,3))
+            a = db.leer_animal("Ñata"); assert a.energia == 80 and a.posicion == (3,3)
+            assert db.borrar_animal("ÑATA") and db.cargar_animales() == []
+        finally:
+            db.cerrar()
+
+def test_backend_journal(base: Path):
+    import tempfile
+    from data.journal_backend import BackendJournal
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        db = BackendJournal(d, compactar_cada=3, migrar_desde=None)
+        items = [Item(nombre=f"Comida+{n}", tipo="comida", poder=n, posicion=(n,0)) for n in range(3,8)]
+        db.guardar_items(items)
+        items.pop(2); db.guardar_items(items)
+        items[0].posicion = (9,9); db.guardar_items(items)
+        db.guardar_trampas([Trap(nombre="Mover", tipo="moving", daño=1, posicion=(0,1), dx=1)])
+        db.cerrar()
+        journal = max(d.glob("journal.*.jsonl"))
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write('{"c":"items","op":"spl')  # registro truncado por un corte
+        db = BackendJournal(d, migrar_desde=None)
+        try:
+            assert [i.posicion for i in db.cargar_items()] == [(9,9),(4,0),(6,0),(7,0)]
+            assert db.cargar_trampas()[0].dx == 1
+            assert (d/"snapshot.json").exists(), "Debe haber compactado en un snapshot"
+        finally:
+            db.cerrar()
+
+def test_crud_en_lote(base: Path):
+    import tempfile
+    from data.storage import BackendJson
+    from data.sqlite_backend import BackendSqlite
+    from data.journal_backend import BackendJournal
+    especs = [{"nombre": f"Gato {c}", "especie": "gato", "energia": 40, "nivel": 1, "pos": (1,1)} for c in "ABCD"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for db in (BackendJson(Path(tmp)/"json"), BackendSqlite(Path(tmp)/"l.sqlite3", migrar_desde=None),
+                   BackendJournal(Path(tmp)/"journal", migrar_desde=None)):
+            with storage.usando(db):
+                storage.crear_animales(especs)
+                try:
+                    storage.crear_animales([especs[0], ("X", "perro", 1, 1, (0,0))])
+                    assert False, "Un nombre inválido rechaza todo el lote"
+                except ValueError as e:
+                    assert "#1" in str(e)
+                try:
+                    storage.actualizar_animales({"gato a": {"nivel": 3}, "gato b": {"nivel": 99}})
+                    assert False, "Nivel fuera de rango"
+                except ValueError:
+                    pass
+                assert storage.actualizar_animales({"gato a": {"energia": 90}, "Nadie": {"nivel": 2}}) == 1
+                assert storage.borrar_animales(["GATO B", "gato c"]) == 2
+                assert [(a.nombre, a.energia) for a in storage.cargar_animales()] == [("Gato A", 90), ("Gato D", 40)]
+                storage.crear_trampas([{"nombre": "Pozo", "tipo": "pit", "daño": 1, "posicion": [2,2]}])
+                assert storage.actualizar_trampas({"pozo": {"activo": False}}) == 1
+                assert storage.cargar_trampas()[0].activo is False, db.nombre
+    reset_data(base)
+    storage.guardar_animales([]); storage.guardar_items([]); storage.guardar_trampas([])
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), semilla=3)
+    eng.crear_animales(especs)
+    assert len(eng.animales) == 5 and eng.repo.n_activos == 1, "Se normaliza una vez al final del lote"
+    assert eng.borrar_animales(["gato a", "gato b", "gato c"]) == 3 and eng.repo.n_activos == 1
+    trampas = [Trap(f"Mover {i}", "moving", 1, (i, 3), dx=1) for i in range(4)] + [Trap("Spike", "spike", 1, (5,5))]
+    for t in trampas:
+        eng.tree_cells.discard(t.posicion)
+    assert eng.crear_trampas(trampas) == 5 and len(eng._moviles) == 4
+    n_items = len(eng.items)
+    try:
+        eng.crear_items([Item("Bien", "juguete", 1, (0,4)), Item("Fuera", "comida", 5, (999, 0))])
+        assert False, "Posición fuera de mapa"
+    except ValueError:
+        assert len(eng.items) == n_items, "Nada se agrega si un elemento del lote es inválido"
+    assert eng.borrar_trampas(["mover 0", "mover 2"]) == 2
+    assert sorted(t.nombre for t in eng.trampas) == ["Mover 1", "Mover 3", "Spike"]
+    assert eng.entidades_en((5,5))["trampas"][0].nombre == "Spike" and eng.celda_bloqueada((3,3))
+    eng.tick(1)
+    assert eng.celda_bloqueada((4,3)) and not eng.celda_bloqueada((3,3)), "Los índices siguen a las filas movidas"
+    assert eng.actualizar_trampas({"spike": {"activo": False}, "mover 3": {"dx": 0}}) == 2
+    assert not eng.entidades_en((5,5))["trampas"] and len(eng._moviles) == 2
+    assert eng.actualizar_trampas({"mover 1": {"activo": "False"}}) == 1 and len(eng._moviles) == 1
+    try:
+        eng.actualizar_trampas({"mover 3": {"activo": "quizás"}})
+        assert False, "Un booleano ambiguo se rechaza"
+    except ValueError:
+        assert len(eng._moviles) == 1
+
+def test_arranque_liviano(base: Path):
+    import subprocess, sys, tempfile
+    from classes.perro import Perro
+    with tempfile.TemporaryDirectory() as tmp:
+        b = storage.BackendJson(Path(tmp) / "sub")
+        assert not b.tiene_datos("animales")
+        b.guardar_animales([])
+        assert b.existe("animales") and not b.tiene_datos("animales")
+        b.guardar_animales([Perro("Kira", "perro", 50, (1, 1))])
+        assert b.tiene_datos("animales")
+        texto = b.archivos["animales"].read_text(encoding="utf-8")
+        for corte in (texto[:30], texto[:texto.rindex("]", 0, len(texto) - 2) + 1]):
+            b.archivos["animales"].write_text(corte, encoding="utf-8")
+            assert not b.tiene_datos("animales"), "Un archivo truncado se vuelve a sembrar"
+    codigo = ("import sys, main; pesados = {'tkinter', 'data.storage', 'game.engine', 'classes.animal'}; "
+              "sys.exit(sorted(pesados & set(sys.modules)) or 0)")
+    r = subprocess.run([sys.executable, "-c", codigo], cwd=base, capture_output=True, text=True)
+    assert r.returncode == 0, f"Importar main no debe cargar el stack: {r.stderr.strip()}"
+
+def test_indice_celdas(base: Path):
+    reset_data(base)
+    from data.storage import guardar_animales, guardar_items, guardar_trampas
+    guardar_animales([]); guardar_items([])
+    guardar_trampas([Trap(nombre="Mover", tipo="moving", daño=1, posicion=(8,5), dx=1)])
+    j = Jugador(nombre="Tester", posicion=(0,0))
+    eng = GameEngine(j, remaining_time=30)
+    mover = eng.trampas[0]
+    eng.tick(1)
+    assert eng.entidades_en((9,5))["trampas"] == [mover] and not eng.entidades_en((8,5))["trampas"]
+    eng.tick(1)
+    assert mover.posicion == (0,5) and eng.celda_bloqueada((0,5))
+    for it in eng.items:
+        assert it in eng.entidades_en(it.posicion)["items"]
+    activa = eng._active_animals()[0]
+    assert eng.entidades_en(activa.posicion)["animales"] == [activa]
+
+def test_almacen_columnar(base: Path):
+    from game.almacen import AlmacenItems, AlmacenTrampas
+    trampas = [Trap(f"T-{i % 5}", "moving" if i % 2 else "spike", 1, (i, 0), dx=i % 2) for i in range(6)]
+    alm = AlmacenTrampas(trampas)
+    assert alm.a_dicts() == [t.to_dict() for t in trampas] and list(alm) == alm[:]
+    t = alm[3]
+    assert t is alm[3] and isinstance(t, Trap) and (t.tipo, t.posicion, t.dx) == ("moving", (3,0), 1)
+    t.posicion, t.activo = (7,7), False
+    assert alm.posicion(3) == (7,7) and alm.a_dicts()[3]["activo"] is False
+    assert len(alm.nombres) == 5 and alm.bytes_por_entidad() < 40
+    items = AlmacenItems([Item("A", "comida", 5, (0,0)), Item("B", "juguete", 3, (1,0)), Item("C", "escudo", 1, (2,0))])
+    a, c = items[0], items[2]
+    assert items.quitar(0) == 2 and c.fila == 0 and items[0] is c, "La última fila ocupa el hueco (misma vista)"
+    assert (a.nombre, a.posicion) == ("A", (0,0)) and len(items) == 2, "La vista quitada conserva sus valores"
+    reset_data(base)
+    storage.guardar_animales([]); storage.guardar_trampas([])
+    storage.guardar_items([Item("Comida A", "comida", 5, (1,0)), Item("Pelota", "juguete", 3, (2,0))])
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), semilla=1)
+    pelota = next(i for i in eng.items if i.tipo == "juguete")
+    eng.mover_jugador(1, 0)
+    assert pelota in eng.items and eng.entidades_en(pelota.posicion)["items"] == [pelota]
+    eng.mover_jugador(1, 0)
+    assert pelota not in eng.items and eng.jugador.puntuacion == 8
+    eng.flush()
+    assert [i.to_dict() for i in storage.cargar_items()] == [i.to_dict() for i in eng.items]
+
+def test_tick_trampas_moviles(base: Path):
+    from game.eventos import TrampaActivada
+    reset_data(base)
+    storage.guardar_animales([]); storage.guardar_items([])
+    storage.guardar_trampas([Trap("Mover-1", "moving", 1, (3,0), dx=-1), Trap("Quieta", "moving", 1, (0,0)),
+                             Trap("Mover-2", "moving", 1, (7,7), dy=1), Trap("Spike", "spike", 1, (5,5))])
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), remaining_time=30, semilla=2)
+    golpes = []
+    eng.eventos.suscribir(TrampaActivada, golpes.append)
+    eng.tick(1); eng.tick(1)
+    assert eng.jugador.vidas == 3 and not golpes, "Una trampa que no se mueve no golpea en cada tick"
+    eng.tick(1)
+    assert [g.nombre for g in golpes] == ["Mover-1"] and eng.jugador.vidas == 2, "La móvil que llega al jugador golpea en el tick"
+    assert eng.trampas[2].posicion == (7,0) and eng.entidades_en((7,0))["trampas"] == [eng.trampas[2]]
+    assert eng.celda_bloqueada((7,0)) and not eng.celda_bloqueada((7,7))
+    eng._sync_ocupantes()
+    assert not eng._libres.libre((7,0)) and eng._libres.libre((7,7))
+
+def test_pool_celdas_libres(base: Path):
+    reset_data(base)
+    from data.storage import guardar_animales, guardar_items, guardar_trampas
+    guardar_animales([]); guardar_items([])
+    guardar_trampas([Trap(nombre="Mover", tipo="moving", daño=1, posicion=(3,3), dx=1),
+                     Trap(nombre="Spike", tipo="spike", daño=1, posicion=(0,1))])
+    j = Jugador(nombre="Tester", posicion=(0,0))
+    eng = GameEngine(j, remaining_time=30)
+    for paso in [(0,1), (1,0), (1,0), (0,1)]:
+        eng.mover_jugador(*paso); eng.tick(1)
+    eng.spawn_monster()
+    eng._sync_ocupantes()
+    bloqueadas = eng._blocked_cells()
+    for x in range(eng.map_w):
+        for y in range(eng.map_h):
+            assert eng._libres.libre((x,y)) == ((x,y) not in bloqueadas), f"Pool desincronizado en {(x,y)}"
+    from data.seeds import pool_de_siembra, seed_animales, seed_items
+    libres = pool_de_siembra(3, 3)
+    seed_animales(n=8, w=3, h=3, libres=libres)
+    posiciones = [a.posicion for a in storage.cargar_animales()]
+    assert len(set(posiciones)) == 8 and (0,0) not in posiciones, "Pool compartido: una celda por entidad, sin el inicio"
+    try:
+        seed_items(m=1, w=3, h=3, libres=libres)
+        assert False, "Sin celdas libres no se apila en (0,0)"
+    except ValueError:
+        pass
+    from data.seeds import rng_de_siembra, seed_trampas
+    def sembrar(semilla):
+        libres, rng = pool_de_siembra(12, 12), rng_de_siembra(semilla)
+        seed_animales(n=8, w=12, h=12, libres=libres, rng=rng)
+        seed_items(m=10, w=12, h=12, libres=libres, rng=rng)
+        seed_trampas(w=12, h=12, libres=libres, rng=rng)
+        return [[(e.nombre, e.posicion) for e in getattr(storage, f"cargar_{c}")()] for c in ("animales", "items", "trampas")]
+    assert sembrar(7) == sembrar(7), "Misma semilla de siembra = mismo mundo"
+
+def test_mapa_configurable(base: Path):
+    reset_data(base)
+    from data.storage import guardar_animales, guardar_items, guardar_trampas, cargar_mundo
+    guardar_animales([]); guardar_items([])
+    guardar_trampas([Trap(nombre="Mover", tipo="moving", daño=1, posicion=(39,24), dx=1, dy=1)])
+    try:
+        eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), remaining_time=30, ancho=40, alto=25)
+        assert cargar_mundo() == {"ancho": 40, "alto": 25}, "El tamaño se persiste con los datos"
+        eng.tick(1); assert eng.trampas[0].posicion == (0,0)
+        assert len(eng.tree_cells) == 100 and len(eng.flower_cells) == 80
+        eng2 = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), remaining_time=30)
+        assert (eng2.map_w, eng2.map_h) == (40, 25)
+        guardar_trampas([Trap(nombre="Lejos", tipo="spike", daño=1, posicion=(45,3))])
+        try:
+            GameEngine(Jugador(nombre="Tester", posicion=(0,0)), remaining_time=30)
+            assert False, "Debe rechazar entidades fuera del mapa"
+        except ValueError:
+            pass
+    finally:
+        reset_data(base)
+
+def test_monstruo_rodea_arboles(base: Path):
+    reset_data(base)
+    from data.storage import guardar_animales, guardar_items, guardar_trampas
+    guardar_animales([]); guardar_items([]); guardar_trampas([])
+    j = Jugador(nombre="Tester", posicion=(0,5))
+    eng = GameEngine(j, remaining_time=30)
+    # Pared de árboles en x=4 con un hueco en y=9: el paso codicioso quedaría trabado
+    eng.tree_cells = type(eng.tree_cells)(eng.map_w, eng.map_h, [(4,y) for y in range(9)])
+    eng.campo_monstruo.obstaculos = eng.tree_cells; eng.campo_monstruo.invalidar()
+    eng.monster_pos = (8,5); eng.monster_active = True
+    for _ in range(20):
+        eng.monster_step()
+        assert eng.monster_pos not in eng.tree_cells
+        if eng.game_over: break
+    assert eng.game_over, "El monstruo debe rodear la pared y alcanzar al jugador"
+
+def test_simulacion_headless(base: Path):
+    from game.simulacion import ejecutar
+    antes = storage.backend_actual()
+    resultados, _ = ejecutar(3, "greedy", workers=1, semilla=7)
+    assert storage.backend_actual() is antes, "La simulación no debe tocar el backend del juego"
+    assert len(resultados) == 3 and all(r["motivo"] != "sin terminar" for r in resultados)
+    assert resultados == ejecutar(3, "greedy", workers=1, semilla=7)[0], "Misma semilla, mismo resultado"
+
+def test_replay_determinista(base: Path):
+    import random
+    from game.replay import Grabador, ReproduccionDivergente, reproducir
+    from game.simulacion import jugar_partida
+    from data.seeds import seed_animales, seed_items, seed_trampas
+    reset_data(base)
+    storage.guardar_mundo({"ancho": 12, "alto": 12})
+    mundo = random.Random(7)
+    seed_animales(w=12, h=12, rng=mundo); seed_items(w=12, h=12, rng=mundo); seed_trampas(w=12, h=12, rng=mundo)
+    a = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), semilla=42)
+    b = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), semilla=42)
+    assert a.estado() == b.estado(), "Misma semilla y mismos datos: mismo mundo inicial"
+    reset_data(base)
+    storage.guardar_mundo({"ancho": 12, "alto": 12})
+    mundo = random.Random(7)
+    seed_animales(w=12, h=12, rng=mundo); seed_items(w=12, h=12, rng=mundo); seed_trampas(w=12, h=12, rng=mundo)
+    g = Grabador()
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), remaining_time=30, grabador=g)
+    eng.crear_animal("Kira", "gato", 50, 1, (5, 5)); eng.actualizar_animal("Kira", energia=10)
+    try:
+        eng.crear_animal("Rolo", "perro", 50, 1, (99, 99))
+    except ValueError:
+        pass                                     # rechazada también al reproducir
+    jugar_partida(eng, "greedy", random.Random(3))
+    grabacion = g.grabacion(eng)
+    assert len(grabacion["entradas"]) > 20 and grabacion["entradas"][0][1] == "c"
+    otro, _ = reproducir(grabacion)
+    assert otro.jugador.puntuacion == eng.jugador.puntuacion and otro.motivo_game_over == eng.motivo_game_over
+    grabacion["semilla"] += 1
+    try:
+        reproducir(grabacion)
+    except ReproduccionDivergente:
+        pass
+    else:
+        raise AssertionError("Otra semilla debe divergir")
+
+def test_snapshot_binario(base: Path):
+    import random
+    from game.simulacion import jugar_partida
+    reset_data(base)
+    storage.guardar_animales([]); storage.guardar_items([Item("Comida A", "comida", 10, (2,0))])
+    storage.guardar_trampas([Trap("Mover-1", "moving", 1, (0,5), dx=1), Trap("Camo-1", "camo", 1, (6,6), visible=False)])
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), semilla=5)
+    eng.mover_jugador(1, 0); eng.mover_jugador(1, 0); eng.tick(2); eng.spawn_monster()
+    datos = eng.snapshot()
+    assert datos[:4] == b"PTSN" and len(datos) < 4096
+    estado = eng.estado()
+    otro = GameEngine(Jugador(nombre="Otro", posicion=(3,3)), semilla=99)
+    otro.restore(datos)
+    assert otro.estado() == estado and otro.jugador.inventario == ["Comida A"]
+    jugar_partida(eng, "random", random.Random(1)); jugar_partida(otro, "random", random.Random(1))
+    assert otro.estado() == eng.estado(), "Tras restaurar, la partida sigue igual que la original"
+    import struct
+    from game.snapshot import _CABECERA, _MOTOR
+    ultima_libre = len(datos) - 9 - 625 * 4 - 4         # antes del estado del rng y del gauss
+    con = lambda off, fmt, v: datos[:off] + struct.pack(fmt, v) + datos[off + struct.calcsize(fmt):]
+    malos = (datos[:40], b"XXXX" + datos[4:], datos + b"\0",
+             con(_CABECERA.size + _MOTOR.size, "<I", 10**6),      # nombre del jugador: texto inexistente
+             con(ultima_libre, "<i", 999999),                    # celda fuera del mapa
+             con(ultima_libre, "<i", 2))                         # celda ocupada (la del jugador)
+    estado = otro.estado()
+    for malo in malos:
+        try:
+            otro.restore(malo)
+        except ValueError:
+            assert otro.estado() == estado, "Un snapshot rechazado no modifica el motor"
+            continue
+        raise AssertionError("Snapshot inválido aceptado")
+
+def test_advance_equivale_a_ticks(base: Path):
+    import random
+    for caso in range(40):
+        rng = random.Random(caso)
+        reset_data(base)
+        w, h = rng.randint(3, 12), rng.randint(3, 12)
+        storage.guardar_mundo({"ancho": w, "alto": h})
+        storage.guardar_animales([]); storage.guardar_items([])
+        storage.guardar_trampas([Trap(f"M{i}", "moving", 1, (rng.randrange(w), rng.randrange(h)),
+                                      dx=rng.randint(-2, 2), dy=rng.randint(-2, 2)) for i in range(rng.randint(0, 6))])
+        j = Jugador(nombre="Tester", posicion=(rng.randrange(w), rng.randrange(h)),
+                    poison_ticks=rng.choice([0, 0, 4]), escudos=rng.choice([0, 1]))
+        eng = GameEngine(j, remaining_time=rng.randint(0, 150), semilla=caso)
+        if caso % 2:
+            eng.repo.rescatar(eng._active_animals()[0]); eng._pet_respawn_delay = rng.choice([0.0, 1.0, 2.5])
+        otro = GameEngine(Jugador(nombre="Otro"), semilla=0)
+        otro.restore(eng.snapshot())
+        n = rng.randint(0, 200)
+        for _ in range(n):
+            eng.tick(1)
+        otro.advance(n)
+        assert otro.estado() == eng.estado(), f"advance({n}) difiere de {n} ticks (caso {caso})"
+
+def test_bench_regresiones(base: Path):
+    from tests.bench import comparar, medir
+    r = medir(lambda: ((lambda: None), 1), repeticiones=2, minimo_s=0.001)
+    assert r["mediana_us"] >= 0 and r["repeticiones"] == 2
+    base_ = {"a": {"mediana_us": 10.0}, "b": {"mediana_us": 10.0}}
+    actual = {"a": {"mediana_us": 12.0}, "b": {"mediana_us": 13.0}, "nuevo": {"mediana_us": 1.0}}
+    regresiones = comparar(actual, base_, tolerancia=0.25)
+    assert len(regresiones) == 1 and regresiones[0].startswith("b:")
+
+def test_metricas_opt_in(base: Path):
+    from data.metricas import Metricas
+    reset_data(base)
+    apagada = Metricas()
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), metricas=apagada)
+    eng.mover_jugador(1, 0); eng.tick(1)
+    assert not apagada.fases and not apagada.contadores, "Apagada no debe registrar nada"
+    m = Metricas(activo=True)
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)), metricas=m)
+    eng.mover_jugador(1, 0); eng.tick(1); eng.flush()
+    eng.persistencia.marcar("items"); eng.flush()
+    d = m.volcar()
+    assert d["fases"]["mover"]["n"] == 1 and d["fases"]["tick"]["n"] == 1
+    assert d["fases"]["persistencia"]["n"] >= 1
+    assert sum(d["fases"]["mover"]["baldes_log2_us"]) == 1
+
+class CanvasFalso:
+    """Lo mínimo de tk.Canvas que usa la escena (sin display)."""
+    def __init__(self):
+        self.items, self.creados, self.movidos = {}, 0, 0
+    def _crear(self, *coords, tags=(), **kw):
+        self.creados += 1; self.items[self.creados] = [list(coords), set(tags)]; return self.creados
+    create_oval = create_rectangle = create_text = create_image = _crear
+    def _ids(self, expr):
+        tags = expr.split("&&")
+        return [i for i, (_, t) in self.items.items() if all(x in t for x in tags)]
+    def delete(self, expr):
+        for i in (self._ids(expr) if isinstance(expr, str) else [expr]): self.items.pop(i, None)
+    def itemconfig(self, i, **kw):
+        self.items[i].append(kw)
+    def move(self, expr, dx, dy):
+        for i in self._ids(expr):
+            c = self.items[i][0]; self.items[i][0] = [v + (dx if k % 2 == 0 else dy) for k, v in enumerate(c)]
+        self.movidos += 1
+    def xview(self): return (0.0, 1.0)
+    def yview(self): return (0.0, 1.0)
+
+def test_escena_retenida(base: Path):
+    from types import MethodType, SimpleNamespace
+    from gui.app import App, CELL
+    from gui.animacion import Animador
+    from gui.escena import Escena
+    from data.storage import guardar_animales, guardar_items, guardar_trampas
+    reset_data(base)
+    guardar_animales([]); guardar_trampas([])
+    guardar_items([Item("Comida A", "comida", 10, (3,3)), Item("Pelota", "juguete", 5, (5,5))])
+    class Vista(SimpleNamespace):
+        def __getattr__(self, nombre): return MethodType(getattr(App, nombre), self)
+    canvas = CanvasFalso()
+    vista = Vista(engine=GameEngine(Jugador(nombre="Tester", posicion=(0,0)), semilla=1), canvas=canvas,
+                  escena=Escena(canvas, CELL), anim=Animador(canvas), _sprite_idx={}, metricas=storage.METRICAS,
+                  recursos=SimpleNamespace(sprite=lambda *a: None, variantes=lambda *a: [],
+                                           figura=lambda clave, pintar: pintar(CELL)))
+    vista.engine.tree_cells.discard((1,0))        # el paso a la derecha del test no puede chocar un árbol
+    App._draw_world(vista)
+    creados = canvas.creados
+    App._draw_world(vista)
+    assert canvas.creados == creados and canvas.movidos == 0, "Sin cambios no debe tocar el canvas"
+    jugador = [i for i, (_, t) in canvas.items.items() if "anim_player" in t]
+    assert len(jugador) == 1, "El jugador sin sprite es una sola imagen horneada"
+    x0 = canvas.items[jugador[0]][0][0]
+    vista.engine.mover_jugador(1, 0); App._draw_world(vista)
+    assert canvas.creados == creados, "Moverse no recrea ítems"
+    assert canvas.items[jugador[0]][0][0] == x0, "El jugador arranca el tween desde la celda anterior"
+    vista.anim.avanzar(60)
+    assert x0 < canvas.items[jugador[0]][0][0] < x0 + CELL
+    vista.anim.avanzar(10_000)                   # cuadros perdidos: salta al final del tween
+    assert canvas.items[jugador[0]][0][0] == x0 + CELL and not vista.anim.en_movimiento(vista.escena.tag_de("jugador"))
+    items = vista.engine.items
+    assert all(v is None for v in items._vistas), "Dibujar no crea vistas de items"
+    assert [t for _, _, t in vista.engine.en_rect(3, 3, 4, 4)["items"]] == ["comida"], "Solo las celdas del rectángulo"
+    pelota = next(i for i in items if i.tipo == "juguete")
+    vista.engine._quitar_item(pelota); App._draw_world(vista)
+    assert ("item", len(items)) not in vista.escena and len(canvas.items) < creados
+    y0 = canvas.items[jugador[0]][0][1]
+    for dy in (-2, -1, -2, -1):
+        vista.escena.fijar_desfase("anim_player", 0, dy)
+    assert canvas.items[jugador[0]][0][1] == y0 - 1, "El rebote es un desfase absoluto, sin deriva"
+
+def test_animacion_por_grupos(base: Path):
+    import math
+    from gui.animacion import Animador, TablaOnda
+    canvas = CanvasFalso()
+    for i in range(200):
+        canvas.create_rectangle(0, 0, 1, 1, tags=("trunk", f"trunk{i % 4}"))
+    anim = Animador(canvas)
+    onda = TablaOnda(lambda t: round(3 * math.sin(t)), 8)
+    assert onda.valores == (0, 2, 3, 2, 0, -2, -3, -2)
+    for k in range(4):
+        anim.onda(f"trunk{k}", onda, 800, fase=k / 4)
+    for ms in range(0, 8000, 16):
+        anim.avanzar(ms)
+    assert canvas.movidos <= 4 * 8 * 10, "Un move por grupo y solo cuando cambia la fase"
+    anim.avanzar(200)                            # fase 1/4 -> grupo 0 en 3, grupo 1 en 0
+    ys = {k: canvas.items[next(i for i, (_, t) in canvas.items.items() if f"trunk{k}" in t)][0][1] for k in range(4)}
+    assert ys == {0: 3, 1: 0, 2: -3, 3: 0}, ys
+    # tweens encadenados: el segundo paso arranca desde donde iba el primero
+    canvas.create_oval(0, 0, 10, 10, tags=("ent1",))
+    anim.avanzar(0); anim.deslizar("ent1", -50, 0, 100)
+    anim.avanzar(50); x_medio = canvas.items[201][0][0]
+    anim.deslizar("ent1", -50, 0, 100)
+    assert canvas.items[201][0][0] == x_medio - 50
+    anim.avanzar(150)
+    assert canvas.items[201][0][0] == 0 and not anim.en_movimiento("ent1")
+
+def test_recursos_sprites(base: Path):
+    import tempfile
+    from gui.app import CELL, pintar_huella
+    from gui.assets import Recursos, empaquetar, escala
+    assert escala(48, 48) == (1, 1) and escala(24, 48) == (2, 1) and escala(112, 48) == (3, 7)
+    assert escala(4000, 48) == (1, 8), "Los factores quedan acotados"
+    pos, ancho, alto = empaquetar({"a": (40, 40), "b": (30, 50), "c": (40, 20)}, ancho_max=80)
+    assert pos["b"] == (0, 0) and pos["a"] == (30, 0) and pos["c"] == (0, 50) and (ancho, alto) == (70, 70)
+    huella = pintar_huella(CELL)
+    assert huella.px[0][0] is None and huella.px[CELL//2][CELL//2] is not None, "Fondo transparente"
+    with tempfile.TemporaryDirectory() as tmp:
+        rec = Recursos(None, CELL, raiz=Path(tmp))
+        assert rec.variantes("gato") == [] and rec.sprite("jugador") is None and rec.decodificados == 0
+
+def test_raster_fondo(base: Path):
+    from gui.raster import Lienzo, TROZO, trozos_en
+    lz = Lienzo(20, 10, "#000000")
+    lz.rect(2, 2, 6, 4, "#ff0000"); lz.ovalo(10, 0, 20, 10, "#00ff00")
+    assert lz.px[3][2] == "#ff0000" and lz.px[4][2] == "#000000"
+    assert lz.px[5][15] == "#00ff00" and lz.px[0][10] == "#000000", "El óvalo no pinta las esquinas"
+    datos = lz.datos()
+    assert datos.count("{") == 10 and datos.startswith("{#000000 ")
+    assert trozos_en(0, 0, 12, 12, 10, 10) == [(0, 0)]
+    assert len(trozos_en(TROZO - 2, 0, TROZO + 10, 5, 100, 100)) == 2
+    assert trozos_en(-5, -5, 0, 0, 100, 100) == []
+
+def test_planificador_cuadros(base: Path):
+    from gui.scheduler import Planificador
+    class Widget:
+        def __init__(self): self.pendiente = None
+        def after(self, ms, fn): self.pendiente = fn; return "job"
+        def after_cancel(self, job): self.pendiente = None
+        def correr(self): fn, self.pendiente = self.pendiente, None; fn()
+    reloj = [0.0]
+    w = Widget()
+    p = Planificador(w, paso_ms=20, max_pasos=5, reloj=lambda: reloj[0])
+    ticks, dibujos = [], []
+    p.al_dibujar(lambda: dibujos.append(p.ahora_ms))
+    animados = []; p.al_cuadro(animados.append)
+    p.cada("tick", 100, lambda: (ticks.append(p.ahora_ms), p.invalidar(), p.invalidar()))
+    p.una_vez("spawn", 50, lambda: p.cada("monstruo", 30, p.invalidar))
+    p.iniciar()
+    for _ in range(10):                      # 10 cuadros puntuales de 20 ms
+        reloj[0] += 0.020; w.correr()
+    assert ticks == [100.0, 200.0], ticks
+    assert p.ahora_ms == 200.0 and p.activa("monstruo") and not p.activa("spawn")
+    assert len(dibujos) <= p.cuadros and len(set(dibujos)) == len(dibujos), "Un redibujo por cuadro como máximo"
+    reloj[0] += 1.0; w.correr()           # máquina trabada 1 s: se simulan 5 pasos y se descarta el resto
+    assert p.ahora_ms == 300.0 and p.pasos_descartados == 45 and ticks[-1] == 300.0
+    assert len(animados) == p.cuadros and animados[-1] == 300.0, "La animación corre una vez por cuadro"
+    p.al_dibujar(p.detener); p.invalidar(); reloj[0] += 0.020; w.correr()
+    assert w.pendiente is None and not p.activa("tick"), "Detenerse desde el render no reprograma el cuadro"
+
+def test_eventos_hud(base: Path):
+    from types import SimpleNamespace
+    from game.eventos import Evento, InventarioCambio, PuntajeCambio, TrampaActivada, VidasCambio
+    from gui.app import InventoryWidget
+    from data.storage import guardar_animales, guardar_items, guardar_trampas
+    reset_data(base)
+    guardar_animales([])
+    guardar_items([Item("Comida A", "comida", 10, (1,0))])
+    guardar_trampas([Trap("Pinchos", "spike", 1, (1,1))])
+    eng = GameEngine(Jugador(nombre="Tester", posicion=(0,0)))
+    recibidos = []
+    eng.eventos.suscribir(Evento, recibidos.append)
+    eng.publicar_estado()
+    assert {type(e).__name__ for e in recibidos} >= {"PuntajeCambio", "VidasCambio", "InventarioCambio"}
+    recibidos.clear(); eng.mover_jugador(0, 0)
+    assert recibidos == [], "Sin cambios no se publica nada"
+    eng.mover_jugador(1, 0)
+    assert PuntajeCambio(5) in recibidos and InventarioCambio(("Comida A",)) in recibidos
+    recibidos.clear(); eng.mover_jugador(0, 1)
+    assert any(isinstance(e, TrampaActivada) for e in recibidos) and VidasCambio(2) in recibidos
+    # Inventario por diferencias: solo se reconfigura/crea/borra la fila que cambió
+    inv = CanvasFalso(); vista = SimpleNamespace(items=[], text_ids=[], **{n: getattr(inv, n) for n in ("create_text", "itemconfig", "delete")})
+    InventoryWidget.set_items(vista, ["Comida A", "Detector"])
+    creados = inv.creados
+    InventoryWidget.set_items(vista, ["Comida A", "Detector", "Comida B"])
+    assert inv.creados == creados + 1
+    InventoryWidget.set_items(vista, ["Detector"])
+    assert len(inv.items) == 1 and vista.items == ["Detector"]
+
 def run():
     base = Path(__file__).resolve().parents[1]
-    tests = [test_spawn_nueva_mascota, test_trampas_vida_y_pit, test_tiempo_game_over]
+    tests = [test_spawn_nueva_mascota, test_trampas_vida_y_pit, test_tiempo_game_over,
+             test_persistencia_diferida, test_escritor_asincrono, test_repositorio_identidad, test_backend_sqlite,
+             test_backend_journal, test_crud_en_lote, test_arranque_liviano, test_indice_celdas, test_almacen_columnar, test_tick_trampas_moviles, test_pool_celdas_libres,
+             test_mapa_configurable, test_monstruo_rodea_arboles, test_simulacion_headless, test_replay_determinista, test_snapshot_binario, test_advance_equivale_a_ticks,
+             test_bench_regresiones, test_metricas_opt_in, test_escena_retenida, test_animacion_por_grupos,
+             test_recursos_sprites,
+             test_raster_fondo, test_planificador_cuadros, test_eventos_hud]
     for t in tests:
         try:
             t(base); print(f"✔ {t.__name__} OK")